@@ -0,0 +1,30 @@
+"""
+Gunicorn settings, read from the working directory: ``gunicorn`` serves
+``sharma_academy.wsgi``. Anything here can be overridden on the command line
+or through ``GUNICORN_CMD_ARGS``; ``WEB_CONCURRENCY`` sets the worker count.
+"""
+import gc
+import os
+
+wsgi_app = 'sharma_academy.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Import Django, the models and the URLconf once in the master (sharma_academy.wsgi
+# warms them up) and fork the workers from it: they share those pages copy-on-write
+# and accept requests as soon as they are forked. Code changes need a restart of the
+# master rather than a HUP then.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+
+def on_starting(server):
+    # Request metrics files (METRICS_DIR) left by the workers of a previous run would
+    # be summed with this run's, under process ids that may be reused.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sharma_academy.settings')
+    from users_management.metrics import registry
+    registry.clear()
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's reach: collections in the
+    # workers would otherwise write to every object's header and copy its page.
+    gc.freeze()
@@ -0,0 +1,163 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """
+    Routing state of the current request or ``use_primary()`` block.
+    """
+    __slots__ = ('pinned', 'wrote', 'user_id', 'pin_users')
+
+    def __init__(self, pinned=False, pin_users=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.user_id = None
+        self.pin_users = pin_users
+
+
+_state = ContextVar('database_routing', default=None)
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary inside the block, e.g. in a job that reads what it just wrote.
+    """
+    token = _state.set(RoutingState(pinned=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def user_pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def set_request_user(user_id):
+    """
+    Record the user the current request is authenticated as, and pin the
+    request to the primary if that user wrote recently, from any client and
+    through any worker (see ``ReplicaPinningMiddleware``). Called by the
+    authentication backends, so only reads made before authentication, e.g.
+    the session, are not pinned.
+    """
+    state = _state.get()
+    if state is None or not state.pin_users:
+        return
+    state.user_id = user_id
+    if not state.pinned:
+        state.pinned = caches[settings.REPLICA_PIN_CACHE_ALIAS].get(user_pin_key(user_id)) is not None
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to ``default`` and reads to a random read replica, i.e. any
+    other configured database (see ``DATABASE_REPLICA_URLS``).
+
+    Reads stay on the primary while the primary is in a transaction, so a
+    transaction (e.g. the admin CSV import) sees its own writes, and while
+    the request or block is pinned (see ``ReplicaPinningMiddleware`` and
+    ``use_primary``). Lookups that tolerate replica lag pass the
+    ``replica_ok`` hint to skip the pin. Without replicas everything goes
+    to ``default``.
+    """
+    def __init__(self, replicas=None):
+        if replicas is None:
+            replicas = [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+        self.replicas = list(replicas)
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        if state is not None and state.pinned and not hints.get('replica_ok'):
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema from the primary.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin requests to the primary database so clients read their own writes.
+
+    Requests with an unsafe method are served from the primary. A request
+    that wrote sets the ``REPLICA_PIN_COOKIE`` cookie, and the client's
+    requests are served from the primary for ``REPLICA_PIN_SECONDS``, long
+    enough for the replicas to catch up. When the request was authenticated,
+    its user is also pinned in the ``REPLICA_PIN_CACHE_ALIAS`` cache, which
+    covers clients that do not keep cookies (API clients) and the user's
+    other clients.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Users are pinned through the cache only when there are replicas.
+        self.pin_users = any(alias != DEFAULT_DB_ALIAS for alias in settings.DATABASES)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def pinned(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        try:
+            return float(request.COOKIES.get(settings.REPLICA_PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def pin(self, state, response):
+        response.set_cookie(
+            settings.REPLICA_PIN_COOKIE, str(int(time.time() + settings.REPLICA_PIN_SECONDS)),
+            max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+        )
+        if state.user_id is not None:
+            caches[settings.REPLICA_PIN_CACHE_ALIAS].set(user_pin_key(state.user_id), 1, settings.REPLICA_PIN_SECONDS)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RoutingState(pinned=self.pinned(request), pin_users=self.pin_users)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            self.pin(state, response)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=self.pinned(request), pin_users=self.pin_users)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            self.pin(state, response)
+        return response
@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+import drf_spectacular
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.views import SpectacularAPIView
+
+logger = logging.getLogger(__name__)
+
+accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+
+# Settings the schema document depends on (views, pagination, authentication,
+# throttling...): a document built with other values is not served.
+SCHEMA_SETTINGS = (
+    'ROOT_URLCONF', 'INSTALLED_APPS', 'REST_FRAMEWORK', 'SPECTACULAR_SETTINGS', 'AUTHENTICATION_BACKENDS',
+    'DEBUG', 'SILK_ENABLED', 'USERS_ASYNC_VIEWS', 'USERS_PAGINATION', 'USERS_BULK_MAX_BATCH',
+    'SIGNED_TOKEN_ACCESS_LIFETIME', 'SIGNED_TOKEN_REFRESH_LIFETIME',
+)
+
+
+def settings_fingerprint():
+    """
+    Digest of the ``SCHEMA_SETTINGS`` and the drf-spectacular version.
+    """
+    values = [(name, getattr(settings, name, None)) for name in SCHEMA_SETTINGS]
+    values.append(('drf_spectacular', drf_spectacular.__version__))
+    return hashlib.sha256(repr(values).encode()).hexdigest()[:32]
+
+
+class SchemaArtifact:
+    """
+    A rendered schema document with its gzip encoding and their strong ETags.
+    """
+    def __init__(self, body, compressed=None):
+        self.body = body
+        # mtime=0 makes the compressed bytes, hence their ETag, the same in every process.
+        self.compressed = compressed if compressed is not None else gzip.compress(body, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """
+        Read the artifact written by ``save()``, or return ``None`` if there is
+        none or it was saved with another ``fingerprint``.
+        """
+        path = Path(path)
+        try:
+            saved_fingerprint = path.with_name(path.name + '.fingerprint').read_text().strip()
+            if saved_fingerprint != (fingerprint or ''):
+                logger.warning("Ignoring %s, built with other settings than the current ones.", path)
+                return None
+            return cls(path.read_bytes(), path.with_name(path.name + '.gz').read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def save(self, path, fingerprint=None):
+        path = Path(path)
+        path.write_bytes(self.body)
+        path.with_name(path.name + '.gz').write_bytes(self.compressed)
+        path.with_name(path.name + '.fingerprint').write_text(fingerprint or '')
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    ``SpectacularAPIView`` that generates each variant of the schema once per
+    process and serves it from memory, gzipped when the client accepts it,
+    with a strong ``ETag`` so unchanged schemas are answered with 304.
+
+    Documents written at build time by ``manage.py build_schema`` into
+    ``API_SCHEMA_DIR`` are served instead of generating them, unless they
+    were built with other ``SCHEMA_SETTINGS`` than the server runs with,
+    e.g. another ``USERS_PAGINATION`` set at run time. Schemas that
+    depend on the requesting user (``SERVE_PUBLIC`` off) are generated on
+    every request as before.
+    """
+    artifacts = {}
+    lock = threading.Lock()
+
+    def _get_schema_response(self, request):
+        if not self.serve_public:
+            return super()._get_schema_response(request)
+
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        key = (
+            request.accepted_renderer.format, request.accepted_media_type.partition(';')[2].strip(),
+            version, translation.get_language(), str(self.urlconf or settings.ROOT_URLCONF),
+        )
+        artifact = self.artifacts.get(key)
+        if artifact is None:
+            with self.lock:
+                artifact = self.artifacts.get(key)
+                if artifact is None:
+                    artifact = self.artifacts[key] = self.build_artifact(request, version, key)
+
+        compressed = bool(accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        etag = artifact.gzip_etag if compressed else artifact.etag
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            # Already rendered: the content type Response would have given it.
+            renderer = request.accepted_renderer
+            content_type = request.accepted_media_type
+            if renderer.charset:
+                content_type = f'{content_type}; charset={renderer.charset}'
+            response = HttpResponse(artifact.compressed if compressed else artifact.body, content_type=content_type)
+            response.headers['Content-Disposition'] = f'inline; filename="{self._get_filename(request, version)}"'
+            if compressed:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.headers['ETag'] = etag
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        return response
+
+    def build_artifact(self, request, version, key):
+        _, media_type_params, _, language, _ = key
+        if settings.API_SCHEMA_DIR and not media_type_params and not version and language == settings.LANGUAGE_CODE:
+            artifact = SchemaArtifact.load(
+                Path(settings.API_SCHEMA_DIR) / f'schema.{request.accepted_renderer.format}', settings_fingerprint(),
+            )
+            if artifact is not None:
+                return artifact
+        response = super()._get_schema_response(request)
+        return SchemaArtifact(request.accepted_renderer.render(
+            response.data, request.accepted_media_type, self.get_renderer_context(),
+        ))
+
+
+def build_schema(directory, renderers=(OpenApiYamlRenderer, OpenApiJsonRenderer)):
+    """
+    Write the public schema as ``schema.<format>`` and ``schema.<format>.gz`` files into
+    ``directory``, with the fingerprint of the settings it was built with.
+    """
+    generator = CachedSpectacularAPIView.generator_class(urlconf=CachedSpectacularAPIView.urlconf)
+    schema = generator.get_schema(request=None, public=True)
+    paths = []
+    for renderer_class in renderers:
+        renderer = renderer_class()
+        path = Path(directory) / f'schema.{renderer.format}'
+        SchemaArtifact(renderer.render(schema, renderer.media_type, {})).save(path, settings_fingerprint())
+        paths.append(path)
+    return paths
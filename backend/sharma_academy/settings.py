@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 import environ
@@ -45,9 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     # third party
-    'silk',
     'rest_framework',
-    'drf_spectacular',
     'phonenumber_field',
 
     # custom
@@ -55,7 +54,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'silk.middleware.SilkyMiddleware',
+    'users_management.metrics.MetricsMiddleware',
+    'users_management.profiling.SamplingProfilerMiddleware',
+    'sharma_academy.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,28 +85,68 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = f"{DJANGO_PROJECT_NAME}.wsgi.application"
+ASGI_APPLICATION = f"{DJANGO_PROJECT_NAME}.asgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DATABASE_URL selects the database, e.g. postgres://user:password@db:5432/dbname
+# (see docker-compose.yml); SQLite is used when it is not set.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': env.db('DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+}
+# Read replicas (comma separated URLs) become replica1, replica2, ...; safe reads go to them
+# (sharma_academy.routers). Tests read and write the primary only. Two local SQLite files
+# work too, `manage.py sync_sqlite_replicas` copies the primary into the replica files.
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    DATABASES[f'replica{index}'] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['sharma_academy.routers.PrimaryReplicaRouter']
+# A client whose request wrote reads from the primary for REPLICA_PIN_SECONDS afterwards
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=15)
+REPLICA_PIN_COOKIE = env.str("REPLICA_PIN_COOKIE", default='db_primary')
+# Any client of an authenticated user who wrote too, through this cache shared by all workers
+REPLICA_PIN_CACHE_ALIAS = env.str("REPLICA_PIN_CACHE_ALIAS", default='default')
+
+# Persistent connections, reused for DATABASE_CONN_MAX_AGE seconds and checked before
+# reuse. Use 0 (a connection per request) when serving through ASGI.
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = env.int("DATABASE_CONN_MAX_AGE", default=600)
+    database['CONN_HEALTH_CHECKS'] = env.bool("DATABASE_CONN_HEALTH_CHECKS", default=True)
+
+# SQLite tuning: WAL lets readers and the writer proceed concurrently, synchronous=NORMAL
+# only fsyncs at checkpoints in WAL mode, mmap_size and cache_size (negative: KiB) keep
+# hot pages in memory, writers wait up to SQLITE_BUSY_TIMEOUT seconds for the lock and
+# transactions start with BEGIN IMMEDIATE so a read-then-write transaction cannot fail
+# to upgrade its lock with "database is locked".
+SQLITE_JOURNAL_MODE = env.str("SQLITE_JOURNAL_MODE", default='WAL')
+SQLITE_SYNCHRONOUS = env.str("SQLITE_SYNCHRONOUS", default='NORMAL')
+SQLITE_MMAP_SIZE = env.int("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024)
+SQLITE_CACHE_SIZE = env.int("SQLITE_CACHE_SIZE", default=-64 * 1024)
+SQLITE_BUSY_TIMEOUT = env.float("SQLITE_BUSY_TIMEOUT", default=10.0)
+SQLITE_TRANSACTION_MODE = env.str("SQLITE_TRANSACTION_MODE", default='IMMEDIATE')
+
+for database in DATABASES.values():
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database['OPTIONS'] = {
+            'init_command': (
+                f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}; PRAGMA synchronous={SQLITE_SYNCHRONOUS}; '
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}; PRAGMA cache_size={SQLITE_CACHE_SIZE};'
+            ),
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': SQLITE_TRANSACTION_MODE,
+            **database.get('OPTIONS', {}),
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Multi-process deployments need a cache shared by all workers (e.g. redis://),
+# otherwise user state is per process.
+
+CACHES = {
+    'default': env.cache('DJANGO_CACHE_URL', default='locmemcache://'),
 }
-
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': env('POSTGRES_NAME', default='postgres'),
-#         'USER': env('POSTGRES_USER', default='postgres'),
-#         'PASSWORD': env('POSTGRES_PASSWORD', default=''),
-#         'HOST': env('POSTGRES_HOST', default='localhost'),
-#         'PORT': env('POSTGRESS_PORT', default=5432),
-#     }
-# }
 
 
 # Password validation
@@ -131,17 +172,117 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'users_management.User'
 
+AUTHENTICATION_BACKENDS = [
+    'users_management.backends.CachedModelBackend',
+]
+
+# Versioned cache of authenticated users (see users_management.caching.UserCache);
+# USER_CACHE_ALIAS names a CACHES entry shared by all workers (e.g. Redis) to enable it
+USER_CACHE_ALIAS = env.str("USER_CACHE_ALIAS", default=None)
+USER_CACHE_SIZE = env.int("USER_CACHE_SIZE", default=1024)
+USER_CACHE_TIMEOUT = env.int("USER_CACHE_TIMEOUT", default=300)
+
+# Serve the user API with the async viewset (for ASGI deployments)
+USERS_ASYNC_VIEWS = env.bool("USERS_ASYNC_VIEWS", default=False)
+
+# Pagination of the user listing: 'page' (page numbers with an exact count) or
+# 'cursor' (keyset pagination with an optional estimated count)
+USERS_PAGINATION = env.str("USERS_PAGINATION", default='page')
+# Seconds a counted total is reused when no planner estimate is available
+USERS_COUNT_CACHE_TIMEOUT = env.int("USERS_COUNT_CACHE_TIMEOUT", default=60)
+
+# Admin mode for very large user tables: estimated changelist counts and an
+# autocomplete recommended_by widget (see users_management.admin.CustomUserAdmin)
+USERS_ADMIN_LARGE_TABLE = env.bool("USERS_ADMIN_LARGE_TABLE", default=False)
+
+# The OpenAPI schema and its Swagger UI and Redoc pages. Workers serving with it off
+# don't import drf_spectacular at all.
+API_SCHEMA_ENABLED = env.bool("API_SCHEMA_ENABLED", default=True)
+if API_SCHEMA_ENABLED:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index('phonenumber_field'), 'drf_spectacular')
+# Directory of the OpenAPI schema files written by `manage.py build_schema` at build time,
+# served by /api/schema/ instead of generating the schema in each process
+API_SCHEMA_DIR = env.str("API_SCHEMA_DIR", default=None)
+
+# Most users an institute can register in one POST /api/users/bulk/ call
+USERS_BULK_MAX_BATCH = env.int("USERS_BULK_MAX_BATCH", default=500)
+
+# Request metrics exposed at /metrics (users_management.metrics). METRICS_DIR is a
+# directory shared by the worker processes of a host, cleared when gunicorn starts
+# (gunicorn.conf.py); without it each process only reports its own requests.
+METRICS_DIR = env.str("METRICS_DIR", default=None)
+METRICS_FLUSH_INTERVAL = env.float("METRICS_FLUSH_INTERVAL", default=5.0)
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=['127.0.0.1', '::1'])
+
+# Sampled request profiling into Silk's tables (users_management.profiling):
+# fraction of requests profiled (0 disables it), fnmatch path patterns to profile
+# (all when empty), and the in-memory buffer flushed in batches by a background thread
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_ALLOWLIST = env.list("PROFILING_ALLOWLIST", default=[])
+PROFILING_BUFFER_SIZE = env.int("PROFILING_BUFFER_SIZE", default=1000)
+PROFILING_FLUSH_INTERVAL = env.float("PROFILING_FLUSH_INTERVAL", default=5.0)
+PROFILING_FLUSH_BATCH = env.int("PROFILING_FLUSH_BATCH", default=100)
+# Silk (its pages at /silk/ in DEBUG, and the tables profiling samples are written to) is
+# only installed when one of them is used; its tables are created by `migrate` once it is.
+SILK_ENABLED = env.bool("SILK_ENABLED", default=DEBUG or PROFILING_SAMPLE_RATE > 0)
+if SILK_ENABLED:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index('rest_framework'), 'silk')
+
+# Signed access/refresh tokens (users_management.authentication), lifetimes in seconds;
+# revocations are kept in the database (TokenRevocation, purged by `manage.py purge_token_revocations`)
+# and reloaded by each worker every SIGNED_TOKEN_REVOCATION_REFRESH seconds
+SIGNED_TOKEN_ACCESS_LIFETIME = env.int("SIGNED_TOKEN_ACCESS_LIFETIME", default=5 * 60)
+SIGNED_TOKEN_REFRESH_LIFETIME = env.int("SIGNED_TOKEN_REFRESH_LIFETIME", default=24 * 60 * 60)
+SIGNED_TOKEN_REVOCATION_REFRESH = env.float("SIGNED_TOKEN_REVOCATION_REFRESH", default=5.0)
+
+# SQLite file holding the API throttle counters, shared by all workers on the host;
+# it only holds short-lived counters, so it lives in the temporary directory by default
+THROTTLE_STORE_PATH = env.str(
+    "THROTTLE_STORE_PATH", default=os.path.join(tempfile.gettempdir(), f'{DJANGO_PROJECT_NAME}-throttle.sqlite3'),
+)
+
+# Password hashing pool used for registrations and bulk imports
+PASSWORD_HASHING_WORKERS = env.int("PASSWORD_HASHING_WORKERS", default=os.cpu_count() or 1)
+PASSWORD_HASHING_QUEUE_SIZE = env.int("PASSWORD_HASHING_QUEUE_SIZE", default=PASSWORD_HASHING_WORKERS * 4)
+PASSWORD_HASHING_CHUNK_SIZE = env.int("PASSWORD_HASHING_CHUNK_SIZE", default=16)
+
+# Background CSV imports run by `manage.py run_workers`, in seconds: how often a worker records
+# it is alive, after how long without a heartbeat its job is resumed by another worker, and how
+# often idle workers look for new jobs
+IMPORT_JOB_HEARTBEAT = env.float("IMPORT_JOB_HEARTBEAT", default=10.0)
+IMPORT_JOB_STALE_AFTER = env.float("IMPORT_JOB_STALE_AFTER", default=60.0)
+IMPORT_JOB_POLL_INTERVAL = env.float("IMPORT_JOB_POLL_INTERVAL", default=2.0)
+
+# Referral code -> institute id cache; REFERRAL_CACHE_ALIAS names a CACHES entry for the shared tier
+REFERRAL_CACHE_ALIAS = env.str("REFERRAL_CACHE_ALIAS", default=None)
+REFERRAL_CACHE_SIZE = env.int("REFERRAL_CACHE_SIZE", default=1024)
+REFERRAL_CACHE_TIMEOUT = env.int("REFERRAL_CACHE_TIMEOUT", default=300)
+REFERRAL_CACHE_NEGATIVE_TIMEOUT = env.int("REFERRAL_CACHE_NEGATIVE_TIMEOUT", default=30)
+
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users_management.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'users_management.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_SCHEMA_CLASS': (
+        'drf_spectacular.openapi.AutoSchema' if API_SCHEMA_ENABLED else 'rest_framework.schemas.openapi.AutoSchema'
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'users_management.throttling.AnonRateThrottle',
+        'users_management.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '10/hour',
         'user': '100/hour',
+        # POST /api/users/bulk/ calls per institute, whatever the number of users in each
+        'user_batch': '30/hour',
     }
 }
 
@@ -0,0 +1,23 @@
+"""
+Work a server process does before it accepts requests.
+
+With a pre-fork server that preloads the application (``preload_app`` in
+``gunicorn.conf.py``) it happens once, in the master: the workers forked from
+it share the imported modules copy-on-write and serve their first request at
+full speed.
+"""
+from django.db import connections
+from django.urls import get_resolver
+
+
+def warm_up():
+    """
+    Import the URLconf, and with it every view, serializer and URL pattern,
+    and build the reverse lookup tables, which Django otherwise does on the
+    first request. Connections opened meanwhile are closed: a forked worker
+    must open its own.
+    """
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+    connections.close_all()
@@ -17,8 +17,8 @@ Including another URLconf
 from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
-from drf_spectacular.views import (SpectacularAPIView, SpectacularRedocView,
-                                   SpectacularSwaggerView)
+
+from users_management.metrics import metrics_view
 
 admin.site.site_header = 'Sharma Academy Admin'
 admin.site.site_title = 'Sharma Academy Admin Portal'
@@ -28,15 +28,26 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users_management.urls')),
 
-    # OpenAPI Schema (raw JSON)
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    # Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
+]
 
-    # Swagger UI
-    path('swagger/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='swagger-ui'),
+if settings.API_SCHEMA_ENABLED:
+    from drf_spectacular.views import (SpectacularRedocView,
+                                       SpectacularSwaggerView)
 
-    # Redoc UI
-    path('redoc/', SpectacularRedocView.as_view(url_name='api-schema'), name='redoc-ui'),
-]
+    from sharma_academy.schema import CachedSpectacularAPIView
+
+    urlpatterns += [
+        # OpenAPI Schema (raw JSON)
+        path('api/schema/', CachedSpectacularAPIView.as_view(), name='api-schema'),
+
+        # Swagger UI
+        path('swagger/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='swagger-ui'),
+
+        # Redoc UI
+        path('redoc/', SpectacularRedocView.as_view(url_name='api-schema'), name='redoc-ui'),
+    ]
 
-if settings.DEBUG:
+if settings.DEBUG and settings.SILK_ENABLED:
     urlpatterns += [path('silk/', include('silk.urls', namespace='silk'))]
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from sharma_academy.startup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sharma_academy.settings')
 
 application = get_wsgi_application()
+
+# Load the URLconf now rather than on the first request (see sharma_academy.startup).
+warm_up()
@@ -1,19 +1,24 @@
-import csv
-from io import TextIOWrapper
-
 from django import forms
+from django.conf import settings
 from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
-from django.contrib.auth.hashers import make_password
-from django.core.exceptions import ValidationError
-from django.core.validators import validate_email
-from django.db import transaction
-from django.shortcuts import redirect, render
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import path, reverse
+from django.utils.html import format_html
+
+from users_management.exports import export_response
+from users_management.importers import error_report
+from users_management.jobs import enqueue_import
+from users_management.models import ImportJob, User
+from users_management.pagination import EstimatedCountPaginator
+from users_management.search import search_users
 
-from users_management.models import User
-from users_management.validators import StrongPasswordValidator
+# Seconds between refreshes of a running import's progress page, and rejected rows listed on it.
+IMPORT_PROGRESS_REFRESH = 2
+IMPORT_ERRORS_SHOWN = 20
 
 
 class CSVUploadForm(forms.Form):
@@ -23,11 +28,21 @@ class CSVUploadForm(forms.Form):
     csv_file = forms.FileField(label="Upload CSV File (Emails and Referral Code)")
 
 
+class LargeTableChangeList(ChangeList):
+    """
+    Changelist that only loads the columns it displays.
+    """
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.changelist_fields)
+
+
 class CustomUserAdmin(UserAdmin):
     add_form = UserCreationForm
     form = UserChangeForm
     model = User
 
+    # Enables the search box; the lookups themselves go through get_search_results().
     search_fields = ('email', 'first_name', 'last_name', 'user_type')
 
     fieldsets = (
@@ -47,6 +62,34 @@ class CustomUserAdmin(UserAdmin):
 
     ordering = ['email']
 
+    actions = ['export_csv', 'export_jsonl']
+
+    # Columns loaded by the changelist in large-table mode.
+    changelist_fields = ('id', 'email', 'user_type', 'is_institute', 'is_active')
+
+    # USERS_ADMIN_LARGE_TABLE keeps the changelist and change form from scanning
+    # the whole table: estimated counts, only the displayed columns, and an
+    # autocomplete widget for recommended_by instead of a <select> of every institute.
+
+    @property
+    def show_full_result_count(self):
+        return not settings.USERS_ADMIN_LARGE_TABLE
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if settings.USERS_ADMIN_LARGE_TABLE:
+            return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_changelist(self, request, **kwargs):
+        if settings.USERS_ADMIN_LARGE_TABLE:
+            return LargeTableChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_autocomplete_fields(self, request):
+        if settings.USERS_ADMIN_LARGE_TABLE:
+            return ['recommended_by']
+        return super().get_autocomplete_fields(request)
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         """
         Customizing the queryset for the recommended_by field.
@@ -55,80 +98,80 @@ class CustomUserAdmin(UserAdmin):
             kwargs["queryset"] = User.objects.filter(is_institute=True)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
     
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search through the trigram index instead of ``icontains`` on every ``search_fields`` column.
+        """
+        if request.GET.get('field_name') == 'recommended_by':
+            # Autocomplete for the recommended_by widget, which only offers institutes.
+            queryset = queryset.filter(is_institute=True)
+        if not search_term.strip():
+            return queryset, False
+        return search_users(queryset, search_term), False
+
+    @admin.action(description="Export selected users as CSV", permissions=['view'])
+    def export_csv(self, request, queryset):
+        return export_response(queryset.order_by('pk'), 'csv')
+
+    @admin.action(description="Export selected users as JSONL", permissions=['view'])
+    def export_jsonl(self, request, queryset):
+        return export_response(queryset.order_by('pk'), 'jsonl')
+
     def bulk_create_users(self, request):
         """
-        Handle bulk creation of users from a CSV file with validations, normalization, and password hashing.
+        Queue a CSV file of users for import by the background workers (``manage.py run_workers``).
+
+        The whole file is validated first; if any row fails nothing is
+        created, and the rejected rows can be downloaded from the job's
+        progress page.
         """
         if request.method == "POST":
             form = CSVUploadForm(request.POST, request.FILES)
             if form.is_valid():
                 csv_file = form.cleaned_data['csv_file']
                 try:
-                    csv_data = TextIOWrapper(csv_file.file, encoding='utf-8')
-                    reader = csv.reader(csv_data)
-                    headers = next(reader)
-
-                    users_to_create = []
-                    error_messages = []
-
-                    password_validator = StrongPasswordValidator()
-
-                    with transaction.atomic():
-                        for row in reader:
-                            email = row[0].strip()
-                            referral_code = row[1].strip() if len(row) > 1 else None
-                            password = row[2].strip() if len(row) > 2 else None
-
-                            try:
-                                validate_email(email)
-                                email = email.lower()
-                            except ValidationError:
-                                error_messages.append(f"Invalid email format for: {email}")
-                                break
-
-                            try:
-                                password_validator.validate(password)
-                            except ValidationError as e:
-                                error_messages.append(f"Password validation failed for email {email}: {str(e)}")
-                                break
-
-                            password = make_password(password)
-
-                            recommended_by = None
-                            if referral_code:
-                                try:
-                                    recommended_by = User.objects.get(referral_code=referral_code)
-                                except User.DoesNotExist:
-                                    error_messages.append(f"Invalid referral code '{referral_code}' for email: {email}")
-                                    break
-
-                            if User.objects.filter(email=email).exists():
-                                error_messages.append(f"User with email {email} already exists.")
-                                break
-
-                            user = User(
-                                email=email,
-                                password=password,
-                                recommended_by=recommended_by
-                            )
-                            users_to_create.append(user)
-
-                        if not error_messages:
-                            if users_to_create:
-                                User.objects.bulk_create(users_to_create)
-                                messages.success(request, f"{len(users_to_create)} users created successfully.")
-                        else:
-                            messages.error(request, "Errors occurred: " + " | ".join(error_messages))
-
-                except Exception as e:
+                    text = csv_file.read().decode('utf-8')
+                except UnicodeDecodeError as e:
                     messages.error(request, f"Error processing CSV file: {str(e)}")
+                    return redirect(request.path)
 
-                return redirect(request.path)
+                job = enqueue_import(text, csv_file.name, request.user)
+                messages.success(request, f"{job.total_rows} rows queued for import.")
+                return redirect('admin:import_job_progress', job.pk)
         else:
             form = CSVUploadForm()
 
         return render(request, 'admin/csv_upload_form.html', {'form': form, 'title': 'Bulk Create Users'})
 
+    def import_job_progress(self, request, pk):
+        """
+        Progress of a background import, refreshed while it runs.
+        """
+        job = get_object_or_404(ImportJob.objects.defer('data'), pk=pk)
+        done, total = job.phase_progress
+        eta = job.eta
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f"Import of {job.file_name}",
+            'job': job,
+            'done': done,
+            'total': total,
+            'percent': done * 100 // total if total else 100,
+            'eta': round(eta.total_seconds()) if eta is not None else None,
+            'errors': job.errors.all()[:IMPORT_ERRORS_SHOWN],
+            'refresh': IMPORT_PROGRESS_REFRESH if job.is_running else None,
+        }
+        return render(request, 'admin/users_management/import_job_progress.html', context)
+
+    def import_job_errors(self, request, pk):
+        """
+        Download the rows rejected by a background import as CSV.
+        """
+        job = get_object_or_404(ImportJob.objects.defer('data'), pk=pk)
+        errors = job.errors.values_list('line', 'email', 'message')
+        response = HttpResponse(error_report(errors), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="import_{job.pk}_errors.csv"'
+        return response
 
     def changelist_view(self, request, extra_context=None):
         """
@@ -145,7 +188,44 @@ class CustomUserAdmin(UserAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('bulk-create-users/', self.admin_site.admin_view(self.bulk_create_users), name='bulk_create_users'),
+            path(
+                'import-jobs/<int:pk>/', self.admin_site.admin_view(self.import_job_progress),
+                name='import_job_progress',
+            ),
+            path(
+                'import-jobs/<int:pk>/errors/', self.admin_site.admin_view(self.import_job_errors),
+                name='import_job_errors',
+            ),
         ]
         return custom_urls + urls
 
 admin.site.register(User, CustomUserAdmin)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'status', 'total_rows', 'rows_imported', 'error_count', 'created_at', 'progress')
+    list_filter = ('status',)
+    # The uploaded file itself is never shown.
+    exclude = ('data',)
+    readonly_fields = [field.name for field in ImportJob._meta.fields if field.name != 'data'] + ['progress']
+    actions = ['retry']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('data')
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="Progress")
+    def progress(self, obj):
+        return format_html('<a href="{}">Show</a>', reverse('admin:import_job_progress', args=[obj.pk]))
+
+    @admin.action(description="Retry selected failed imports", permissions=['change'])
+    def retry(self, request, queryset):
+        failed = queryset.filter(status=ImportJob.FAILED)
+        reset = {'worker': '', 'heartbeat': None, 'message': '', 'finished_at': None}
+        # Imports that failed part way through resume from their checkpoint, the others start over.
+        count = failed.filter(lines_done__gt=0).update(status=ImportJob.IMPORTING, **reset)
+        count += failed.filter(lines_done=0).update(status=ImportJob.PENDING, **reset)
+        messages.success(request, f"{count} imports queued again.")
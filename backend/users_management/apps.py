@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class UsersManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users_management'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from users_management import signals  # noqa: F401
+        from users_management.caching import check_user_cache
+        from users_management.metrics import install_query_counter
+        from users_management.profiling import install_query_capture
+
+        connection_created.connect(install_query_counter)
+        connection_created.connect(install_query_capture)
+        checks.register(check_user_cache, checks.Tags.caches)
+        if self.apps.is_installed('drf_spectacular'):
+            # Registers the OpenAPI description of the token authentication.
+            from users_management import schema  # noqa: F401
@@ -0,0 +1,198 @@
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from rest_framework import authentication, exceptions
+
+from sharma_academy.routers import set_request_user
+from users_management.models import TokenRevocation, User
+
+ACCESS_TOKEN = 'access'
+REFRESH_TOKEN = 'refresh'
+
+
+class RevocationList:
+    """
+    The unexpired ``TokenRevocation`` rows, held in memory so that checking a
+    token costs two dictionary lookups instead of a query.
+
+    The list is reloaded from the database when it is older than
+    ``refresh_interval`` seconds, so a revocation made by another worker takes
+    effect here within that delay (plus the replication lag of a replica).
+    Revocations made by this process apply at once; one whose transaction
+    is rolled back stays in effect here until the next reload.
+    """
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self.jtis = set()
+        # {user_id: tokens issued before this time are revoked}
+        self.issued_before = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.refresh_interval
+
+    def load(self):
+        with self._lock:
+            # Revocations made while the rows are read wait for the lock, so none is lost.
+            rows = TokenRevocation.objects.db_manager(hints={'replica_ok': True}).filter(
+                expires_at__gte=datetime.now(timezone.utc),
+            ).values_list('jti', 'user_id', 'issued_before')
+            jtis, issued_before = set(), {}
+            for jti, user_id, before in rows:
+                if jti:
+                    jtis.add(jti)
+                if before is not None:
+                    issued_before[user_id] = max(before, issued_before.get(user_id, before))
+            self.jtis, self.issued_before, self.loaded_at = jtis, issued_before, time.monotonic()
+
+    def add(self, jti=None, user_id=None, issued_before=None):
+        with self._lock:
+            if jti:
+                self.jtis.add(jti)
+            if issued_before is not None:
+                self.issued_before[user_id] = max(issued_before, self.issued_before.get(user_id, issued_before))
+
+    def is_revoked(self, claims):
+        if self.is_stale():
+            self.load()
+        return claims['jti'] in self.jtis or claims['iat'] < self.issued_before.get(claims['uid'], float('-inf'))
+
+
+class SignedTokens:
+    """
+    Issue and verify stateless access/refresh tokens signed with ``SECRET_KEY``.
+
+    A token is a ``TimestampSigner``-signed JSON payload carrying the user id,
+    email, staff/superuser flags, issue time and a random id (``jti``), so
+    verifying it needs no query: only the HMAC check and a lookup in the
+    in-memory ``RevocationList``. Access and refresh tokens use different
+    salts, so one can never be accepted as the other.
+
+    Revocations are ``TokenRevocation`` rows, seen by every worker. The table
+    stays small by construction: a revoked ``jti`` is kept only until the
+    token would have expired anyway, and revoking all tokens of a user is a
+    single "issued before" row. Expired rows are deleted by
+    ``manage.py purge_token_revocations``.
+    """
+    def __init__(self, access_lifetime, refresh_lifetime, revocation_refresh=5):
+        self.lifetimes = {ACCESS_TOKEN: access_lifetime, REFRESH_TOKEN: refresh_lifetime}
+        self.signers = {
+            token_type: signing.TimestampSigner(salt=f'users_management.authentication.{token_type}')
+            for token_type in self.lifetimes
+        }
+        self.revocations = RevocationList(revocation_refresh)
+
+    def issue(self, user):
+        """
+        Return a new access/refresh token pair for ``user``.
+        """
+        claims = {
+            'uid': user.pk,
+            'email': user.email,
+            'staff': user.is_staff,
+            'su': user.is_superuser,
+            'iat': round(time.time(), 3),
+        }
+        return {
+            'access': self.signers[ACCESS_TOKEN].sign_object({**claims, 'jti': secrets.token_urlsafe(8)}),
+            'refresh': self.signers[REFRESH_TOKEN].sign_object({**claims, 'jti': secrets.token_urlsafe(8)}),
+            'expires_in': self.lifetimes[ACCESS_TOKEN],
+        }
+
+    def verify(self, token, token_type=ACCESS_TOKEN):
+        """
+        Return the claims of a valid, unexpired and unrevoked token or raise ``signing.BadSignature``.
+        """
+        claims = self.signers[token_type].unsign_object(token, max_age=self.lifetimes[token_type])
+        if self.revocations.is_revoked(claims):
+            raise signing.BadSignature("Token has been revoked.")
+        return claims
+
+    def revoke(self, claims, token_type=ACCESS_TOKEN):
+        """
+        Revoke a single token until it would have expired. Return ``False``
+        when it was revoked already, e.g. a refresh token used twice.
+        """
+        expires_at = claims['iat'] + self.lifetimes[token_type]
+        if expires_at <= time.time():
+            return True
+        try:
+            with transaction.atomic():
+                TokenRevocation.objects.create(
+                    jti=claims['jti'], user_id=claims['uid'],
+                    expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+                )
+        except IntegrityError:
+            return False
+        self.revocations.add(jti=claims['jti'])
+        return True
+
+    def revoke_user(self, user_id):
+        """
+        Revoke every token issued to ``user_id`` so far.
+        """
+        now = time.time()
+        issued_before = round(now, 3)
+        TokenRevocation.objects.create(
+            user_id=user_id, issued_before=issued_before,
+            expires_at=datetime.fromtimestamp(now + self.lifetimes[REFRESH_TOKEN], timezone.utc),
+        )
+        self.revocations.add(user_id=user_id, issued_before=issued_before)
+
+    def purge(self):
+        """
+        Delete the revocations of tokens that have expired since, return how many.
+        """
+        deleted, _ = TokenRevocation.objects.filter(expires_at__lt=datetime.now(timezone.utc)).delete()
+        return deleted
+
+    def get_user(self, claims):
+        """
+        Build the request user from the token claims without querying the database.
+
+        Fields not carried by the token are deferred, so reading one loads it
+        and ``save()`` only writes the fields that are actually known.
+        """
+        # Values in model field order, as from_db() expects them.
+        return User.from_db(
+            'default',
+            ['id', 'is_superuser', 'is_staff', 'is_active', 'email'],
+            [claims['uid'], claims['su'], claims['staff'], True, claims['email']],
+        )
+
+
+signed_tokens = SignedTokens(
+    access_lifetime=settings.SIGNED_TOKEN_ACCESS_LIFETIME,
+    refresh_lifetime=settings.SIGNED_TOKEN_REFRESH_LIFETIME,
+    revocation_refresh=settings.SIGNED_TOKEN_REVOCATION_REFRESH,
+)
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate ``Authorization: Bearer <access token>`` headers issued by ``signed_tokens``.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        try:
+            claims = signed_tokens.verify(auth[1].decode())
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        set_request_user(claims['uid'])
+        return signed_tokens.get_user(claims), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db import DEFAULT_DB_ALIAS
+
+from sharma_academy.routers import set_request_user
+from users_management.caching import user_cache
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` that resolves the session user through the versioned user cache,
+    so authenticated requests do not read the user table.
+    """
+    def get_user(self, user_id):
+        user = user_cache.get(user_id, self.load_user)
+        if user is not None:
+            set_request_user(user.pk)
+        return user
+
+    def load_user(self, user_id):
+        """
+        Load a cache miss from the primary: a lagging replica could return the
+        row from before the change that bumped its version, which would then
+        be cached as current.
+        """
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.using(DEFAULT_DB_ALIAS).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
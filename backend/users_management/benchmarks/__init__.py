@@ -0,0 +1,83 @@
+"""
+Benchmarks run through ``manage.py benchmark <name>``.
+
+Each module listed in ``BENCHMARKS`` provides ``add_arguments(parser)`` and
+``run(command, **options)``; ``command`` is the running management command,
+used for its ``stdout`` and ``style``.
+"""
+import os
+import statistics
+import tempfile
+from contextlib import contextmanager
+
+BENCHMARKS = [
+    'hashing',
+    'registration',
+    'password_validation',
+    'authentication',
+    'pagination',
+    'search',
+    'admin',
+    'export',
+    'profiling',
+    'metrics',
+    'sqlite',
+    'serialization',
+]
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Run the block against a freshly migrated, throwaway test database.
+
+    SQLite test databases are put in a temporary file rather than in memory
+    so that concurrent connections from several threads behave like production.
+    """
+    from django.db import connection
+    from django.test.utils import (setup_databases, setup_test_environment,
+                                   teardown_databases,
+                                   teardown_test_environment)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'}, serialized_aliases=set())
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+
+def percentiles(samples):
+    """
+    Return ``(p50, p99)`` of ``samples``.
+    """
+    if len(samples) < 2:
+        return (samples[0], samples[0]) if samples else (0.0, 0.0)
+    cuts = statistics.quantiles(samples, n=100)
+    return cuts[49], cuts[98]
+
+
+def load_users(rows, institute_every=0):
+    """
+    Insert ``rows`` users (every ``institute_every``-th one an institute) with a
+    single ``INSERT ... SELECT`` and refresh the planner statistics.
+    """
+    from django.db import connection
+    from django.utils import timezone
+
+    from users_management.models import User
+
+    table = connection.ops.quote_name(User._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s) '
+            f'INSERT INTO {table} (password, is_superuser, first_name, last_name, email, is_staff, is_active, '
+            'date_joined, is_institute, user_type) '
+            "SELECT '!', %s, '', '', 'user' || n || '@bench.example', %s, %s, %s, n %% %s = 0, 'student' FROM seq",
+            [rows, False, False, True, timezone.now(), institute_every or rows + 1],
+        )
+        cursor.execute('ANALYZE')
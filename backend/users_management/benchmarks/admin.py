@@ -0,0 +1,64 @@
+"""
+Users admin at scale: changelist, change form and recommended_by autocomplete, default against large-table mode.
+"""
+import time
+
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from users_management.benchmarks import (benchmark_database, load_users,
+                                         percentiles)
+from users_management.models import User
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=5_000_000, help="Users in the table.")
+    parser.add_argument('--institute-every', type=int, default=1000, help="One user in this many is an institute.")
+    parser.add_argument('--requests', type=int, default=5, help="Requests per page and mode.")
+    parser.add_argument('--budget', type=float, default=200, help="Milliseconds a page may take.")
+
+
+def _p50(client, url, requests):
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, (url, response.status_code)
+    return percentiles(latencies)[0] * 1e3
+
+
+def run(command, rows, institute_every, requests, budget, **options):
+    with benchmark_database():
+        started = time.perf_counter()
+        load_users(rows, institute_every)
+        admin = User.objects.create(email='admin@bench.example', is_staff=True, is_superuser=True)
+        command.stdout.write(f"Loaded {rows} users in {time.perf_counter() - started:.1f}s")
+
+        client = Client()
+        client.force_login(admin)
+        changelist = reverse('admin:users_management_user_changelist')
+        pages = {
+            'changelist': changelist,
+            'changelist p100': f'{changelist}?p=100',
+            'change form': reverse('admin:users_management_user_change', args=[admin.pk]),
+            'autocomplete': reverse('admin:autocomplete') + (
+                '?app_label=users_management&model_name=user&field_name=recommended_by'
+            ),
+        }
+
+        command.stdout.write(f"{'page':<18} {'default ms':>11} {'large-table ms':>15}")
+        for label, url in pages.items():
+            timings = []
+            for large_table in (False, True):
+                if label == 'autocomplete' and not large_table:
+                    timings.append(None)
+                    continue
+                with override_settings(USERS_ADMIN_LARGE_TABLE=large_table):
+                    client.get(url)
+                    timings.append(_p50(client, url, requests))
+            default, large = timings
+            verdict = 'ok' if large <= budget else f'over {budget:.0f} ms budget'
+            command.stdout.write(
+                f"{label:<18} {'-' if default is None else f'{default:.1f}':>11} {large:>15.1f}  {verdict}"
+            )
@@ -0,0 +1,77 @@
+"""
+Authenticated request throughput: signed access tokens against session cookies.
+"""
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.test import Client, override_settings
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users_management.authentication import (SignedTokenAuthentication,
+                                             signed_tokens)
+from users_management.benchmarks import benchmark_database, percentiles
+from users_management.models import User
+
+
+def add_arguments(parser):
+    parser.add_argument('--requests', type=int, default=500, help="Requests per scheme.")
+
+
+def _measure(function, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _report(command, label, latencies, unit, scale):
+    p50, p99 = percentiles(latencies)
+    command.stdout.write(
+        f"{label:<32} {len(latencies) / sum(latencies):>10.0f} {p50 * scale:>10.1f} {p99 * scale:>10.1f}  ({unit})"
+    )
+
+
+def run(command, requests, **options):
+    overrides = {
+        'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+        'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    }
+    with benchmark_database(), override_settings(**overrides):
+        user = User.objects.create(email='bench@bench.example', password=make_password('Bench!123'))
+        tokens = signed_tokens.issue(user)
+
+        token_client = Client(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        session_client = Client()
+        session_client.force_login(user)
+        url = f'/api/users/{user.pk}/'
+        # Warm up caches and lazy imports.
+        token_client.get(url)
+        session_client.get(url)
+
+        factory = APIRequestFactory()
+        token_request = Request(factory.get(url, HTTP_AUTHORIZATION=f"Bearer {tokens['access']}"))
+        session_request = session_client.get(url).wsgi_request
+
+        command.stdout.write(f"{'scheme':<32} {'per sec':>10} {'p50':>10} {'p99':>10}")
+        _report(command, 'verify: signed token', _measure(
+            lambda: SignedTokenAuthentication().authenticate(token_request), requests * 10
+        ), 'us', 1e6)
+        _report(command, 'verify: session (cached user)', _measure(
+            lambda: _session_authenticate(session_request), requests * 10
+        ), 'us', 1e6)
+        _report(command, 'GET /api/users/{id}/ token', _measure(lambda: token_client.get(url), requests), 'ms', 1e3)
+        _report(command, 'GET /api/users/{id}/ session', _measure(lambda: session_client.get(url), requests), 'ms', 1e3)
+
+
+def _session_authenticate(wsgi_request):
+    from django.contrib.auth import get_user
+
+    # What AuthenticationMiddleware + SessionAuthentication do for a fresh request.
+    wsgi_request.session = wsgi_request.session.__class__(wsgi_request.session.session_key)
+    wsgi_request.user = get_user(wsgi_request)
+    wsgi_request._dont_enforce_csrf_checks = True
+    return SessionAuthentication().authenticate(Request(wsgi_request))
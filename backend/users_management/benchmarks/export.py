@@ -0,0 +1,46 @@
+"""
+User export: streamed CSV/JSONL rows per second and peak memory, against building the whole export in memory.
+"""
+import resource
+import time
+
+from users_management.benchmarks import benchmark_database, load_users
+from users_management.exports import EXPORT_COLUMNS, export_response
+from users_management.models import User
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Users in the table.")
+    parser.add_argument(
+        '--in-memory', action='store_true',
+        help="Also time a list of dicts built from the whole table (run last, peak RSS only grows).",
+    )
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(command, rows, in_memory, **options):
+    with benchmark_database():
+        load_users(rows, institute_every=100)
+        # Every student was recommended by an institute, so the export joins for its email.
+        institute_id = User.objects.filter(is_institute=True).values_list('id', flat=True).first()
+        User.objects.filter(is_institute=False).update(recommended_by_id=institute_id)
+        queryset = User.objects.order_by('pk')
+        command.stdout.write(f"{'export':<12} {'rows/s':>10} {'MB':>8} {'peak RSS MB':>12}")
+        command.stdout.write(f"{'(baseline)':<12} {'':>10} {'':>8} {_peak_rss_mb():>12.0f}")
+
+        for export_format in ('csv', 'jsonl'):
+            started = time.perf_counter()
+            size = sum(len(chunk) for chunk in export_response(queryset, export_format).streaming_content)
+            elapsed = time.perf_counter() - started
+            command.stdout.write(
+                f"{export_format:<12} {rows / elapsed:>10.0f} {size / 2 ** 20:>8.1f} {_peak_rss_mb():>12.0f}"
+            )
+
+        if in_memory:
+            started = time.perf_counter()
+            data = list(queryset.values(*(lookup for _, lookup in EXPORT_COLUMNS)))
+            elapsed = time.perf_counter() - started
+            command.stdout.write(f"{'in memory':<12} {len(data) / elapsed:>10.0f} {'':>8} {_peak_rss_mb():>12.0f}")
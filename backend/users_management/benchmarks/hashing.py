@@ -0,0 +1,42 @@
+"""
+Password hashing throughput against the number of worker processes.
+"""
+import os
+import time
+
+from users_management.hashing import PasswordHashingPool
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=1000, help="Passwords hashed per run.")
+    parser.add_argument(
+        '--workers', default=None,
+        help="Comma separated worker counts to compare (default: 1 up to the CPU count, doubling).",
+    )
+
+
+def run(command, rows, workers, **options):
+    if workers:
+        worker_counts = [int(count) for count in workers.split(',')]
+    else:
+        worker_counts, count = [], 1
+        while count < (os.cpu_count() or 1):
+            worker_counts.append(count)
+            count *= 2
+        worker_counts.append(os.cpu_count() or 1)
+
+    passwords = [f"Benchmark-{i}!" for i in range(rows)]
+    command.stdout.write(f"{'workers':>8} {'seconds':>10} {'rows/s':>10} {'speedup':>8}")
+    baseline = None
+    for count in worker_counts:
+        pool = PasswordHashingPool(workers=count)
+        # Start the workers outside the timed section.
+        pool.hash_many(passwords[:count * pool.chunk_size])
+        started = time.perf_counter()
+        pool.hash_many(passwords)
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+
+        rate = rows / elapsed
+        baseline = baseline or rate
+        command.stdout.write(f"{count:>8} {elapsed:>10.2f} {rate:>10.1f} {rate / baseline:>7.2f}x")
@@ -0,0 +1,68 @@
+"""
+Metrics collection overhead: the middleware per request and the query counter per query.
+"""
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from users_management.metrics import (MetricsMiddleware, MetricsRegistry,
+                                      count_query)
+
+
+def add_arguments(parser):
+    parser.add_argument('--iterations', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per variant, the fastest is reported.")
+
+
+def _best(function, iterations, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) / iterations
+
+
+def run(command, iterations, repeat, **options):
+    import users_management.metrics as metrics
+
+    request = RequestFactory().get('/api/users/1/')
+    request.resolver_match = resolve('/api/users/1/')
+    response = HttpResponse()
+
+    # A private registry, so the benchmark does not show up in the process' metrics.
+    metrics.registry, registry = MetricsRegistry(), metrics.registry
+    try:
+        def view(request):
+            return response
+
+        def view_with_queries(request):
+            for _ in range(5):
+                count_query(lambda *args: None, 'SELECT 1', (), False, {})
+            return response
+
+        middleware = MetricsMiddleware(view)
+        middleware_with_queries = MetricsMiddleware(view_with_queries)
+        execute = lambda *args: None  # noqa: E731
+
+        rows = [
+            ('request, bare view', _best(lambda: view(request), iterations, repeat)),
+            ('request, MetricsMiddleware', _best(lambda: middleware(request), iterations, repeat)),
+            ('request + 5 queries, bare', _best(lambda: view_with_queries(request), iterations, repeat)),
+            ('request + 5 queries, middleware',
+             _best(lambda: middleware_with_queries(request), iterations, repeat)),
+            ('query, no wrapper', _best(lambda: execute('SELECT 1', (), False, {}), iterations, repeat)),
+            ('query, count_query outside request',
+             _best(lambda: count_query(execute, 'SELECT 1', (), False, {}), iterations, repeat)),
+        ]
+    finally:
+        metrics.registry = registry
+
+    command.stdout.write(f"{'variant':<36} {'us/call':>8}")
+    for label, seconds in rows:
+        command.stdout.write(f"{label:<36} {seconds * 1e6:>8.2f}")
+    overhead = (rows[1][1] - rows[0][1]) * 1e6
+    command.stdout.write(f"Middleware overhead per request: {overhead:.2f} us")
@@ -0,0 +1,90 @@
+"""
+Staff user listing: page-number pagination against keyset (cursor) pagination at increasing depth.
+"""
+import time
+
+from django.conf import settings
+from django.test import Client, override_settings
+from django.urls import include, path
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.routers import DefaultRouter
+
+from users_management.benchmarks import (benchmark_database, load_users,
+                                         percentiles)
+from users_management.models import User
+from users_management.pagination import UserCursorPagination
+from users_management.views import UserViewSet
+
+
+class PageNumberUserViewSet(UserViewSet):
+    pagination_class = PageNumberPagination
+
+
+class CursorUserViewSet(UserViewSet):
+    pagination_class = UserCursorPagination
+
+
+page_router = DefaultRouter()
+page_router.register(r'users', PageNumberUserViewSet, basename='page-user')
+cursor_router = DefaultRouter()
+cursor_router.register(r'users', CursorUserViewSet, basename='cursor-user')
+
+urlpatterns = [
+    path('page/', include(page_router.urls)),
+    path('cursor/', include(cursor_router.urls)),
+]
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Users in the table.")
+    parser.add_argument('--requests', type=int, default=20, help="Requests per depth and mode.")
+
+
+def _timed_get(client, url, requests):
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    return latencies
+
+
+def run(command, rows, requests, **options):
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    overrides = {
+        'ROOT_URLCONF': __name__,
+        'REST_FRAMEWORK': {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'anon': None, 'user': None}},
+    }
+    with benchmark_database(), override_settings(**overrides):
+        started = time.perf_counter()
+        load_users(rows)
+        staff = User.objects.create(email='staff@bench.example', is_staff=True)
+        command.stdout.write(f"Loaded {rows} users in {time.perf_counter() - started:.1f}s")
+
+        client = Client()
+        client.force_login(staff)
+        total = rows + 1
+        cursors = UserCursorPagination()
+        cursors.base_url = '/cursor/users/'
+
+        command.stdout.write(f"{'depth':>10} {'page p50 ms':>12} {'cursor p50 ms':>14} {'cursor+count ms':>16}")
+        for depth in (0, total // 100, total // 10, total // 2, total - page_size):
+            page = depth // page_size + 1
+            page_url = f'/page/users/?page={page}'
+            # The cursor a client would hold after paging down to ``depth``.
+            if depth:
+                position = User.objects.order_by('-id').values_list('id', flat=True)[depth - 1]
+                cursor_url = cursors.encode_cursor(Cursor(offset=0, reverse=False, position=str(position)))
+            else:
+                cursor_url = cursors.base_url
+            count_url = cursor_url + ('&' if '?' in cursor_url else '?') + 'count=true'
+
+            # Warm up the page cache and the cached count.
+            client.get(page_url), client.get(cursor_url), client.get(count_url)
+            page_p50, _ = percentiles(_timed_get(client, page_url, requests))
+            cursor_p50, _ = percentiles(_timed_get(client, cursor_url, requests))
+            count_p50, _ = percentiles(_timed_get(client, count_url, requests))
+            command.stdout.write(
+                f"{depth:>10} {page_p50 * 1e3:>12.1f} {cursor_p50 * 1e3:>14.1f} {count_p50 * 1e3:>16.1f}"
+            )
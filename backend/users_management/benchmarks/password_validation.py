@@ -0,0 +1,109 @@
+"""
+Password validation: Django's validator chain against the validation engine.
+"""
+import random
+import re
+import string
+import time
+
+from django.contrib.auth.password_validation import (
+    get_password_validators, validate_password)
+from django.core.exceptions import ValidationError
+
+from users_management.password_validation import PasswordValidationEngine
+from users_management.validators import StrongPasswordValidator
+
+
+class FourScanStrongPasswordValidator(StrongPasswordValidator):
+    """
+    The previous implementation, one uncompiled ``re.search`` per character class.
+    """
+    def validate(self, password, user=None):
+        if not re.search(r'[A-Z]', password):
+            raise ValidationError("Password must contain at least one uppercase letter.")
+        if not re.search(r'[a-z]', password):
+            raise ValidationError("Password must contain at least one lowercase letter.")
+        if not re.search(r'[0-9]', password):
+            raise ValidationError("Password must contain at least one numeric character.")
+        if not re.search(r'[\W_]', password):
+            raise ValidationError("Password must contain at least one special character.")
+
+
+def add_arguments(parser):
+    parser.add_argument('--passwords', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per variant, the fastest is reported.")
+
+
+def _timed(function, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(command, passwords, seed, repeat, **options):
+    from django.conf import settings
+
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '!@#$%'
+    samples = []
+    for _ in range(passwords):
+        if rng.random() < 0.9:
+            # Shaped like a real import file: mostly valid passwords, a few reused.
+            password = rng.choice(string.ascii_uppercase) + rng.choice(string.ascii_lowercase) \
+                + rng.choice(string.digits) + rng.choice('!@#$%') \
+                + ''.join(rng.choice(alphabet) for _ in range(rng.randint(6, 12)))
+        else:
+            password = ''.join(rng.choice(alphabet) for _ in range(rng.randint(4, 10)))
+        samples.append(password if rng.random() > 0.05 or not samples else rng.choice(samples))
+
+    # The previous per-row path: the full chain with the four-scan strong validator.
+    validators = [
+        FourScanStrongPasswordValidator() if isinstance(validator, StrongPasswordValidator) else validator
+        for validator in get_password_validators(settings.AUTH_PASSWORD_VALIDATORS)
+    ]
+
+    def chain():
+        for password in samples:
+            try:
+                validate_password(password, password_validators=validators)
+            except ValidationError:
+                pass
+
+    engine = PasswordValidationEngine()
+    old_strong, new_strong = FourScanStrongPasswordValidator(), StrongPasswordValidator()
+
+    def strong(validator):
+        def check():
+            for password in samples:
+                try:
+                    validator.validate(password)
+                except ValidationError:
+                    pass
+        return check
+
+    for password in samples:
+        old, new = None, None
+        try:
+            old_strong.validate(password)
+        except ValidationError as error:
+            old = error.messages
+        try:
+            new_strong.validate(password)
+        except ValidationError as error:
+            new = error.messages
+        assert old == new, (password, old, new)
+
+    rows = [
+        ('strong: four scans', strong(old_strong)),
+        ('strong: character set', strong(new_strong)),
+        ('chain: validate_password', chain),
+        ('engine: validate_many', lambda: engine.validate_many(samples)),
+    ]
+    command.stdout.write(f"{'variant':<26} {'total ms':>10} {'us/password':>12}")
+    for label, function in rows:
+        elapsed = _timed(function, repeat)
+        command.stdout.write(f"{label:<26} {elapsed * 1000:>10.1f} {elapsed / passwords * 1e6:>12.2f}")
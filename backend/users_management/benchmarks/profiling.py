@@ -0,0 +1,99 @@
+"""
+Profiling overhead on registration and retrieve: no profiler, always-on Silk and sampled profiling.
+"""
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.test import Client, override_settings
+
+from users_management.authentication import signed_tokens
+from users_management.benchmarks import benchmark_database, percentiles
+from users_management.models import User
+
+PROFILER = 'users_management.profiling.SamplingProfilerMiddleware'
+FLUSH_INTERVAL = 0.2
+
+
+def add_arguments(parser):
+    parser.add_argument('--requests', type=int, default=300, help="Requests per endpoint and mode.")
+    parser.add_argument('--rounds', type=int, default=10, help="Turns the modes take, each sending requests / rounds.")
+
+
+def _modes():
+    middleware = [name for name in settings.MIDDLEWARE if name != PROFILER]
+    return [
+        ('no profiler', {'MIDDLEWARE': middleware}),
+        # Only the request and its queries: silk_profile decorators are gone from the views.
+        ('silk, always on', {'MIDDLEWARE': ['silk.middleware.SilkyMiddleware', *middleware]}),
+        ('sampled 0%', {'MIDDLEWARE': [PROFILER, *middleware], 'PROFILING_SAMPLE_RATE': 0.0}),
+        ('sampled 1%', {'MIDDLEWARE': [PROFILER, *middleware], 'PROFILING_SAMPLE_RATE': 0.01}),
+        ('sampled 100%', {'MIDDLEWARE': [PROFILER, *middleware], 'PROFILING_SAMPLE_RATE': 1.0}),
+    ]
+
+
+def _silk_rows():
+    from silk.models import Profile, Request, SQLQuery
+
+    return Request.objects.count() + SQLQuery.objects.count() + Profile.objects.count()
+
+
+def run(command, requests, rounds, **options):
+    if not apps.is_installed('silk'):
+        raise CommandError("This benchmark needs Silk, set SILK_ENABLED=true.")
+    overrides = {
+        'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+        'REST_FRAMEWORK': {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'anon': None, 'user': None}},
+        'PROFILING_FLUSH_INTERVAL': FLUSH_INTERVAL,
+    }
+    with benchmark_database(), override_settings(**overrides):
+        user = User.objects.create_user(email='bench@bench.example', password='Bench!123')
+        access = signed_tokens.issue(user)['access']
+        counter = iter(range(10 ** 9))
+        endpoints = {
+            'register': lambda client: client.post('/api/users/', {
+                'email': f'{next(counter)}@bench.example', 'password': 'Bench!123xY', 'confirm_password': 'Bench!123xY',
+            }, content_type='application/json'),
+            'retrieve': lambda client: client.get(f'/api/users/{user.pk}/', HTTP_AUTHORIZATION=f'Bearer {access}'),
+        }
+
+        # A client loads its middleware on its first request, with the settings of its mode.
+        clients = {}
+        for mode, mode_settings in _modes():
+            with override_settings(**mode_settings):
+                clients[mode] = Client()
+                for send in endpoints.values():
+                    for _ in range(requests // 5):
+                        send(clients[mode])
+
+        # Modes take turns so that drift (fsync latency, database growth) hits them all alike.
+        latencies = {(mode, endpoint): [] for mode in clients for endpoint in endpoints}
+        rows = dict.fromkeys(latencies, 0)
+        for _ in range(rounds):
+            for endpoint, send in endpoints.items():
+                for mode, client in clients.items():
+                    time.sleep(FLUSH_INTERVAL * 3)
+                    rows_before = _silk_rows()
+                    for _ in range(requests // rounds):
+                        started = time.perf_counter()
+                        send(client)
+                        latencies[mode, endpoint].append(time.perf_counter() - started)
+                    # Let the background flush catch up before counting rows.
+                    time.sleep(FLUSH_INTERVAL * 3)
+                    rows[mode, endpoint] += _silk_rows() - rows_before
+
+        command.stdout.write(
+            f"{'mode':<18} {'endpoint':<10} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'overhead':>9} {'silk rows':>10}"
+        )
+        for endpoint in endpoints:
+            baseline = None
+            for mode in clients:
+                samples = latencies[mode, endpoint]
+                mean = sum(samples) / len(samples)
+                baseline = baseline or mean
+                p50, p99 = percentiles(samples)
+                command.stdout.write(
+                    f"{mode:<18} {endpoint:<10} {mean * 1e3:>8.2f} {p50 * 1e3:>8.2f} {p99 * 1e3:>8.2f} "
+                    f"{(mean / baseline - 1) * 100:>8.1f}% {rows[mode, endpoint]:>10}"
+                )
@@ -0,0 +1,114 @@
+"""
+Concurrent registrations through the sync (WSGI) and async (ASGI) user viewsets.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from users_management.benchmarks import benchmark_database, percentiles
+from users_management.views import AsyncUserViewSet, UserViewSet
+
+sync_router = DefaultRouter()
+sync_router.register(r'users', UserViewSet, basename='sync-user')
+async_router = DefaultRouter()
+async_router.register(r'users', AsyncUserViewSet, basename='async-user')
+
+urlpatterns = [
+    path('sync/', include(sync_router.urls)),
+    path('async/', include(async_router.urls)),
+]
+
+
+def add_arguments(parser):
+    parser.add_argument('--requests', type=int, default=200, help="Registrations per mode.")
+    parser.add_argument('--concurrency', type=int, default=100, help="Concurrent coroutines for the ASGI run.")
+    parser.add_argument('--threads', type=int, default=8, help="Worker threads for the WSGI run.")
+    parser.add_argument(
+        '--pbkdf2', action='store_true',
+        help="Hash with the configured hasher; by default a fast hasher isolates the request overhead.",
+    )
+
+
+def _payload(prefix, i):
+    password = f"Bench!{i}xY"
+    return {'email': f'{prefix}{i}@bench.example', 'password': password, 'confirm_password': password}
+
+
+class ThreadSampler(threading.Thread):
+    """
+    Record the peak number of live threads while the benchmark runs.
+    """
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = threading.active_count()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(0.005)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        return self.peak
+
+
+def _run_sync(requests, threads):
+    def register(i):
+        started = time.perf_counter()
+        response = Client().post('/sync/users/', _payload('sync', i), content_type='application/json')
+        return time.perf_counter() - started, response.status_code
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(register, range(requests)))
+
+
+async def _run_async(requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def register(i):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await AsyncClient().post('/async/users/', _payload('async', i), content_type='application/json')
+            return time.perf_counter() - started, response.status_code
+
+    return await asyncio.gather(*(register(i) for i in range(requests)))
+
+
+def run(command, requests, concurrency, threads, pbkdf2, **options):
+    overrides = {
+        'ROOT_URLCONF': __name__,
+        # Registration is throttled per client address, which is the same for every request here.
+        'REST_FRAMEWORK': {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'anon': None, 'user': None}},
+    }
+    if not pbkdf2:
+        overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+    command.stdout.write(f"{'mode':<18} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'threads':>8}")
+    with benchmark_database(), override_settings(**overrides):
+        runs = [
+            (f'wsgi ({threads} thr)', lambda: _run_sync(requests, threads)),
+            (f'asgi ({concurrency} conc)', lambda: asyncio.run(_run_async(requests, concurrency))),
+        ]
+        for label, runner in runs:
+            sampler = ThreadSampler()
+            sampler.start()
+            started = time.perf_counter()
+            results = runner()
+            elapsed = time.perf_counter() - started
+            peak_threads = sampler.stop()
+
+            latencies = [latency for latency, _ in results]
+            errors = sum(1 for _, status in results if status != 201)
+            p50, p99 = percentiles(latencies)
+            command.stdout.write(
+                f"{label:<18} {len(results) / elapsed:>8.1f} {p50 * 1000:>8.1f} {p99 * 1000:>8.1f} "
+                f"{errors:>7} {peak_threads:>8}"
+            )
@@ -0,0 +1,80 @@
+"""
+User search: the admin's multi-column ``icontains`` against the trigram index.
+"""
+import random
+import time
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+
+from users_management.benchmarks import benchmark_database, percentiles
+from users_management.constants import USER_TYPES
+from users_management.models import User
+from users_management.search import SEARCH_FIELDS, search_users
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Priya', 'Rahul', 'Aisha', 'Wei', 'Olga', 'Carlos', 'Fatima', 'Kenji', 'Anna']
+LAST_NAMES = ['Sharma', 'Smith', 'Johnson', 'Patel', 'Garcia', 'Chen', 'Ivanova', 'Okafor', 'Tanaka', 'Muller']
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'academy.edu', 'example.org']
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Users in the table.")
+    parser.add_argument('--requests', type=int, default=10, help="Searches per term and method.")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def _users(rows, rng):
+    for i in range(rows):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield User(
+            email=f'{first}.{last}{i}@{rng.choice(DOMAINS)}'.lower(), password='!',
+            first_name=first, last_name=last, user_type=rng.choice(USER_TYPES)[0],
+        )
+
+
+def _icontains(queryset, search_term):
+    """
+    What ``ModelAdmin.get_search_results`` did: every word in any field, with ``icontains``.
+    """
+    for term in search_term.split():
+        queryset = queryset.filter(reduce(or_, (Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS)))
+    return queryset
+
+
+def _timed(search, term, requests):
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        # A changelist page: the first 100 matches.
+        matches = len(search(User.objects.order_by('-id'), term)[:100])
+        latencies.append(time.perf_counter() - started)
+    return latencies, matches
+
+
+def run(command, rows, requests, seed, **options):
+    rng = random.Random(seed)
+    with benchmark_database():
+        started = time.perf_counter()
+        users = _users(rows, rng)
+        while batch := list(islice(users, 10000)):
+            User.objects.bulk_create(batch)
+        call_command('rebuild_search_index', stdout=command.stdout)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        command.stdout.write(f"Loaded and indexed {rows} users in {time.perf_counter() - started:.1f}s")
+
+        rare_email = User.objects.order_by('?').values_list('email', flat=True).first()
+        terms = [rare_email, rare_email.split('@')[0][-8:], 'okafor1234', 'pri', 'ch', 'sharma academy', 'zzzz']
+        command.stdout.write(f"{'term':<28} {'matches':>8} {'icontains ms':>13} {'index ms':>9}")
+        for term in terms:
+            icontains, matches = _timed(_icontains, term, requests)
+            indexed, indexed_matches = _timed(search_users, term, requests)
+            assert matches == indexed_matches or len(term) < 3, (term, matches, indexed_matches)
+            command.stdout.write(
+                f"{term:<28} {indexed_matches:>8} {percentiles(icontains)[0] * 1e3:>13.1f} "
+                f"{percentiles(indexed)[0] * 1e3:>9.1f}"
+            )
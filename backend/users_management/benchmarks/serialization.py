@@ -0,0 +1,61 @@
+"""
+User list serialization: UserSerializer and JSONRenderer against the values() read path and orjson.
+"""
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from users_management.benchmarks import benchmark_database, load_users
+from users_management.models import User
+from users_management.renderers import FastJSONRenderer
+from users_management.serializers import UserSerializer, user_reader
+
+
+def add_arguments(parser):
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000], help="Users per list.")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per size and path, the fastest is kept.")
+
+
+def _serializer_path(queryset):
+    users = list(queryset)
+    started = time.perf_counter()
+    JSONRenderer().render(UserSerializer(users, many=True).data)
+    return started
+
+
+def _read_path(queryset):
+    rows = list(user_reader.values(queryset))
+    started = time.perf_counter()
+    FastJSONRenderer().render(user_reader.many(rows))
+    return started
+
+
+def _fastest(path, queryset, repeat):
+    """
+    Return the fastest ``(total, serialization)`` seconds of ``repeat`` runs,
+    with and without fetching the rows.
+    """
+    totals, serializations = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        # A fresh queryset, the rows are fetched every run.
+        serialization_started = path(queryset.all())
+        finished = time.perf_counter()
+        totals.append(finished - started)
+        serializations.append(finished - serialization_started)
+    return min(totals), min(serializations)
+
+
+def run(command, sizes, repeat, **options):
+    paths = {'serializer': _serializer_path, 'read path': _read_path}
+    with benchmark_database():
+        load_users(max(sizes))
+        command.stdout.write("Microseconds per row, fetching included / serialization and rendering only")
+        command.stdout.write(
+            f"{'rows':>7} " + ' '.join(f"{name + ' total':>17} {name + ' only':>17}" for name in paths) + f" {'speedup':>8}"
+        )
+        for size in sizes:
+            queryset = User.objects.order_by('pk')[:size]
+            results = [_fastest(path, queryset, repeat) for path in paths.values()]
+            columns = ' '.join(f"{total / size * 1e6:>17.2f} {only / size * 1e6:>17.2f}" for total, only in results)
+            command.stdout.write(f"{size:>7} {columns} {results[0][0] / results[1][0]:>7.1f}x")
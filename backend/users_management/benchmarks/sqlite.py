@@ -0,0 +1,123 @@
+"""
+Concurrent registrations on a SQLite file: Django's default connection settings against the tuned ones.
+"""
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.test import override_settings
+from rest_framework.exceptions import ValidationError
+
+from users_management.benchmarks import benchmark_database, percentiles
+from users_management.models import User
+from users_management.serializers import UserSerializer
+
+
+def add_arguments(parser):
+    parser.add_argument('--processes', type=int, default=8, help="Concurrent registering processes.")
+    parser.add_argument('--registrations', type=int, default=200, help="Registrations per process.")
+    parser.add_argument(
+        '--referral-every', type=int, default=4,
+        help="Every n-th registration uses a referral code, whose referral tree update reads before it writes.",
+    )
+
+
+def _modes():
+    tuned = settings.DATABASES['default']
+    return {
+        # Rollback journal, synchronous=FULL, deferred transactions and a connection per request.
+        'default': {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+        'tuned': {key: tuned[key] for key in ('OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')},
+    }
+
+
+def _register(process, registrations, referral_every, referral_code, barrier, results):
+    password = 'Bench!Passw0rd'
+    latencies, lock_errors, other_errors = [], 0, 0
+    barrier.wait()
+    for index in range(registrations):
+        data = {
+            'email': f'user{process}-{index}@bench.example', 'password': password, 'confirm_password': password,
+        }
+        if referral_every and index % referral_every == 0:
+            data['referral_code'] = referral_code
+        started = time.perf_counter()
+        try:
+            serializer = UserSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            latencies.append(time.perf_counter() - started)
+        except (OperationalError, ValidationError) as error:
+            # The serializer reports a failed insert as a validation error.
+            if 'locked' in str(error):
+                lock_errors += 1
+            else:
+                other_errors += 1
+        finally:
+            # What request_finished does at the end of every request.
+            close_old_connections()
+    results.put((latencies, lock_errors, other_errors))
+
+
+def _run_mode(mode, processes, registrations, referral_every):
+    with benchmark_database():
+        referral_code = User.objects.create_user(
+            email='institute@bench.example', password='!', is_institute=True
+        ).referral_code
+        connection.close()
+
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(processes + 1)
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=_register, args=(process, registrations, referral_every, referral_code, barrier, results)
+            )
+            for process in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        started = time.perf_counter()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+
+    latencies = [latency for worker_latencies, _, _ in outcomes for latency in worker_latencies]
+    return {
+        'created': len(latencies),
+        'per_second': len(latencies) / elapsed,
+        'lock_errors': sum(lock_errors for _, lock_errors, _ in outcomes),
+        'other_errors': sum(other_errors for _, _, other_errors in outcomes),
+        'latencies': percentiles(latencies),
+    }
+
+
+def run(command, processes, registrations, referral_every, **options):
+    if connection.vendor != 'sqlite':
+        raise CommandError("This benchmark needs a SQLite DATABASE_URL.")
+
+    settings_dict = connection.settings_dict
+    original = {key: settings_dict[key] for key in ('OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+    total = processes * registrations
+    command.stdout.write(f"{processes} processes x {registrations} registrations, every {referral_every} referred")
+    command.stdout.write(
+        f"{'mode':<8} {'created':>8} {'writes/s':>9} {'lock errors':>12} {'other errors':>13} "
+        f"{'p50 ms':>8} {'p99 ms':>8}"
+    )
+    # A fast hasher, so the database rather than PBKDF2 is the bottleneck.
+    with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+        for mode, mode_settings in _modes().items():
+            settings_dict.update(mode_settings)
+            try:
+                result = _run_mode(mode, processes, registrations, referral_every)
+            finally:
+                settings_dict.update(original)
+            p50, p99 = result['latencies']
+            command.stdout.write(
+                f"{mode:<8} {result['created']:>5}/{total:<3} {result['per_second']:>8.1f} "
+                f"{result['lock_errors']:>12} {result['other_errors']:>13} {p50 * 1e3:>8.1f} {p99 * 1e3:>8.1f}"
+            )
@@ -0,0 +1,160 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+MISSING = object()
+
+
+def is_shared_cache(alias):
+    """
+    Whether the Django cache ``alias`` can be seen by every worker process,
+    i.e. is not a per-process (LocMem) or no-op (Dummy) cache.
+    """
+    return alias in settings.CACHES and not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+class LocalTTLCache:
+    """
+    Thread-safe, size-bounded LRU mapping whose entries expire after ``timeout`` seconds.
+    """
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class UserCache:
+    """
+    Serve ``User`` rows by id from a per-process LRU backed by a shared Django cache.
+
+    Every user has a version number in the shared cache, and entries in both
+    tiers are keyed by ``(id, version)``. Bumping the version (on save, delete,
+    or a group/permission change) makes every process miss on its next lookup
+    and reload the row, so a stale user or stale permissions are never served
+    as long as the shared cache is shared by all workers. Versions are
+    nanosecond timestamps rather than counters, so a version evicted from the
+    shared cache is recreated larger than any version handed out before.
+
+    Invalidations only reach other workers through the shared cache, so with
+    no ``alias``, or one naming a per-process cache, the user cache is
+    disabled: users are loaded on every lookup (see ``check_user_cache``).
+    """
+    version_prefix = 'user-version:'
+    entry_prefix = 'user:'
+
+    def __init__(self, alias=None, maxsize=1024, timeout=300):
+        self.alias = alias
+        self.timeout = timeout
+        self.local = LocalTTLCache(maxsize, timeout)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def enabled(self):
+        return is_shared_cache(self.alias)
+
+    def get_version(self, user_id):
+        if self.alias is None:
+            # Nowhere to keep versions: every lookup sees a new one.
+            return time.time_ns()
+        key = f'{self.version_prefix}{user_id}'
+        version = self.shared.get(key)
+        if version is None:
+            candidate = time.time_ns()
+            self.shared.add(key, candidate, None)
+            # Another process may have added its own version first; a cache
+            # that keeps nothing (or evicted it already) returns none.
+            version = self.shared.get(key, candidate)
+        return version
+
+    def bump_version(self, *user_ids):
+        """
+        Invalidate the cached users once the current transaction commits, so
+        no other request can cache the old row under the new version.
+        """
+        def bump():
+            version = time.time_ns()
+            self.shared.set_many({f'{self.version_prefix}{user_id}': version for user_id in user_ids}, None)
+        if user_ids and self.enabled:
+            transaction.on_commit(bump)
+
+    def get(self, user_id, load):
+        """
+        Return a private copy of the user with ``user_id``, calling ``load(user_id)``
+        on a miss in both tiers. ``load`` may return ``None``, which is not cached.
+        """
+        if not self.enabled:
+            return load(user_id)
+        version = self.get_version(user_id)
+        key = f'{self.entry_prefix}{user_id}:{version}'
+        user = self.local.get(key)
+        if user is MISSING:
+            user = self.shared.get(key)
+            if user is None:
+                user = load(user_id)
+                if user is None:
+                    return None
+                self.shared.set(key, user, self.timeout)
+            self.local.set(key, user)
+        # Requests may set attributes (e.g. permission caches) on their user.
+        return copy.copy(user)
+
+
+user_cache = UserCache(
+    alias=settings.USER_CACHE_ALIAS,
+    maxsize=settings.USER_CACHE_SIZE,
+    timeout=settings.USER_CACHE_TIMEOUT,
+)
+
+
+def check_user_cache(app_configs=None, **kwargs):
+    """
+    Warn when ``USER_CACHE_ALIAS`` names a cache that is not shared by the
+    workers, which disables the user cache.
+    """
+    if settings.USER_CACHE_ALIAS is None or is_shared_cache(settings.USER_CACHE_ALIAS):
+        return []
+    return [checks.Warning(
+        f"USER_CACHE_ALIAS {settings.USER_CACHE_ALIAS!r} is not a cache shared by all workers, "
+        "so the user cache is disabled and every request loads its user.",
+        hint="Point USER_CACHE_ALIAS at a shared cache such as Redis or Memcached.",
+        id='users_management.W001',
+    )]
@@ -0,0 +1,100 @@
+import csv
+from io import StringIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# (column name, queryset lookup)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('email', 'email'),
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+    ('user_type', 'user_type'),
+    ('is_institute', 'is_institute'),
+    ('is_active', 'is_active'),
+    ('referral_code', 'referral_code'),
+    ('recommended_by_email', 'recommended_by__email'),
+    ('date_joined', 'date_joined'),
+)
+CHUNK_SIZE = 2000
+# Spreadsheets evaluate cells starting with these as formulas (e.g. a first
+# name of ``=HYPERLINK(...)``); the CSV export quotes them with a leading ``'``.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yield the export columns of every user in ``queryset`` as tuples.
+
+    Rows are read with ``values_list().iterator()``, so neither model
+    instances nor the whole result are held in memory.
+    """
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def _buffered(rows, make_writer, chunk_size):
+    """
+    Render ``rows`` with the row writer ``make_writer(buffer)`` returns and
+    yield the output ``chunk_size`` rows at a time rather than one small string
+    per row.
+    """
+    buffer = StringIO()
+    write_row = make_writer(buffer)
+    for count, row in enumerate(rows, start=1):
+        write_row(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def escape_formula(value):
+    """
+    Return ``value`` so that a spreadsheet opening the CSV shows it as text
+    rather than evaluating it.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE):
+    header = StringIO()
+    csv.writer(header).writerow([name for name, _ in EXPORT_COLUMNS])
+    yield header.getvalue()
+
+    def make_writer(buffer):
+        writerow = csv.writer(buffer).writerow
+        return lambda row: writerow([escape_formula(value) for value in row])
+
+    yield from _buffered(export_rows(queryset, chunk_size), make_writer, chunk_size)
+
+
+def stream_jsonl(queryset, chunk_size=CHUNK_SIZE):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    encode = DjangoJSONEncoder().encode
+
+    def make_writer(buffer):
+        return lambda row: buffer.write(encode(dict(zip(names, row))) + '\n')
+
+    yield from _buffered(export_rows(queryset, chunk_size), make_writer, chunk_size)
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson'),
+}
+
+
+def export_response(queryset, export_format='csv', filename='users'):
+    """
+    Return a ``StreamingHttpResponse`` downloading ``queryset`` as ``export_format``.
+    """
+    stream, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
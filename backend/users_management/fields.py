@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core import checks
+from django.core.validators import EMPTY_VALUES
+from django.db import models
+from django.utils.encoding import force_str
+from django.utils.translation import gettext_lazy as _
+
+
+def validate_international_phonenumber(value):
+    from phonenumber_field.validators import validate_international_phonenumber
+    validate_international_phonenumber(value)
+
+
+class PhoneNumberDescriptor:
+    """
+    Parse what is assigned to the field into a ``PhoneNumber``, like
+    ``phonenumber_field``'s descriptor does, once there is a number to parse.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.field.name not in instance.__dict__:
+            instance.refresh_from_db(fields=[self.field.name])
+        return instance.__dict__[self.field.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.name] = self.field.to_phone_number(value, region=self.field.region)
+
+
+class PhoneNumberField(models.CharField):
+    """
+    ``phonenumber_field.modelfields.PhoneNumberField`` that imports
+    ``phonenumbers`` and its metadata the first time a phone number is
+    actually parsed, rather than when the models are loaded: users loaded
+    or saved without a phone number never need it.
+
+    Values, validation and form fields are those of the original field, and
+    migrations refer to the original field so switching between the two
+    needs none.
+    """
+    descriptor_class = PhoneNumberDescriptor
+    default_validators = [validate_international_phonenumber]
+
+    description = _("Phone number")
+
+    def __init__(self, *args, region=None, **kwargs):
+        kwargs.setdefault('max_length', 128)
+        super().__init__(*args, **kwargs)
+        self._region = region
+
+    @property
+    def region(self):
+        return self._region or getattr(settings, 'PHONENUMBER_DEFAULT_REGION', None)
+
+    def to_phone_number(self, value, region=None):
+        if value in EMPTY_VALUES:
+            return value
+        from phonenumber_field.phonenumber import to_python
+        return to_python(value, region=region)
+
+    def check(self, **kwargs):
+        errors = super().check(**kwargs)
+        if self.region is not None:
+            from phonenumber_field.phonenumber import validate_region
+            try:
+                validate_region(self.region)
+            except ValueError as e:
+                errors.append(checks.Error(force_str(e), obj=self))
+        return errors
+
+    def get_prep_value(self, value):
+        if not value:
+            return super().get_prep_value(value)
+
+        from phonenumber_field.phonenumber import PhoneNumber
+        parsed_value = self.to_phone_number(value)
+        if parsed_value.is_valid():
+            # A valid phone number, normalized for storage.
+            fmt = PhoneNumber.format_map[getattr(settings, 'PHONENUMBER_DB_FORMAT', 'E164')]
+            value = parsed_value.format_as(fmt)
+        else:
+            # Not a valid phone number, the raw string is stored.
+            value = parsed_value.raw_input
+        return super().get_prep_value(value)
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_phone_number(value)
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        setattr(cls, self.name, self.descriptor_class(self))
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['region'] = self._region
+        return name, 'phonenumber_field.modelfields.PhoneNumberField', args, kwargs
+
+    def formfield(self, **kwargs):
+        from phonenumber_field import formfields
+        defaults = {
+            'form_class': formfields.PhoneNumberField,
+            'region': self.region,
+            'error_messages': self.error_messages,
+        }
+        defaults.update(kwargs)
+        return super().formfield(**defaults)
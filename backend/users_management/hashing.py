@@ -0,0 +1,159 @@
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.utils.module_loading import import_string
+
+
+def _init_worker(settings_module):
+    """
+    Configure Django in a freshly spawned hashing worker.
+    """
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+@lru_cache
+def _get_hasher(path):
+    return import_string(path)()
+
+
+def _hash_chunk(passwords, hasher_path):
+    hasher = _get_hasher(hasher_path)
+    return [make_password(password, hasher=hasher) for password in passwords]
+
+
+class PasswordHashingPool:
+    """
+    Hash passwords on a pool of worker processes.
+
+    Passwords are sent to the workers in chunks of ``chunk_size``. At most
+    ``queue_size`` chunks are in flight across all callers; once the queue is
+    full ``hash_many`` blocks until a worker hands a result back, so a large
+    import cannot pile up unbounded work (and memory) in the pool. Batches
+    smaller than ``min_batch`` are hashed on the calling thread, where the
+    round trip to a worker would cost more than it saves.
+
+    Workers only know the settings they were started with, so every chunk
+    carries the caller's default ``PASSWORD_HASHERS`` entry and is hashed
+    with it, ``override_settings`` included.
+    """
+    def __init__(self, workers, queue_size=None, chunk_size=16, min_batch=2):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size or self.workers * 4
+        self.chunk_size = chunk_size
+        self.min_batch = min_batch
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._executor = None
+        self._async_executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        # Forking a threaded server process is unsafe, spawn a clean interpreter instead.
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'sharma_academy.settings'),),
+                    )
+        return self._executor
+
+    def hash_many(self, passwords):
+        """
+        Return the hashes of ``passwords`` in the same order.
+        """
+        passwords = list(passwords)
+        hasher_path = settings.PASSWORD_HASHERS[0]
+        if self.workers == 1 or len(passwords) < self.min_batch:
+            return _hash_chunk(passwords, hasher_path)
+
+        futures = []
+        for start in range(0, len(passwords), self.chunk_size):
+            self._slots.acquire()
+            try:
+                future = self.executor.submit(_hash_chunk, passwords[start:start + self.chunk_size], hasher_path)
+            except BaseException:
+                self._slots.release()
+                raise
+            future.add_done_callback(lambda _: self._slots.release())
+            futures.append(future)
+
+        hashes = []
+        for future in futures:
+            hashes.extend(future.result())
+        return hashes
+
+    async def ahash_many(self, passwords):
+        """
+        Async variant of ``hash_many`` that never blocks the event loop.
+
+        Calls are handed to a dedicated thread pool of ``queue_size`` threads
+        which wait on (or, with a single worker, do) the hashing, so a burst of
+        coroutines queues there instead of exhausting the default executor.
+        """
+        if self._async_executor is None:
+            with self._lock:
+                if self._async_executor is None:
+                    self._async_executor = ThreadPoolExecutor(
+                        max_workers=self.queue_size, thread_name_prefix='password-hashing'
+                    )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._async_executor, self.hash_many, list(passwords))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            if self._async_executor is not None:
+                self._async_executor.shutdown()
+                self._async_executor = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the process-wide hashing pool configured from settings.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashingPool(
+                    workers=settings.PASSWORD_HASHING_WORKERS,
+                    queue_size=settings.PASSWORD_HASHING_QUEUE_SIZE,
+                    chunk_size=settings.PASSWORD_HASHING_CHUNK_SIZE,
+                )
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def hash_many(passwords):
+    return get_pool().hash_many(passwords)
+
+
+def hash_password(password):
+    return hash_many([password])[0]
+
+
+async def ahash_many(passwords):
+    return await get_pool().ahash_many(passwords)
+
+
+async def ahash_password(password):
+    return (await ahash_many([password]))[0]
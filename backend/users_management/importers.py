@@ -0,0 +1,161 @@
+import csv
+from collections import namedtuple
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from users_management.hashing import hash_many
+from users_management.models import User
+from users_management.password_validation import get_engine
+from users_management.referral_cache import resolve_referral_codes
+from users_management.referrals import add_referrals
+from users_management.search import index_users
+
+RowError = namedtuple('RowError', ['line', 'email', 'message'])
+
+
+def error_report(errors):
+    """
+    Render rejected rows, ``(line, email, message)`` tuples, as CSV, one line per error.
+    """
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['line', 'email', 'error'])
+    writer.writerows(errors)
+    return output.getvalue()
+
+
+class UserCSVImporter:
+    """
+    Validate and create users from CSV rows of ``email, referral_code, password``.
+
+    Rows are handled in chunks: referral codes and existing emails are resolved
+    with one ``IN`` query per chunk and valid rows are written with a batched
+    ``bulk_create``, so the number of queries grows with the number of chunks
+    rather than the number of rows. Passwords are checked against
+    ``AUTH_PASSWORD_VALIDATORS`` in one batch per chunk, like registrations
+    through the API. Invalid rows are collected instead of aborting the
+    import at the first failure.
+    """
+    chunk_size = 1000
+    batch_size = 500
+
+    def __init__(self, chunk_size=None, batch_size=None):
+        self.chunk_size = chunk_size or self.chunk_size
+        self.batch_size = batch_size or self.batch_size
+        self.password_validator = get_engine()
+        self.seen_emails = set()
+
+    def read_chunks(self, reader, first_line=2):
+        """
+        Yield lists of ``(line_number, row)`` holding at most ``chunk_size`` rows.
+
+        Blank lines are skipped.
+        """
+        chunk = []
+        for line, row in enumerate(reader, start=first_line):
+            if not any(cell.strip() for cell in row):
+                continue
+            chunk.append((line, row))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def validate_chunk(self, chunk):
+        """
+        Validate a chunk of rows and return ``(rows, errors)``.
+
+        Referral codes (through the referral code cache) and already
+        registered emails are looked up with at most one query each for the
+        whole chunk. Valid rows are returned as
+        ``(line, email, password, recommended_by_id)`` tuples.
+        """
+        errors = []
+        parsed = []
+        for line, row in chunk:
+            email = row[0].strip()
+            referral_code = row[1].strip() if len(row) > 1 else None
+            password = row[2].strip() if len(row) > 2 else None
+
+            try:
+                validate_email(email)
+                email = email.lower()
+            except ValidationError:
+                errors.append(RowError(line, email, f"Invalid email format for: {email}"))
+                continue
+
+            if email in self.seen_emails:
+                errors.append(RowError(line, email, f"Duplicate email {email} in uploaded file."))
+                continue
+            self.seen_emails.add(email)
+
+            if not password:
+                errors.append(RowError(line, email, f"Password is required for email {email}."))
+                continue
+
+            parsed.append((line, email, referral_code or None, password))
+
+        password_errors = self.password_validator.validate_many([password for _, _, _, password in parsed])
+        for (line, email, _, _), error in zip(parsed, password_errors):
+            if error is not None:
+                errors.append(RowError(line, email, f"Password validation failed for email {email}: {str(error)}"))
+        parsed = [row for row, error in zip(parsed, password_errors) if error is None]
+
+        referrers = resolve_referral_codes(code for _, _, code, _ in parsed if code)
+        existing_emails = set(
+            User.objects.filter(email__in=[email for _, email, _, _ in parsed]).values_list('email', flat=True)
+        )
+
+        rows = []
+        for line, email, referral_code, password in parsed:
+            if referral_code and referral_code not in referrers:
+                errors.append(RowError(line, email, f"Invalid referral code '{referral_code}' for email: {email}"))
+                continue
+            if email in existing_emails:
+                errors.append(RowError(line, email, f"User with email {email} already exists."))
+                continue
+            rows.append((line, email, password, referrers.get(referral_code)))
+        errors.sort()
+        return rows, errors
+
+    def build_users(self, rows):
+        """
+        Hash passwords and build unsaved ``User`` instances for validated rows.
+        """
+        hashes = hash_many(password for _, _, password, _ in rows)
+        return [
+            User(email=email, password=password_hash, recommended_by_id=recommended_by_id)
+            for (_, email, _, recommended_by_id), password_hash in zip(rows, hashes)
+        ]
+
+    def save_users(self, users):
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        # bulk_create() sends no post_save, record the referrals and index the users explicitly.
+        add_referrals(users)
+        index_users(users)
+        return users
+
+
+def register_batch(users, recommended_by_id, importer=None):
+    """
+    Register ``(email, password)`` pairs on behalf of the institute ``recommended_by_id``.
+
+    Rows go through the same chunk validation as a CSV import (one query
+    for taken emails, passwords validated and hashed in batch) and the
+    valid ones are written in one transaction. Return ``(created, errors)``:
+    the created users by position in ``users`` and ``RowError``s whose
+    ``line`` is that position.
+    """
+    importer = importer or UserCSVImporter()
+    chunk = [(index, [email, '', password]) for index, (email, password) in enumerate(users)]
+    rows, errors = importer.validate_chunk(chunk)
+    rows = [(index, email, password, recommended_by_id) for index, email, password, _ in rows]
+    # Hash before opening the transaction, the write lock is held for the inserts only.
+    built = importer.build_users(rows)
+    with transaction.atomic():
+        importer.save_users(built)
+    return {index: user for (index, _, _, _), user in zip(rows, built)}, errors
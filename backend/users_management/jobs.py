@@ -0,0 +1,214 @@
+import csv
+import logging
+import threading
+from datetime import timedelta
+from io import StringIO
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from sharma_academy.routers import use_primary
+from users_management.importers import UserCSVImporter
+from users_management.models import ImportJob, ImportJobError
+
+logger = logging.getLogger(__name__)
+
+RUNNING = (ImportJob.VALIDATING, ImportJob.IMPORTING)
+
+
+class JobLost(Exception):
+    """
+    Another worker claimed the job after this one stopped heartbeating.
+    """
+
+
+class JobInterrupted(Exception):
+    """
+    The worker is shutting down; the job resumes from its checkpoint elsewhere.
+    """
+
+
+def count_rows(text):
+    """
+    Number of non-blank data rows in a CSV file, header excluded.
+    """
+    reader = csv.reader(StringIO(text))
+    next(reader, None)
+    return sum(1 for row in reader if any(cell.strip() for cell in row))
+
+
+def enqueue_import(text, file_name, user=None):
+    """
+    Queue the CSV ``text`` for import by the workers and return the ``ImportJob``.
+    """
+    return ImportJob.objects.create(file_name=file_name, data=text, total_rows=count_rows(text), created_by=user)
+
+
+def claim_job(worker):
+    """
+    Claim the oldest pending job, or a running one whose worker has gone
+    silent, for ``worker`` and return it, or ``None`` if there is none.
+
+    Claiming is a compare-and-set on ``heartbeat``: of two workers racing
+    for a job only one ``UPDATE`` matches a row.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    candidates = ImportJob.objects.filter(
+        Q(status=ImportJob.PENDING)
+        | Q(status__in=RUNNING, heartbeat__lt=stale)
+        | Q(status__in=RUNNING, heartbeat__isnull=True)
+    ).order_by('pk').values_list('pk', 'heartbeat')[:10]
+    for pk, heartbeat in candidates:
+        if ImportJob.objects.filter(pk=pk, heartbeat=heartbeat).update(worker=worker, heartbeat=timezone.now()):
+            return ImportJob.objects.get(pk=pk)
+    return None
+
+
+class ImportJobRunner:
+    """
+    Run a claimed ``ImportJob``: validate the whole file, then import it one chunk per transaction.
+
+    Nothing is created when validation rejects a row, like the synchronous
+    import. While importing, each chunk's users, errors and the new
+    ``lines_done`` checkpoint are committed together, so a job picked up
+    again after a crash continues after the last committed chunk.
+    Passwords are hashed before the chunk's transaction is opened, keeping
+    the write lock short. A background thread refreshes ``heartbeat`` while
+    the job runs.
+    """
+    def __init__(self, job, worker, stop=None):
+        self.job = job
+        self.worker = worker
+        self.stop = stop or threading.Event()
+        self.finished = threading.Event()
+
+    def save(self, **fields):
+        """
+        Update ``fields`` of the job if this worker still owns it.
+        """
+        fields['heartbeat'] = timezone.now()
+        if not ImportJob.objects.filter(pk=self.job.pk, worker=self.worker).update(**fields):
+            raise JobLost(f"Import job {self.job.pk} was claimed by another worker.")
+        for name, value in fields.items():
+            setattr(self.job, name, value)
+
+    def chunks(self, importer, lines_done=0):
+        reader = csv.reader(StringIO(self.job.data))
+        next(reader, None)
+        return importer.read_chunks(islice(reader, lines_done, None), first_line=2 + lines_done)
+
+    def record_errors(self, errors):
+        ImportJobError.objects.bulk_create(
+            ImportJobError(job=self.job, line=line, email=email, message=message) for line, email, message in errors
+        )
+
+    def check_stop(self):
+        if self.stop.is_set():
+            raise JobInterrupted()
+
+    def run(self):
+        heartbeat = threading.Thread(target=self.beat, name=f'import-job-{self.job.pk}-heartbeat', daemon=True)
+        heartbeat.start()
+        try:
+            if self.job.status in (ImportJob.PENDING, ImportJob.VALIDATING):
+                self.validate()
+            if self.job.status == ImportJob.IMPORTING:
+                self.import_rows()
+        except JobLost:
+            logger.warning(f"Import job {self.job.pk} was taken over by another worker.")
+        except JobInterrupted:
+            # Let the next worker resume it right away instead of waiting for it to go stale.
+            ImportJob.objects.filter(pk=self.job.pk, worker=self.worker).update(worker='', heartbeat=None)
+            logger.info(f"Import job {self.job.pk} interrupted at line {self.job.lines_done}.")
+        except Exception as error:
+            logger.exception(f"Import job {self.job.pk} failed.")
+            ImportJob.objects.filter(pk=self.job.pk, worker=self.worker).update(
+                status=ImportJob.FAILED, message=f"Import failed: {error}", finished_at=timezone.now(),
+            )
+        finally:
+            self.finished.set()
+            heartbeat.join()
+
+    def beat(self):
+        try:
+            while not self.finished.wait(settings.IMPORT_JOB_HEARTBEAT):
+                try:
+                    ImportJob.objects.filter(pk=self.job.pk, worker=self.worker).update(heartbeat=timezone.now())
+                except Exception:
+                    # E.g. the database was locked or the connection dropped: beat
+                    # again next time, on a new connection, rather than go silent
+                    # and have the job taken over.
+                    logger.exception(f"Import job {self.job.pk} heartbeat failed.")
+                    connection.close()
+        finally:
+            connection.close()
+
+    def validate(self):
+        with transaction.atomic():
+            # A validation interrupted earlier starts over, it wrote nothing but errors.
+            ImportJobError.objects.filter(job=self.job).delete()
+            self.save(status=ImportJob.VALIDATING, rows_validated=0, error_count=0, phase_started_at=timezone.now())
+
+        importer = UserCSVImporter()
+        for chunk in self.chunks(importer):
+            self.check_stop()
+            _, errors = importer.validate_chunk(chunk)
+            with transaction.atomic():
+                self.record_errors(errors)
+                self.save(
+                    rows_validated=self.job.rows_validated + len(chunk),
+                    error_count=self.job.error_count + len(errors),
+                )
+
+        if self.job.error_count:
+            self.save(
+                status=ImportJob.FAILED, finished_at=timezone.now(),
+                message=f"{self.job.error_count} rows failed validation, no users were created.",
+            )
+        else:
+            self.save(status=ImportJob.IMPORTING, phase_started_at=timezone.now())
+
+    def import_rows(self):
+        # A fresh importer: the validation pass has seen every email already.
+        importer = UserCSVImporter()
+        for chunk in self.chunks(importer, self.job.lines_done):
+            self.check_stop()
+            rows, errors = importer.validate_chunk(chunk)
+            users = importer.build_users(rows)
+            with transaction.atomic():
+                importer.save_users(users)
+                # Rows that became invalid since validation, e.g. an email registered meanwhile.
+                self.record_errors(errors)
+                self.save(
+                    rows_imported=self.job.rows_imported + len(users),
+                    error_count=self.job.error_count + len(errors),
+                    lines_done=chunk[-1][0] - 1,
+                )
+
+        message = f"{self.job.rows_imported} users created."
+        if self.job.error_count:
+            message += f" {self.job.error_count} rows were rejected while importing."
+        self.save(status=ImportJob.DONE, finished_at=timezone.now(), message=message)
+
+
+def work(worker, stop, poll_interval=None, once=False):
+    """
+    Run import jobs as ``worker`` until ``stop`` is set, or (``once``) until the queue is empty.
+    """
+    if poll_interval is None:
+        poll_interval = settings.IMPORT_JOB_POLL_INTERVAL
+    # Jobs read what they have just written, replicas could lag behind.
+    with use_primary():
+        while not stop.is_set():
+            close_old_connections()
+            job = claim_job(worker)
+            if job is not None:
+                logger.info(f"Worker {worker} running import job {job.pk}.")
+                ImportJobRunner(job, worker, stop).run()
+            elif once:
+                return
+            else:
+                stop.wait(poll_interval)
@@ -0,0 +1,448 @@
+"""
+End-to-end load generator for the users API, run through ``manage.py loadtest``.
+
+Requests go through the project's real WSGI (``WSGI_APPLICATION``) or ASGI
+(``ASGI_APPLICATION``) application, middleware included, called in-process
+from ``processes`` forked workers; under ASGI every worker runs
+``concurrency`` coroutines. Nothing but the socket layer is left out.
+
+A run is described by a scenario, a JSON file (see ``scenarios/``) holding
+the keys of ``DEFAULT_SCENARIO``. The seeded users and the sequence of
+operations each worker sends are derived from ``seed`` alone, so the same
+scenario sends the same requests on every commit and results written with
+``--output`` can be compared with ``--compare``.
+"""
+import asyncio
+import json
+import multiprocessing
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from io import BytesIO
+from pathlib import Path
+
+OPERATIONS = ('register', 'login', 'retrieve', 'update', 'staff_list')
+SCENARIO_DIR = Path(__file__).with_name('scenarios')
+DEFAULT_SCENARIO = {
+    'description': '',
+    # 'wsgi' or 'asgi'
+    'interface': 'wsgi',
+    'processes': 4,
+    # Coroutines per process, ASGI only.
+    'concurrency': 8,
+    # Measured requests per process, after 'warmup' unmeasured ones.
+    'requests': 200,
+    'warmup': 10,
+    'seed': 1,
+    # Users seeded before the run, all with the password SEED_PASSWORD.
+    'users': 1000,
+    # Relative weight of every operation.
+    'mix': {'register': 5, 'login': 10, 'retrieve': 55, 'update': 10, 'staff_list': 20},
+    # DEFAULT_THROTTLE_RATES during the run, null for the configured rates.
+    'throttle_rates': {'anon': None, 'user': None},
+    # PASSWORD_HASHERS during the run, null for the configured hashers.
+    'password_hashers': None,
+}
+SEED_PASSWORD = 'Load!Test0Password'
+HOST = 'loadtest.local'
+EXPECTED_STATUS = {'register': 201, 'login': 200, 'retrieve': 200, 'update': 200, 'staff_list': 200}
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+def load_scenario(name_or_path, **overrides):
+    """
+    Return the scenario in ``name_or_path`` (a file, or the name of one in
+    ``scenarios/``) completed with ``DEFAULT_SCENARIO`` and updated with the
+    ``overrides`` that are not ``None``.
+    """
+    path = Path(name_or_path)
+    if not path.exists():
+        path = SCENARIO_DIR / f'{name_or_path}.json'
+    try:
+        scenario = {**DEFAULT_SCENARIO, **json.loads(path.read_text())}
+    except FileNotFoundError:
+        raise ScenarioError(f"No scenario {name_or_path}.")
+    scenario.update({key: value for key, value in overrides.items() if value is not None})
+
+    unknown = set(scenario) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ScenarioError(f"Unknown scenario keys: {', '.join(sorted(unknown))}.")
+    if scenario['interface'] not in ('wsgi', 'asgi'):
+        raise ScenarioError("interface must be 'wsgi' or 'asgi'.")
+    unknown = set(scenario['mix']) - set(OPERATIONS)
+    if unknown:
+        raise ScenarioError(f"Unknown operations in mix: {', '.join(sorted(unknown))}.")
+    if not any(scenario['mix'].values()):
+        raise ScenarioError("The mix has no operation with a weight.")
+    return scenario
+
+
+def plan(scenario, process):
+    """
+    Return the ``(operation, user index)`` pairs process number ``process`` sends, warmup first.
+    """
+    rng = random.Random(f"{scenario['seed']}-{process}")
+    operations = [operation for operation in OPERATIONS if scenario['mix'].get(operation)]
+    weights = [scenario['mix'][operation] for operation in operations]
+    count = scenario['warmup'] + scenario['requests']
+    return [
+        (operation, rng.randrange(scenario['users']))
+        for operation in rng.choices(operations, weights, k=count)
+    ]
+
+
+def seed_users(scenario):
+    """
+    Create the scenario's users and a staff user, return ``(users, staff)`` as ``(id, email)``.
+    """
+    from django.contrib.auth.hashers import make_password
+
+    from users_management.models import User
+
+    password = make_password(SEED_PASSWORD)
+    User.objects.bulk_create(
+        (User(email=f'user{index}@loadtest.example', password=password) for index in range(scenario['users'])),
+        batch_size=500,
+    )
+    users = list(User.objects.filter(email__endswith='@loadtest.example').order_by('pk').values_list('pk', 'email'))
+    staff = User.objects.create(email='staff@loadtest.example', password=password, is_staff=True)
+    return users, (staff.pk, staff.email)
+
+
+class VirtualClients:
+    """
+    Build the request of every operation; the seeded users hold a bearer token each.
+    """
+    def __init__(self, process, users, staff):
+        from django.urls import reverse
+
+        self.process = process
+        self.users = users
+        self.staff = staff
+        self.tokens = {}
+        self.registered = 0
+        self.list_url = reverse('user-list')
+        self.token_url = reverse('token-obtain')
+
+    def token(self, user_id, email, is_staff=False):
+        from users_management.authentication import signed_tokens
+        from users_management.models import User
+
+        if user_id not in self.tokens:
+            user = User(pk=user_id, email=email, is_staff=is_staff)
+            self.tokens[user_id] = signed_tokens.issue(user)['access']
+        return self.tokens[user_id]
+
+    def request(self, operation, index):
+        """
+        Return ``(method, path, body, headers, client ip)`` for ``operation`` by seeded user ``index``.
+        """
+        from django.urls import reverse
+
+        user_id, email = self.users[index]
+        client_ip = f'10.{self.process % 256}.{index // 256 % 256}.{index % 256}'
+        if operation == 'register':
+            self.registered += 1
+            email = f'new{self.process}-{self.registered}@loadtest.example'
+            body = {'email': email, 'password': SEED_PASSWORD, 'confirm_password': SEED_PASSWORD}
+            return 'POST', self.list_url, body, [], client_ip
+        if operation == 'login':
+            return 'POST', self.token_url, {'email': email, 'password': SEED_PASSWORD}, [], client_ip
+        if operation == 'staff_list':
+            headers = [('authorization', f'Bearer {self.token(*self.staff, is_staff=True)}')]
+            return 'GET', self.list_url, None, headers, client_ip
+        headers = [('authorization', f'Bearer {self.token(user_id, email)}')]
+        url = reverse('user-detail', args=[user_id])
+        if operation == 'retrieve':
+            return 'GET', url, None, headers, client_ip
+        body = {'email': email, 'password': SEED_PASSWORD, 'confirm_password': SEED_PASSWORD}
+        return 'PATCH', url, body, headers, client_ip
+
+
+def call_wsgi(application, method, path, body, headers, client_ip):
+    """
+    Send one request to a WSGI application and return the response status code.
+    """
+    payload = json.dumps(body).encode() if body is not None else b''
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': client_ip,
+        'HTTP_HOST': HOST,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(payload),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers:
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+
+    status = []
+    response = application(environ, lambda status_line, response_headers, exc_info=None: status.append(status_line))
+    try:
+        for _ in response:
+            pass
+    finally:
+        # Sends request_finished, which closes the database connection as a server would.
+        if hasattr(response, 'close'):
+            response.close()
+    return int(status[0].split()[0])
+
+
+async def call_asgi(application, method, path, body, headers, client_ip):
+    """
+    Send one request to an ASGI application and return the response status code.
+    """
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', HOST.encode()),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode()),
+            *((name.encode(), value.encode()) for name, value in headers),
+        ],
+        'client': (client_ip, 50000),
+        'server': (HOST, 80),
+    }
+    finished = asyncio.Event()
+    status = None
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        # The client stays connected until the whole response was sent.
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body', False):
+            finished.set()
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        finished.set()
+    return status
+
+
+class Recorder:
+    """
+    Latencies and status codes of one worker's measured requests.
+    """
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.started = None
+        self.finished = None
+
+    def record(self, operation, latency, status):
+        self.latencies[operation].append(latency)
+        self.statuses[operation][status] += 1
+
+    def result(self):
+        return {
+            'latencies': dict(self.latencies),
+            'statuses': {operation: dict(statuses) for operation, statuses in self.statuses.items()},
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+def _send_wsgi(application, clients, operation, index):
+    started = time.monotonic()
+    try:
+        status = call_wsgi(application, *clients.request(operation, index))
+    except Exception:
+        status = 'exception'
+    return time.monotonic() - started, status
+
+
+async def _send_asgi(application, clients, operation, index):
+    started = time.monotonic()
+    try:
+        status = await call_asgi(application, *clients.request(operation, index))
+    except Exception:
+        status = 'exception'
+    return time.monotonic() - started, status
+
+
+def _run_wsgi(scenario, clients, operations, barrier, recorder):
+    from django.core.servers.basehttp import get_internal_wsgi_application
+
+    application = get_internal_wsgi_application()
+    warmup = scenario['warmup']
+    for operation, index in operations[:warmup]:
+        _send_wsgi(application, clients, operation, index)
+    barrier.wait()
+    recorder.started = time.monotonic()
+    for operation, index in operations[warmup:]:
+        recorder.record(operation, *_send_wsgi(application, clients, operation, index))
+    recorder.finished = time.monotonic()
+
+
+async def _run_asgi(scenario, clients, operations, barrier, recorder):
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    application = import_string(settings.ASGI_APPLICATION)
+    warmup = scenario['warmup']
+
+    async def coroutine(queue, record):
+        while queue:
+            operation, index = queue.pop()
+            latency, status = await _send_asgi(application, clients, operation, index)
+            if record:
+                recorder.record(operation, latency, status)
+
+    # Coroutines take the next request from a shared queue; reversed so pop() keeps the planned order.
+    queue = operations[:warmup][::-1]
+    await asyncio.gather(*(coroutine(queue, False) for _ in range(scenario['concurrency'])))
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+    recorder.started = time.monotonic()
+    queue = operations[warmup:][::-1]
+    await asyncio.gather(*(coroutine(queue, True) for _ in range(scenario['concurrency'])))
+    recorder.finished = time.monotonic()
+
+
+def _worker(scenario, process, users, staff, barrier, results):
+    clients = VirtualClients(process, users, staff)
+    operations = plan(scenario, process)
+    recorder = Recorder()
+    try:
+        if scenario['interface'] == 'wsgi':
+            _run_wsgi(scenario, clients, operations, barrier, recorder)
+        else:
+            asyncio.run(_run_asgi(scenario, clients, operations, barrier, recorder))
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        results.put(recorder.result())
+
+
+def _distribution(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return {'p50': value, 'p90': value, 'p99': value, 'max': value}
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p90': cuts[89], 'p99': cuts[98], 'max': max(latencies)}
+
+
+def summarize(scenario, worker_results):
+    """
+    Merge the results of every worker into the report of the run.
+    """
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for result in worker_results:
+        for operation, values in result['latencies'].items():
+            latencies[operation].extend(values)
+        for operation, counts in result['statuses'].items():
+            statuses[operation].update(counts)
+    started = min(result['started'] for result in worker_results if result['started'] is not None)
+    finished = max(result['finished'] for result in worker_results if result['finished'] is not None)
+    elapsed = finished - started
+
+    def stats(values, errors, throttled):
+        return {
+            'requests': len(values),
+            'rps': len(values) / elapsed if elapsed else 0.0,
+            'errors': errors,
+            'error_rate': errors / len(values) if values else 0.0,
+            'throttled': throttled,
+            **_distribution(values),
+        }
+
+    operations = {}
+    for operation in OPERATIONS:
+        if operation not in latencies:
+            continue
+        counts = statuses[operation]
+        throttled = counts.get(429, 0)
+        errors = sum(counts.values()) - counts.get(EXPECTED_STATUS[operation], 0) - throttled
+        operations[operation] = {
+            **stats(latencies[operation], errors, throttled),
+            'statuses': {str(status): count for status, count in sorted(counts.items(), key=str)},
+        }
+    total = stats(
+        [latency for values in latencies.values() for latency in values],
+        sum(result['errors'] for result in operations.values()),
+        sum(result['throttled'] for result in operations.values()),
+    )
+    return {'elapsed': elapsed, 'total': total, 'operations': operations}
+
+
+def run(scenario):
+    """
+    Seed a throwaway database, run ``scenario`` against it and return the report.
+
+    The throttle store is a temporary file as well, so the run neither reads
+    nor leaves behind rate limit state.
+    """
+    from django.conf import settings
+    from django.db import connections
+    from django.test import override_settings
+
+    from users_management.benchmarks import benchmark_database
+
+    overrides = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, HOST]}
+    if scenario['throttle_rates'] is not None:
+        overrides['REST_FRAMEWORK'] = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **scenario['throttle_rates']},
+        }
+    if scenario['password_hashers'] is not None:
+        overrides['PASSWORD_HASHERS'] = scenario['password_hashers']
+
+    with tempfile.TemporaryDirectory() as directory, benchmark_database():
+        overrides['THROTTLE_STORE_PATH'] = str(Path(directory) / 'throttle.sqlite3')
+        with override_settings(**overrides):
+            users, staff = seed_users(scenario)
+            connections.close_all()
+
+            context = multiprocessing.get_context('fork')
+            barrier = context.Barrier(scenario['processes'])
+            results = context.Queue()
+            workers = [
+                context.Process(target=_worker, args=(scenario, process, users, staff, barrier, results))
+                for process in range(scenario['processes'])
+            ]
+            for worker in workers:
+                worker.start()
+            worker_results = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+    if any(result['started'] is None for result in worker_results):
+        raise RuntimeError("A load test worker failed before the measured run, see its traceback above.")
+    return summarize(scenario, worker_results)
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from users_management.models import ReferralPath, ReferralStats, User
+
+
+class Command(BaseCommand):
+    help = "Rebuild the referral closure table and counters from User.recommended_by."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--max-depth', type=int, default=1000,
+            help="Abort if the tree is deeper than this, which can only happen with a referral cycle.",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, batch_size, max_depth, **options):
+        ReferralPath.objects.all().delete()
+        ReferralStats.objects.all().delete()
+
+        # Level by level: depth 1 comes from recommended_by, depth n + 1 extends
+        # every depth n path by the referrals of its descendant. Rows are
+        # streamed, so memory stays flat whatever the size of the tree.
+        rows = User.objects.filter(recommended_by__isnull=False).values_list('recommended_by_id', 'id', 'date_joined')
+        depth = 1
+        while True:
+            created = self._create_paths(rows, depth, batch_size)
+            if not created:
+                break
+            if options['verbosity'] > 1:
+                self.stdout.write(f"depth {depth}: {created} paths")
+            if depth == max_depth:
+                raise CommandError(f"Referral tree deeper than {max_depth} levels, check for a referral cycle.")
+            rows = ReferralPath.objects.filter(depth=depth, descendant__referrals__isnull=False).values_list(
+                'ancestor_id', 'descendant__referrals__id', 'descendant__referrals__date_joined'
+            )
+            depth += 1
+
+        direct_counts = dict(
+            User.objects.filter(recommended_by__isnull=False).values('recommended_by_id')
+            .annotate(count=Count('id')).values_list('recommended_by_id', 'count')
+        )
+        total_counts = ReferralPath.objects.values('ancestor_id').annotate(count=Count('id')).values_list(
+            'ancestor_id', 'count'
+        )
+        ReferralStats.objects.bulk_create(
+            (ReferralStats(user_id=user_id, direct_count=direct_counts.get(user_id, 0), total_count=count)
+             for user_id, count in total_counts.iterator(chunk_size=batch_size)),
+            batch_size=batch_size,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Referral tree rebuilt for {len(direct_counts)} referrers."))
+
+    def _create_paths(self, rows, depth, batch_size):
+        created = 0
+        batch = []
+        for ancestor_id, descendant_id, joined_at in rows.iterator(chunk_size=batch_size):
+            batch.append(ReferralPath(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth, joined_at=joined_at))
+            if len(batch) == batch_size:
+                created += len(ReferralPath.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(ReferralPath.objects.bulk_create(batch))
+        return created
@@ -0,0 +1,20 @@
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+
+from users_management.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run one of the users_management benchmarks."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='benchmark', required=True)
+        for name in BENCHMARKS:
+            module = import_module(f'users_management.benchmarks.{name}')
+            subparser = subparsers.add_parser(name, help=module.__doc__.strip().splitlines()[0])
+            module.add_arguments(subparser)
+
+    def handle(self, *args, benchmark, **options):
+        module = import_module(f'users_management.benchmarks.{benchmark}')
+        module.run(self, **options)
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sharma_academy.schema import build_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the OpenAPI schema as YAML and JSON, plain and gzipped, into API_SCHEMA_DIR "
+        "(or --directory), to be served by /api/schema/ without generating it at run time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default=settings.API_SCHEMA_DIR, help="Where to write the files.")
+
+    def handle(self, *args, directory, **options):
+        if not directory:
+            raise CommandError("Set API_SCHEMA_DIR or pass --directory.")
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        for path in build_schema(directory):
+            self.stdout.write(self.style.SUCCESS(f"Wrote {path} and {path.name}.gz."))
@@ -0,0 +1,114 @@
+import json
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users_management.loadtest import (OPERATIONS, ScenarioError,
+                                       load_scenario, run)
+
+
+def _mix(value):
+    try:
+        return {operation: int(weight) for operation, weight in (item.split('=') for item in value.split(','))}
+    except ValueError:
+        raise CommandError("--mix takes operation=weight pairs, e.g. retrieve=80,login=20.")
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the users API through the WSGI or ASGI application with a seeded mix of "
+        "register, login, retrieve, update and staff_list requests, against a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenario', nargs='?', default='default',
+            help="Scenario file, or the name of one in users_management/loadtest/scenarios.",
+        )
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'])
+        parser.add_argument('--processes', type=int)
+        parser.add_argument('--concurrency', type=int, help="Coroutines per process (ASGI).")
+        parser.add_argument('--requests', type=int, help="Measured requests per process.")
+        parser.add_argument('--warmup', type=int, help="Unmeasured requests per process first.")
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--users', type=int, help="Users seeded before the run.")
+        parser.add_argument('--mix', type=_mix, help="Operation weights, e.g. retrieve=80,login=20.")
+        parser.add_argument('--save-scenario', help="Write the scenario, overrides included, to this file.")
+        parser.add_argument('--output', help="Write the scenario and the results to this JSON file.")
+        parser.add_argument('--compare', help="Results file of an earlier run to compare with.")
+
+    def handle(self, *args, scenario, save_scenario, output, compare, **options):
+        overrides = {key: options[key] for key in (
+            'interface', 'processes', 'concurrency', 'requests', 'warmup', 'seed', 'users', 'mix',
+        )}
+        try:
+            scenario = load_scenario(scenario, **overrides)
+        except ScenarioError as error:
+            raise CommandError(str(error))
+        if save_scenario:
+            Path(save_scenario).write_text(json.dumps(scenario, indent=2) + '\n')
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING("DEBUG is on, every query is logged in memory."))
+
+        workers = f"{scenario['processes']} processes"
+        if scenario['interface'] == 'asgi':
+            workers += f" x {scenario['concurrency']} coroutines"
+        self.stdout.write(
+            f"{scenario['interface'].upper()}, {workers}, {scenario['requests']} requests per process, "
+            f"seed {scenario['seed']}, {scenario['users']} users"
+        )
+        report = run(scenario)
+        self.write_report(report)
+
+        if compare:
+            self.write_comparison(scenario, report, json.loads(Path(compare).read_text()))
+        if output:
+            Path(output).write_text(json.dumps(
+                {'commit': _commit(), 'scenario': scenario, **report}, indent=2, sort_keys=True
+            ) + '\n')
+
+    def write_report(self, report):
+        self.stdout.write(
+            f"{'operation':<12} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+            f"{'max ms':>8} {'errors':>7} {'throttled':>9}"
+        )
+        rows = [(name, report['operations'][name]) for name in OPERATIONS if name in report['operations']]
+        for name, stats in rows + [('total', report['total'])]:
+            self.stdout.write(
+                f"{name:<12} {stats['requests']:>9} {stats['rps']:>8.1f} {stats['p50'] * 1e3:>8.1f} "
+                f"{stats['p90'] * 1e3:>8.1f} {stats['p99'] * 1e3:>8.1f} {stats['max'] * 1e3:>8.1f} "
+                f"{stats['error_rate']:>7.1%} {stats['throttled']:>9}"
+            )
+        for name, stats in rows:
+            if stats['errors']:
+                self.stdout.write(self.style.WARNING(f"{name} status codes: {stats['statuses']}"))
+
+    def write_comparison(self, scenario, report, previous):
+        if previous['scenario'] != scenario:
+            self.stdout.write(self.style.WARNING("The previous run used a different scenario."))
+        self.stdout.write(f"Compared with {previous['commit'] or 'the previous run'}:")
+        self.stdout.write(f"{'operation':<12} {'req/s':>10} {'p50':>10} {'p99':>10}")
+        rows = [
+            (name, report['operations'][name], previous['operations'][name])
+            for name in OPERATIONS if name in report['operations'] and name in previous['operations']
+        ]
+        for name, stats, before in rows + [('total', report['total'], previous['total'])]:
+            self.stdout.write(
+                f"{name:<12} {_change(stats['rps'], before['rps']):>10} {_change(stats['p50'], before['p50']):>10} "
+                f"{_change(stats['p99'], before['p99']):>10}"
+            )
+
+
+def _change(value, before):
+    return f"{(value - before) / before:+.1%}" if before else 'n/a'
@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'wsgi': 'sharma_academy.wsgi',
+    'asgi': 'sharma_academy.asgi',
+}
+
+MARKER = '-- profile_startup --'
+
+# Run with `python -X importtime -c CHILD <module> <measure memory>` in a fresh
+# interpreter. With memory measured, every module's loader is wrapped to record
+# the traced memory its execution left allocated, its imports included
+# (cumulative) and excluded (self), the way -X importtime reports time.
+CHILD = f'''
+import json
+import resource
+import sys
+import time
+
+module, measure_memory = sys.argv[1], sys.argv[2] == '1'
+memory = {{}}
+if measure_memory:
+    import tracemalloc
+
+    stack = []
+
+    class MeasuringLoader:
+        def __init__(self, loader):
+            self.loader = loader
+
+        def __getattr__(self, name):
+            return getattr(self.loader, name)
+
+        def create_module(self, spec):
+            return self.loader.create_module(spec)
+
+        def exec_module(self, module):
+            stack.append(0)
+            before = tracemalloc.get_traced_memory()[0]
+            try:
+                self.loader.exec_module(module)
+            finally:
+                children = stack.pop()
+                cumulative = tracemalloc.get_traced_memory()[0] - before
+                memory[module.__name__] = (cumulative - children, cumulative)
+                if stack:
+                    stack[-1] += cumulative
+
+    class MeasuringFinder:
+        def find_spec(self, name, path, target=None):
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    if hasattr(spec.loader, 'exec_module'):
+                        spec.loader = MeasuringLoader(spec.loader)
+                    return spec
+            return None
+
+    sys.meta_path.insert(0, MeasuringFinder())
+    tracemalloc.start()
+
+print({MARKER!r}, file=sys.stderr, flush=True)
+started = time.perf_counter()
+__import__(module)
+seconds = time.perf_counter() - started
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    'seconds': seconds,
+    # Bytes on macOS, KiB elsewhere.
+    'max_rss': max_rss if sys.platform == 'darwin' else max_rss * 1024,
+    'traced': tracemalloc.get_traced_memory()[0] if measure_memory else None,
+    'memory': memory,
+}}))
+'''
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Report what importing the WSGI and ASGI applications costs in a fresh interpreter, "
+        "as a worker process pays it at boot: time and memory per module and per package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help=f"Applications to profile among {', '.join(TARGETS)}, all by default.")
+        parser.add_argument('--top', type=int, default=20, help="Modules and packages listed.")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs, the fastest time of each module is kept.")
+        parser.add_argument('--no-memory', action='store_false', dest='memory', help="Skip the memory run.")
+
+    def handle(self, *args, targets, top, repeat, memory, **options):
+        unknown = set(targets) - set(TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown targets: {', '.join(sorted(unknown))}.")
+        for target in targets or TARGETS:
+            self.profile(TARGETS[target], top, repeat, memory)
+
+    def run_child(self, module, measure_memory):
+        environment = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD, module, '1' if measure_memory else '0'],
+            cwd=settings.BASE_DIR, env=environment, capture_output=True, text=True,
+        )
+        if process.returncode:
+            raise CommandError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+        times = {}
+        # Only what importing the module loaded: the lines after the marker.
+        for line in process.stderr.partition(MARKER)[2].splitlines():
+            match = IMPORT_TIME.match(line)
+            if match:
+                times[match[3].strip()] = (int(match[1]) / 1000, int(match[2]) / 1000)
+        return json.loads(process.stdout), times
+
+    def profile(self, module, top, repeat, measure_memory):
+        runs = [self.run_child(module, measure_memory=False) for _ in range(repeat)]
+        seconds = min(result['seconds'] for result, _ in runs)
+        max_rss = min(result['max_rss'] for result, _ in runs)
+        times = {
+            name: tuple(min(run_times[name][column] for _, run_times in runs if name in run_times) for column in (0, 1))
+            for name in runs[0][1]
+        }
+        memory, traced = {}, None
+        if measure_memory:
+            result, _ = self.run_child(module, measure_memory=True)
+            memory, traced = result['memory'], result['traced']
+
+        summary = f"{module}: {seconds * 1000:.1f} ms, {len(times)} modules imported, peak RSS {max_rss / 2 ** 20:.1f} MiB"
+        if traced is not None:
+            summary += f", {traced / 2 ** 20:.1f} MiB allocated by Python code still held"
+        self.stdout.write(self.style.MIGRATE_HEADING(summary))
+
+        packages = defaultdict(lambda: [0, 0.0, 0])
+        for name, (self_ms, _) in times.items():
+            package = packages[name.partition('.')[0]]
+            package[0] += 1
+            package[1] += self_ms
+            package[2] += memory.get(name, (0, 0))[0]
+        self.stdout.write(f"\n{'package':<32} {'modules':>8} {'self ms':>9} {'self KiB':>10}")
+        for name, (count, self_ms, self_bytes) in sorted(packages.items(), key=lambda item: -item[1][1])[:top]:
+            self.stdout.write(f"{name:<32} {count:>8} {self_ms:>9.1f} {self_bytes / 1024:>10.0f}")
+
+        self.stdout.write(
+            f"\n{'module':<48} {'self ms':>9} {'total ms':>9} {'self KiB':>10} {'total KiB':>10}"
+        )
+        for name, (self_ms, cumulative_ms) in sorted(times.items(), key=lambda item: -item[1][1])[:top]:
+            self_bytes, cumulative_bytes = memory.get(name, (0, 0))
+            self.stdout.write(
+                f"{name:<48} {self_ms:>9.1f} {cumulative_ms:>9.1f} "
+                f"{self_bytes / 1024:>10.0f} {cumulative_bytes / 1024:>10.0f}"
+            )
+        self.stdout.write('')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users_management.authentication import signed_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete the token revocations whose tokens have expired, e.g. hourly from cron."
+
+    def handle(self, *args, **options):
+        deleted = signed_tokens.purge()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} expired token revocations deleted."))
@@ -0,0 +1,33 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from users_management.models import User, UserSearchTrigram
+from users_management.search import SEARCH_FIELDS, field_trigrams
+
+
+class Command(BaseCommand):
+    help = "Rebuild the user search trigram index from the user table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    @transaction.atomic
+    def handle(self, *args, batch_size, **options):
+        UserSearchTrigram.objects.all().delete()
+        users = User.objects.values_list('id', *SEARCH_FIELDS).iterator(chunk_size=batch_size)
+        rows = ((user_id, trigram) for user_id, *values in users for trigram in field_trigrams(values))
+
+        # Tens of rows per user: plain executemany() rather than model instances through bulk_create().
+        meta = UserSearchTrigram._meta
+        quote_name = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}, {}) VALUES (%s, %s)'.format(
+            quote_name(meta.db_table), quote_name(meta.get_field('user').column), quote_name(meta.get_field('trigram').column),
+        )
+        created = 0
+        with connection.cursor() as cursor:
+            while batch := list(islice(rows, batch_size)):
+                cursor.executemany(sql, batch)
+                created += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt: {created} trigrams."))
@@ -0,0 +1,58 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from users_management.jobs import work
+
+
+def _worker(poll_interval, once):
+    stop = threading.Event()
+    # Finish the current chunk, hand the job back and exit.
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    work(f'{socket.gethostname()}:{os.getpid()}', stop, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background CSV import jobs queued from the admin. Jobs live in the database, "
+        "so any number of these can run, on any host."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to fork.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.IMPORT_JOB_POLL_INTERVAL,
+            help="Seconds between looks for new jobs while idle.",
+        )
+        parser.add_argument('--once', action='store_true', help="Exit once no job is left instead of polling.")
+
+    def handle(self, *args, processes, poll_interval, once, **options):
+        if processes <= 1:
+            self.stdout.write(f"Worker {os.getpid()} waiting for import jobs.")
+            _worker(poll_interval, once)
+            return
+
+        # Children open their own connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_worker, args=(poll_interval, once)) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {processes} workers: {', '.join(str(worker.pid) for worker in workers)}.")
+
+        def stop(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    os.kill(worker.pid, signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for worker in workers:
+            worker.join()
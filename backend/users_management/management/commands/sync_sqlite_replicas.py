@@ -0,0 +1,37 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary database into the SQLite read replica files, to try the "
+        "replica router locally. Real replicas are kept up to date by database replication."
+    )
+
+    def handle(self, *args, **options):
+        sqlite = 'django.db.backends.sqlite3'
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != sqlite:
+            raise CommandError("The primary database is not SQLite.")
+        replicas = {
+            alias: database for alias, database in settings.DATABASES.items()
+            if alias != DEFAULT_DB_ALIAS and database['ENGINE'] == sqlite
+        }
+        if not replicas:
+            raise CommandError("No SQLite replica configured, see DATABASE_REPLICA_URLS.")
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias, database in replicas.items():
+                target = sqlite3.connect(database['NAME'])
+                try:
+                    # A consistent snapshot even while the primary is being written to.
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f"Copied {primary['NAME']} to {alias} ({database['NAME']})."))
+        finally:
+            source.close()
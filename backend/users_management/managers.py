@@ -1,9 +1,31 @@
 
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import BaseUserManager
+from django.db import transaction
+from django.db.models import QuerySet, Value
+from django.db.models.functions import Lower
+from django.utils import timezone
 
+from users_management.caching import user_cache
+from users_management.hashing import ahash_password, hash_password
 
-class CustomUserManager(BaseUserManager):
+
+class UserQuerySet(QuerySet):
+    def update(self, **kwargs):
+        """
+        Stamp ``updated_at`` and invalidate the cached users, which ``save()``
+        and its signals do for single users but an update bypasses.
+        """
+        kwargs.setdefault('updated_at', timezone.now())
+        with transaction.atomic(using=self.db, savepoint=False):
+            user_ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            user_cache.bump_version(*user_ids)
+        return rows
+
+    update.alters_data = True
+
+
+class CustomUserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """
     Custom manager for User model where email is the unique identifier
     for authentication instead of usernames.
@@ -13,10 +35,19 @@ class CustomUserManager(BaseUserManager):
             raise ValueError('The given email must be set')
         email = self.normalize_email(email).lower()
         user = self.model(email=email, **extra_fields)
-        user.password = make_password(password)
+        user.password = hash_password(password)
         user.save(using=self._db)
         return user
 
+    async def _acreate_user(self, email, password, **extra_fields):
+        if not email:
+            raise ValueError('The given email must be set')
+        email = self.normalize_email(email).lower()
+        user = self.model(email=email, **extra_fields)
+        user.password = await ahash_password(password)
+        await user.asave(using=self._db)
+        return user
+
     def create_user(self, email, password=None, **extra_fields):
         """
         Create and return a regular user.
@@ -25,6 +56,14 @@ class CustomUserManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', False)
         return self._create_user(email, password, **extra_fields)
 
+    async def acreate_user(self, email, password=None, **extra_fields):
+        """
+        Async variant of ``create_user``; the password is hashed off the event loop.
+        """
+        extra_fields.setdefault('is_staff', False)
+        extra_fields.setdefault('is_superuser', False)
+        return await self._acreate_user(email, password, **extra_fields)
+
     def create_superuser(self, email=None, password=None, **extra_fields):
         """
         Create and return a superuser with elevated privileges.
@@ -42,5 +81,10 @@ class CustomUserManager(BaseUserManager):
     def get_by_natural_key(self, username):
         """
         Case-insensitive email lookup.
+
+        Compares ``LOWER(email)`` with ``LOWER(username)`` so the query matches
+        the ``Lower("email")`` unique index instead of scanning the table.
         """
-        return self.get(**{self.model.USERNAME_FIELD + '__iexact': username})
+        return self.alias(username_lower=Lower(self.model.USERNAME_FIELD)).get(
+            username_lower=Lower(Value(username))
+        )
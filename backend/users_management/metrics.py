@@ -0,0 +1,306 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import suppress
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Upper bounds of the histogram buckets, +Inf is implied.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Layout of the per-(view, method, status) values list.
+_COUNT, _LATENCY_SUM, _QUERY_SUM = 0, 1, 2
+_LATENCY_OFFSET = 3
+_QUERY_OFFSET = _LATENCY_OFFSET + len(LATENCY_BUCKETS) + 1
+_VALUES_SIZE = _QUERY_OFFSET + len(QUERY_BUCKETS) + 1
+
+# Number of queries run so far by the current request, None outside a request.
+_request_queries = ContextVar('metrics_request_queries', default=None)
+
+
+class _Shard:
+    """
+    The metrics recorded by one thread; only that thread writes to it.
+    """
+    __slots__ = ('requests', 'counters')
+
+    def __init__(self):
+        self.requests = {}
+        self.counters = defaultdict(int)
+
+
+class MetricsRegistry:
+    """
+    Per-process request histograms and counters, aggregated across worker
+    processes through the files in ``directory``.
+
+    Every thread records into its own shard, so the hot path takes no lock: a
+    request costs a dict lookup, a few additions and two bisections. Shards
+    are only merged when a snapshot is taken. With a ``directory``, a
+    background thread writes the process snapshot to ``<directory>/<pid>.json``
+    every ``flush_interval`` seconds and ``collect()`` sums the files of all
+    live processes. Files of workers that exited are removed, so a restarted
+    worker's counts restart from zero, which Prometheus reads as a counter
+    reset; ``clear()`` removes all of them when the server starts.
+    """
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+        # A forked worker starts from zero and writes its own file.
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._local = threading.local()
+        self._shards = []
+        self._writer = None
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        with self._lock:
+            shard = self._local.shard = _Shard()
+            self._shards.append(shard)
+            if self.directory and self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name='metrics-writer', daemon=True)
+                self._writer.start()
+        return shard
+
+    def observe_request(self, view, method, status, duration, queries):
+        requests = self._shard().requests
+        key = (view, method, status)
+        values = requests.get(key)
+        if values is None:
+            values = requests[key] = [0] * _VALUES_SIZE
+        values[_COUNT] += 1
+        values[_LATENCY_SUM] += duration
+        values[_QUERY_SUM] += queries
+        values[_LATENCY_OFFSET + bisect_left(LATENCY_BUCKETS, duration)] += 1
+        values[_QUERY_OFFSET + bisect_left(QUERY_BUCKETS, queries)] += 1
+
+    def increment(self, name, value=1, **labels):
+        self._shard().counters[name, tuple(sorted(labels.items()))] += value
+
+    def snapshot(self):
+        """
+        Return this process' metrics as a JSON-serializable dict.
+        """
+        requests = {}
+        counters = defaultdict(int)
+        for shard in list(self._shards):
+            for key, values in list(shard.requests.items()):
+                merged = requests.setdefault(key, [0] * _VALUES_SIZE)
+                for index, value in enumerate(values):
+                    merged[index] += value
+            for key, value in list(shard.counters.items()):
+                counters[key] += value
+        return {
+            'requests': [[*key, values] for key, values in requests.items()],
+            'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        }
+
+    def write(self):
+        """
+        Atomically replace this process' snapshot file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path, os.path.join(self.directory, f'{os.getpid()}.json'))
+
+    def _run_writer(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.write()
+
+    def collect(self):
+        """
+        Return the snapshots of every live process, this one up to date.
+        """
+        snapshots = [self.snapshot()]
+        if self.directory and os.path.isdir(self.directory):
+            own_pid = os.getpid()
+            for name in os.listdir(self.directory):
+                pid, _, extension = name.partition('.')
+                if extension != 'json' or not pid.isdigit() or int(pid) == own_pid:
+                    continue
+                path = os.path.join(self.directory, name)
+                if not _is_running(int(pid)):
+                    with suppress(OSError):
+                        os.remove(path)
+                    continue
+                try:
+                    with open(path) as file:
+                        snapshots.append(json.load(file))
+                except (OSError, ValueError):
+                    continue
+        return snapshots
+
+    def clear(self):
+        """
+        Remove the snapshot files of all processes, those of a previous run of
+        the server included, whose pids may have been reused since.
+        """
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json') or name.startswith('.tmp-'):
+                with suppress(OSError):
+                    os.remove(os.path.join(self.directory, name))
+
+    def render(self):
+        """
+        Render the metrics of all processes in the Prometheus text format.
+        """
+        requests = {}
+        counters = defaultdict(int)
+        for snapshot in self.collect():
+            for view, method, status, values in snapshot['requests']:
+                merged = requests.setdefault((view, method, status), [0] * _VALUES_SIZE)
+                for index, value in enumerate(values):
+                    merged[index] += value
+            for name, labels, value in snapshot['counters']:
+                counters[name, tuple(sorted(labels.items()))] += value
+
+        lines = [
+            '# HELP http_requests_total Requests by view, method and status code.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (view, method, status), values in sorted(requests.items()):
+            lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {values[_COUNT]}')
+
+        by_view = {}
+        for (view, method, _), values in requests.items():
+            merged = by_view.setdefault((view, method), [0] * _VALUES_SIZE)
+            for index, value in enumerate(values):
+                merged[index] += value
+        histograms = [
+            ('http_request_duration_seconds', 'Request latency by view and method.',
+             LATENCY_BUCKETS, _LATENCY_OFFSET, _LATENCY_SUM),
+            ('http_request_db_queries', 'Database queries per request by view and method.',
+             QUERY_BUCKETS, _QUERY_OFFSET, _QUERY_SUM),
+        ]
+        for name, help_text, buckets, offset, sum_index in histograms:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (view, method), values in sorted(by_view.items()):
+                cumulative = 0
+                for index, bound in enumerate((*buckets, '+Inf')):
+                    cumulative += values[offset + index]
+                    lines.append(f'{name}_bucket{_labels(view=view, method=method, le=bound)} {cumulative}')
+                lines.append(f'{name}_sum{_labels(view=view, method=method)} {values[sum_index]}')
+                lines.append(f'{name}_count{_labels(view=view, method=method)} {values[_COUNT]}')
+
+        for name in sorted({name for name, _ in counters}):
+            lines += [f'# TYPE {name} counter']
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f'{name}{_labels(**dict(labels))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user.
+        return True
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+registry = MetricsRegistry(directory=settings.METRICS_DIR, flush_interval=settings.METRICS_FLUSH_INTERVAL)
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    Database ``execute_wrapper`` counting the queries of the current request.
+    """
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver adding ``count_query`` to new connections.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def _view_name(request):
+    resolver_match = getattr(request, 'resolver_match', None)
+    return resolver_match.view_name if resolver_match is not None else 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, status and number of database queries of every request in ``registry``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries = [0]
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        registry.observe_request(
+            _view_name(request), request.method, response.status_code, time.perf_counter() - started, queries[0]
+        )
+        return response
+
+    async def __acall__(self, request):
+        queries = [0]
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        registry.observe_request(
+            _view_name(request), request.method, response.status_code, time.perf_counter() - started, queries[0]
+        )
+        return response
+
+
+def metrics_view(request):
+    """
+    Expose the metrics of all worker processes to Prometheus, from ``METRICS_ALLOWED_IPS`` only.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
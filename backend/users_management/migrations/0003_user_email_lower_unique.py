@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:34
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import Lower
+
+
+def deduplicate_and_lowercase_emails(apps, schema_editor):
+    """
+    Make emails unique case-insensitively, then store them lowercased.
+
+    Of several accounts whose emails only differ by case, the most recently
+    logged in one keeps the address; the others are deactivated and get a
+    ``+duplicate-<id>`` tag in the local part so they stay recoverable.
+    """
+    User = apps.get_model('users_management', 'User')
+    duplicates = (
+        User.objects.annotate(email_lower=Lower('email')).values('email_lower')
+        .annotate(count=Count('id')).filter(count__gt=1).values_list('email_lower', flat=True)
+    )
+    for email in duplicates:
+        accounts = User.objects.annotate(email_lower=Lower('email')).filter(email_lower=email).order_by(
+            F('last_login').desc(nulls_last=True), 'id'
+        )
+        for account in accounts[1:]:
+            local_part, _, domain = account.email.rpartition('@')
+            account.email = f"{local_part}+duplicate-{account.pk}@{domain}".lower()
+            account.is_active = False
+            account.save(update_fields=['email', 'is_active'])
+
+    User.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users_management', '0002_referral_tree'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_and_lowercase_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='unique_user_email_lower', violation_error_message='User with this email already exists.'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:42
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of users_management.search as of this migration: later changes to
+# the index must come with their own migration.
+SEARCH_FIELDS = ('email', 'first_name', 'last_name', 'user_type')
+INDEX_BATCH_SIZE = 1000
+
+
+def field_trigrams(values):
+    """
+    Return the lowercased trigrams of every non-empty value in ``values``,
+    padded with two leading blanks and a trailing one.
+    """
+    padded = [f'  {value.lower()} ' for value in values if value]
+    return {value[i:i + 3] for value in padded for i in range(len(value) - 2)}
+
+
+def build_search_index(apps, schema_editor):
+    User = apps.get_model('users_management', 'User')
+    UserSearchTrigram = apps.get_model('users_management', 'UserSearchTrigram')
+    rows = (
+        UserSearchTrigram(user_id=user_id, trigram=trigram)
+        for user_id, *values in User.objects.values_list('id', *SEARCH_FIELDS).iterator(chunk_size=INDEX_BATCH_SIZE)
+        for trigram in field_trigrams(values)
+    )
+    while batch := list(islice(rows, INDEX_BATCH_SIZE)):
+        UserSearchTrigram.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_management', '0003_user_email_lower_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('trigram', 'user'), name='unique_user_search_trigram')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users_management', '0004_user_search_trigram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_institute', 'email'], name='user_institute_email_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_management', '0006_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(blank=True, max_length=32, null=True, unique=True)),
+                ('user_id', models.BigIntegerField()),
+                ('issued_before', models.FloatField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'issued_before'], name='token_revocation_user_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
 from django.db import models
-from phonenumber_field.modelfields import PhoneNumberField
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 from users_management.constants import (INSTITUTE_USER_TYPE, STUDENT_USER_TYPE,
                                         USER_TYPES)
+from users_management.fields import PhoneNumberField
 from users_management.managers import CustomUserManager
 from users_management.tokens import generate_referral_code
 
@@ -21,16 +24,57 @@ class User(AbstractUser):
     recommended_by = models.ForeignKey(
         'self', on_delete=models.SET_NULL, blank=True, null=True, related_name="referrals"
     )
+    # Stamped by save() and by UserQuerySet.update(): the validator of
+    # conditional retrieves.
+    updated_at = models.DateTimeField(auto_now=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
     objects = CustomUserManager()
 
+    # Fields whose value as loaded from the database is kept on the instance,
+    # so signal handlers can tell what a save actually changed.
+    tracked_fields = (
+        'referral_code', 'is_institute', 'recommended_by_id',
+        'email', 'password', 'is_active', 'is_staff', 'is_superuser',
+        'first_name', 'last_name', 'user_type',
+    )
+
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        constraints = [
+            # Backs the case-insensitive login lookup in CustomUserManager.get_by_natural_key.
+            models.UniqueConstraint(
+                Lower('email'), name='unique_user_email_lower',
+                violation_error_message="User with this email already exists.",
+            ),
+        ]
+        indexes = [
+            # Institutes by email: the recommended_by autocomplete and institute listings.
+            models.Index(fields=['is_institute', 'email'], name='user_institute_email_idx'),
+        ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in cls.tracked_fields
+        }
+        return instance
+
+    def clean(self):
+        """
+        Reject a ``recommended_by`` that would make the referral tree cyclic.
+        """
+        super().clean()
+        if self.pk and self.recommended_by_id and (
+            self.recommended_by_id == self.pk
+            or ReferralPath.objects.filter(ancestor_id=self.pk, descendant_id=self.recommended_by_id).exists()
+        ):
+            raise ValidationError({'recommended_by': "A user cannot be recommended by themselves or their own referrals."})
+
     def save(self, *args, **kwargs):
         """
         Override save method to generate referral code for institutes.
@@ -38,7 +82,181 @@ class User(AbstractUser):
         if self.is_institute and not self.referral_code:
             self.referral_code = generate_referral_code()
             self.user_type = INSTITUTE_USER_TYPE
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
         super().save(*args, **kwargs)
+        self._loaded_values = {name: getattr(self, name) for name in self.tracked_fields}
+
+    def loaded_value(self, name, default=None):
+        """
+        Return the value ``name`` had when this instance was loaded or last saved.
+        """
+        return getattr(self, '_loaded_values', {}).get(name, default)
+
+    def has_changed(self, name):
+        """
+        Whether a tracked field differs from its loaded value; always true for new instances.
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        return loaded_values is None or loaded_values.get(name) != getattr(self, name)
 
     def __str__(self):
         return self.email
+
+
+class ReferralPath(models.Model):
+    """
+    Closure table of the ``recommended_by`` tree: one row per (ancestor, descendant)
+    pair at ``depth`` >= 1, so subtree counts are a single indexed query.
+    """
+    ancestor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='descendant_paths')
+    descendant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ancestor_paths')
+    depth = models.PositiveIntegerField()
+    # Copy of descendant.date_joined for time-bounded counts without a join.
+    joined_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['descendant', 'ancestor'], name='unique_referral_path'),
+        ]
+        indexes = [
+            models.Index(fields=['ancestor', 'depth', 'joined_at'], name='referral_path_ancestor_idx'),
+        ]
+
+
+class ReferralStats(models.Model):
+    """
+    Denormalized referral counters of a referrer: direct referrals and the whole subtree.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='referral_stats')
+    direct_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Referral stats'
+        indexes = [
+            models.Index(fields=['-total_count'], name='referral_stats_total_idx'),
+        ]
+
+
+class UserSearchTrigram(models.Model):
+    """
+    Trigram index of the searchable user fields (see ``users_management.search``):
+    one row per distinct trigram of a user's lowercased, padded field values.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'user'], name='unique_user_search_trigram'),
+        ]
+
+
+class ImportJob(models.Model):
+    """
+    A CSV user import run in the background by ``manage.py run_workers`` (see ``users_management.jobs``).
+
+    The file is first validated as a whole, then imported one chunk per
+    transaction. ``lines_done`` is the checkpoint: the number of data lines
+    committed so far, from which an interrupted import resumes.
+    """
+    PENDING = 'pending'
+    VALIDATING = 'validating'
+    IMPORTING = 'importing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (VALIDATING, 'Validating'),
+        (IMPORTING, 'Importing'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=15, choices=STATUSES, default=PENDING)
+    file_name = models.CharField(max_length=255)
+    # The uploaded CSV, header row included.
+    data = models.TextField()
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    total_rows = models.PositiveIntegerField(default=0)
+    rows_validated = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    lines_done = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    # Worker running the job and when it last reported being alive.
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    phase_started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'heartbeat'], name='import_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.get_status_display()})"
+
+    @property
+    def is_running(self):
+        return self.status in (self.PENDING, self.VALIDATING, self.IMPORTING)
+
+    @property
+    def phase_progress(self):
+        """
+        ``(rows done, rows in total)`` of the current phase.
+        """
+        if self.status == self.VALIDATING:
+            return self.rows_validated, self.total_rows
+        if self.status == self.IMPORTING:
+            # Rows rejected while importing (validation passed) are done too.
+            return self.rows_imported + self.error_count, self.total_rows
+        return (self.total_rows if self.status == self.DONE else 0), self.total_rows
+
+    @property
+    def eta(self):
+        """
+        Estimated time left in the current phase, from its rate so far.
+        """
+        done, total = self.phase_progress
+        if self.status not in (self.VALIDATING, self.IMPORTING) or not done or not self.phase_started_at:
+            return None
+        elapsed = timezone.now() - self.phase_started_at
+        return elapsed / done * (total - done)
+
+
+class ImportJobError(models.Model):
+    """
+    A row rejected by an ``ImportJob``.
+    """
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='errors')
+    line = models.PositiveIntegerField()
+    email = models.CharField(max_length=255)
+    message = models.TextField()
+
+    class Meta:
+        ordering = ['line']
+
+
+class TokenRevocation(models.Model):
+    """
+    A revoked signed token (see ``users_management.authentication``): the
+    token ``jti``, or with no ``jti`` every token of ``user_id`` issued before
+    ``issued_before``. Kept in the database so every worker sees it (each
+    holds the unexpired rows in memory), until ``expires_at``, when the tokens
+    it revokes have expired anyway.
+    """
+    # Unique: of two requests revoking the same refresh token only one succeeds.
+    jti = models.CharField(max_length=32, unique=True, null=True, blank=True)
+    # Not a foreign key, the tokens of a deleted user stay revoked.
+    user_id = models.BigIntegerField()
+    issued_before = models.FloatField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'issued_before'], name='token_revocation_user_idx'),
+        ]
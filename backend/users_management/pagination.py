@@ -0,0 +1,111 @@
+import hashlib
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+def planner_row_estimate(model, using='default'):
+    """
+    Return the row count of ``model``'s table according to the planner
+    statistics, or ``None`` if the database has none.
+
+    PostgreSQL keeps ``pg_class.reltuples`` up to date through autovacuum;
+    SQLite only has ``sqlite_stat1`` once ``ANALYZE`` has been run.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    # On PostgreSQL a failed query aborts the enclosing transaction, so it runs in a
+    # savepoint there. Elsewhere it runs in autocommit: an atomic block would make
+    # SQLite (transaction_mode IMMEDIATE) take the write lock just to read statistics.
+    if connection.vendor == 'postgresql' and connection.in_atomic_block:
+        savepoint = transaction.atomic(using=using)
+    else:
+        savepoint = nullcontext()
+    try:
+        with savepoint, connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+                row = cursor.fetchone()
+                # reltuples is -1 for a table that was never vacuumed or analyzed.
+                return row[0] if row and row[0] >= 0 else None
+            if connection.vendor == 'sqlite':
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+                counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+                return max(counts) if counts else None
+    except DatabaseError:
+        return None
+    return None
+
+
+def estimated_count(queryset, timeout=None):
+    """
+    Return an approximate number of rows in ``queryset`` without a ``COUNT(*)``
+    on every call.
+
+    Unfiltered querysets use the planner statistics when available. Anything
+    else is counted once and the result cached for ``timeout`` seconds.
+    """
+    if not queryset.query.where:
+        estimate = planner_row_estimate(queryset.model, queryset.db)
+        if estimate is not None:
+            return estimate
+
+    key = 'estimated-count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+    if timeout is None:
+        timeout = settings.USERS_COUNT_CACHE_TIMEOUT
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Django paginator whose ``count`` comes from ``estimated_count`` instead of ``COUNT(*)``.
+    """
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key, newest users first.
+
+    Pages are fetched with ``WHERE id < <cursor>`` on the primary key index, so
+    every page costs the same however deep it is, and rows inserted meanwhile
+    never shift or repeat results. Cursors are opaque. The total is left out
+    unless ``?count=true`` is passed, and is then an estimate (see
+    ``estimated_count``).
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = estimated_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties'] = {
+            'count': {
+                'type': 'integer',
+                'description': f"Estimated total, only with ?{self.count_query_param}=true.",
+                'example': 123,
+            },
+            **response_schema['properties'],
+        }
+        return response_schema
@@ -0,0 +1,79 @@
+import threading
+
+from django.contrib.auth.password_validation import \
+    get_default_password_validators
+from django.core.exceptions import ValidationError
+
+
+class PasswordValidationEngine:
+    """
+    Run the configured ``AUTH_PASSWORD_VALIDATORS`` against one or many passwords.
+
+    The validators are instantiated once and shared, so the common password
+    list is read from disk once per process and kept as an in-memory set.
+    ``validate`` raises exactly what ``validate_password`` raises.
+    ``validate_many`` checks a batch and returns one result per password
+    instead of raising; when no user is involved each distinct password is
+    only checked once.
+    """
+    def __init__(self, validators=None):
+        self.validators = list(get_default_password_validators() if validators is None else validators)
+
+    def errors(self, password, user=None):
+        """
+        Return the list of ``ValidationError`` raised by the validators for ``password``.
+        """
+        errors = []
+        for validator in self.validators:
+            try:
+                validator.validate(password, user)
+            except ValidationError as error:
+                errors.append(error)
+        return errors
+
+    def validate(self, password, user=None):
+        errors = self.errors(password, user)
+        if errors:
+            raise ValidationError(errors)
+
+    def validate_many(self, passwords, users=None):
+        """
+        Return a list with ``None`` for every valid password and a
+        ``ValidationError`` (as ``validate`` would raise it) for every invalid one.
+        """
+        if users is not None:
+            return [self._result(self.errors(password, user)) for password, user in zip(passwords, users)]
+
+        results = {}
+        for password in passwords:
+            if password not in results:
+                results[password] = self._result(self.errors(password))
+        return [results[password] for password in passwords]
+
+    @staticmethod
+    def _result(errors):
+        return ValidationError(errors) if errors else None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Return the process-wide engine built from ``AUTH_PASSWORD_VALIDATORS``.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PasswordValidationEngine()
+    return _engine
+
+
+def validate_password(password, user=None):
+    get_engine().validate(password, user)
+
+
+def validate_passwords(passwords, users=None):
+    return get_engine().validate_many(passwords, users)
@@ -0,0 +1,9 @@
+from rest_framework import permissions
+
+
+class IsInstitute(permissions.IsAuthenticated):
+    """
+    Allow access to authenticated institute accounts only.
+    """
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and request.user.is_institute
@@ -0,0 +1,297 @@
+import atexit
+import fnmatch
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# The sample being recorded for the current request, None when it is not sampled.
+_current_sample = ContextVar('profiling_sample', default=None)
+
+
+class Sample:
+    """
+    What is recorded for one sampled request before it is written to Silk's tables.
+    """
+    __slots__ = ('path', 'method', 'query_string', 'view_name', 'start_time', 'duration', 'status_code',
+                 'content_type', 'queries', 'profiles')
+
+    def __init__(self, request):
+        self.path = request.path
+        self.method = request.method
+        self.query_string = request.META.get('QUERY_STRING', '')
+        self.view_name = ''
+        self.start_time = timezone.now()
+        self.duration = None
+        self.status_code = None
+        self.content_type = ''
+        # (sql, start_time, duration in seconds)
+        self.queries = []
+        # (name, func_name, file_path, line_num, start_time, duration, exception_raised, query range)
+        self.profiles = []
+
+
+def capture_query(execute, sql, params, many, context):
+    """
+    Database ``execute_wrapper`` recording the queries of sampled requests.
+
+    Installed on every connection (see ``install_query_capture``); outside a
+    sampled request it costs one context variable lookup per query.
+    """
+    sample = _current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start_time = timezone.now()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        connection = context['connection']
+        try:
+            sql = connection.ops.last_executed_query(context['cursor'].cursor, sql, params)
+        except Exception:
+            pass
+        sample.queries.append((sql, start_time, duration))
+
+
+def install_query_capture(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver adding ``capture_query`` to new connections.
+    """
+    if capture_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capture_query)
+
+
+def profile(name=None):
+    """
+    Record calls of the decorated function as a Silk profile of the sampled request.
+
+    Calls made while the request is not sampled go straight to the function.
+    """
+    def decorator(func):
+        code = func.__code__
+        profile_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            sample = _current_sample.get()
+            if sample is None:
+                return func(*args, **kwargs)
+            start_time = timezone.now()
+            started = time.perf_counter()
+            first_query = len(sample.queries)
+            exception_raised = False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                exception_raised = True
+                raise
+            finally:
+                sample.profiles.append((
+                    profile_name, func.__name__, code.co_filename, code.co_firstlineno, start_time,
+                    time.perf_counter() - started, exception_raised, range(first_query, len(sample.queries)),
+                ))
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Profile a random ``rate`` of the requests whose path matches ``allowlist``.
+
+    Sampled requests are kept in a ring buffer of ``buffer_size`` samples (the
+    oldest are dropped if the database cannot keep up) and written to Silk's
+    tables by a background thread, in one transaction per ``flush_batch``
+    samples or every ``flush_interval`` seconds. The request itself never
+    waits for the database write. Requests that are not sampled cost a call
+    to ``random()``.
+    """
+    def __init__(self, rate=0.0, allowlist=(), buffer_size=1000, flush_interval=5.0, flush_batch=100):
+        self.rate = rate
+        self.patterns = [re.compile(fnmatch.translate(pattern)) for pattern in allowlist]
+        self.buffer = deque(maxlen=buffer_size)
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.dropped = 0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._flusher_pid = None
+
+    def should_sample(self, path):
+        if self.rate <= 0 or random.random() >= self.rate:
+            return False
+        return not self.patterns or any(pattern.match(path) for pattern in self.patterns)
+
+    def start(self, request):
+        """
+        Return a new ``Sample`` for ``request``, or ``None`` if it is not sampled.
+        """
+        return Sample(request) if self.should_sample(request.path) else None
+
+    def finish(self, sample, request, response):
+        sample.duration = (timezone.now() - sample.start_time).total_seconds()
+        sample.status_code = response.status_code
+        sample.content_type = response.get('Content-Type', '')
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is not None:
+            sample.view_name = resolver_match.view_name
+        self.record(sample)
+
+    def record(self, sample):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(sample)
+        self._ensure_flusher()
+        if len(self.buffer) >= self.flush_batch:
+            self._wake.set()
+
+    def _ensure_flusher(self):
+        # One flusher per process, also in workers forked after it was started.
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                self._flusher = threading.Thread(target=self._run_flusher, name='profiling-flush', daemon=True)
+                self._flusher.start()
+                self._flusher_pid = os.getpid()
+                atexit.register(self.flush)
+
+    def _run_flusher(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Writing profiling samples failed.")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Write every buffered sample to Silk's tables, ``flush_batch`` per transaction.
+        """
+        while self.buffer:
+            batch = []
+            while self.buffer and len(batch) < self.flush_batch:
+                batch.append(self.buffer.popleft())
+            self.write(batch)
+        if self.dropped:
+            logger.warning(f"Profiling buffer full, dropped {self.dropped} samples.")
+            self.dropped = 0
+
+    @transaction.atomic
+    def write(self, samples):
+        from silk.models import Profile, Request, Response, SQLQuery
+
+        requests, responses, queries, profiles = [], [], [], []
+        profile_queries = []
+        for sample in samples:
+            request = Request(
+                id=str(uuid4()), path=sample.path[:190], method=sample.method, query_params=sample.query_string,
+                view_name=sample.view_name[:190], start_time=sample.start_time,
+                end_time=sample.start_time + timedelta(seconds=sample.duration),
+                time_taken=sample.duration * 1000, num_sql_queries=len(sample.queries),
+                meta_num_queries=len(sample.queries),
+                meta_time_spent_queries=sum(duration for _, _, duration in sample.queries) * 1000,
+            )
+            requests.append(request)
+            responses.append(Response(
+                id=str(uuid4()), request=request, status_code=sample.status_code,
+                encoded_headers=json.dumps({'content-type': sample.content_type}),
+            ))
+            sample_queries = [
+                SQLQuery(
+                    request=request, query=sql, start_time=start_time,
+                    end_time=start_time + timedelta(seconds=duration), time_taken=duration * 1000,
+                    identifier=index, traceback='',
+                )
+                for index, (sql, start_time, duration) in enumerate(sample.queries)
+            ]
+            queries.extend(sample_queries)
+            for name, func_name, file_path, line_num, start_time, duration, exception_raised, query_range \
+                    in sample.profiles:
+                profile = Profile(
+                    request=request, name=name, func_name=func_name, file_path=file_path, line_num=line_num,
+                    start_time=start_time, end_time=start_time + timedelta(seconds=duration),
+                    time_taken=duration * 1000, exception_raised=exception_raised,
+                )
+                profiles.append(profile)
+                profile_queries.extend((profile, sample_queries[index]) for index in query_range)
+
+        Request.objects.bulk_create(requests)
+        Response.objects.bulk_create(responses)
+        # The default manager's bulk_create() updates the request once per query.
+        SQLQuery._base_manager.bulk_create(queries)
+        Profile.objects.bulk_create(profiles)
+        Profile.queries.through.objects.bulk_create(
+            Profile.queries.through(profile_id=profile.pk, sqlquery_id=query.pk) for profile, query in profile_queries
+        )
+
+
+class SamplingProfilerMiddleware:
+    """
+    Profile a sample of the requests into Silk's tables (see ``SamplingProfiler``).
+
+    Configured with ``PROFILING_SAMPLE_RATE`` (0 disables profiling),
+    ``PROFILING_ALLOWLIST`` (path patterns, all paths when empty),
+    ``PROFILING_BUFFER_SIZE``, ``PROFILING_FLUSH_INTERVAL`` and ``PROFILING_FLUSH_BATCH``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.profiler = SamplingProfiler(
+            rate=settings.PROFILING_SAMPLE_RATE,
+            allowlist=settings.PROFILING_ALLOWLIST,
+            buffer_size=settings.PROFILING_BUFFER_SIZE,
+            flush_interval=settings.PROFILING_FLUSH_INTERVAL,
+            flush_batch=settings.PROFILING_FLUSH_BATCH,
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sample = self.profiler.start(request)
+        if sample is None:
+            return self.get_response(request)
+        token = _current_sample.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        self.profiler.finish(sample, request, response)
+        return response
+
+    async def __acall__(self, request):
+        sample = self.profiler.start(request)
+        if sample is None:
+            return await self.get_response(request)
+        token = _current_sample.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        self.profiler.finish(sample, request, response)
+        return response
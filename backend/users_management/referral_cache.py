@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from users_management.caching import MISSING, LocalTTLCache
+
+
+class ReferralCodeCache:
+    """
+    Resolve institute referral codes to institute ids without a query per lookup.
+
+    Lookups go through a per-process LRU, then (when ``alias`` names a Django
+    cache) the shared cache, and only then the database. Unknown codes are
+    cached too, in a separate and smaller LRU with a short timeout, so a
+    client guessing codes neither reaches the database on every attempt nor
+    evicts the valid codes. Saving or deleting an institute invalidates its
+    code in this process and in the shared cache, and bumps a version key
+    there: other processes drop their local entries at their next lookup.
+    Without a shared cache they pick the change up once their local entry
+    times out. A cache hit costs no query.
+    """
+    key_prefix = 'referral-code:'
+    version_key = 'referral-codes-version'
+
+    def __init__(self, alias=None, maxsize=1024, timeout=300, negative_maxsize=256, negative_timeout=30):
+        self.alias = alias
+        self.timeout = timeout
+        self.negative_timeout = negative_timeout
+        self.local = LocalTTLCache(maxsize, timeout)
+        self.negative = LocalTTLCache(negative_maxsize, negative_timeout)
+        # The shared version the local entries were cached under.
+        self.version = None
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def resolve(self, code):
+        """
+        Return the id of the institute owning ``code``, or ``None`` if there is none.
+        """
+        return self.resolve_many([code]).get(code)
+
+    def resolve_many(self, codes):
+        """
+        Map each valid code in ``codes`` to its institute id, with at most two
+        queries whatever the number of codes.
+        """
+        self._check_version()
+        resolved = {}
+        missing = set()
+        for code in set(codes):
+            institute_id = self.local.get(code)
+            if institute_id is not MISSING:
+                resolved[code] = institute_id
+            elif self.negative.get(code) is MISSING:
+                missing.add(code)
+
+        if missing and self.shared is not None:
+            found = self.shared.get_many([self.key_prefix + code for code in missing])
+            for key, institute_id in found.items():
+                code = key[len(self.key_prefix):]
+                missing.discard(code)
+                self._remember(code, institute_id)
+                if institute_id is not None:
+                    resolved[code] = institute_id
+
+        if missing:
+            from users_management.models import User
+
+            # Codes rarely change, a read replica can answer.
+            queryset = User.objects.db_manager(hints={'replica_ok': True}).filter(is_institute=True)
+            found = dict(queryset.filter(referral_code__in=missing).values_list('referral_code', 'id'))
+            if len(found) < len(missing) and queryset.db != DEFAULT_DB_ALIAS:
+                # An institute created moments ago may not have reached the replica yet.
+                found.update(
+                    queryset.using(DEFAULT_DB_ALIAS).filter(referral_code__in=missing - found.keys())
+                    .values_list('referral_code', 'id')
+                )
+            for code in missing:
+                institute_id = found.get(code)
+                self._remember(code, institute_id)
+                if self.shared is not None:
+                    timeout = self.timeout if institute_id is not None else self.negative_timeout
+                    self.shared.set(self.key_prefix + code, institute_id, timeout)
+            resolved.update(found)
+
+        return resolved
+
+    def _check_version(self):
+        """
+        Drop the local entries if another process invalidated codes since they were cached.
+        """
+        if self.shared is None:
+            return
+        version = self.shared.get(self.version_key, 0)
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def _remember(self, code, institute_id):
+        if institute_id is None:
+            self.negative.set(code, None)
+        else:
+            self.local.set(code, institute_id)
+
+    def invalidate(self, *codes):
+        codes = [code for code in codes if code]
+        for code in codes:
+            self.local.delete(code)
+            self.negative.delete(code)
+        if codes and self.shared is not None:
+            self.shared.delete_many([self.key_prefix + code for code in codes])
+            try:
+                self.shared.incr(self.version_key)
+            except ValueError:
+                self.shared.set(self.version_key, 1, None)
+
+    def clear(self):
+        self.local.clear()
+        self.negative.clear()
+
+
+referral_code_cache = ReferralCodeCache(
+    alias=settings.REFERRAL_CACHE_ALIAS,
+    maxsize=settings.REFERRAL_CACHE_SIZE,
+    timeout=settings.REFERRAL_CACHE_TIMEOUT,
+    negative_timeout=settings.REFERRAL_CACHE_NEGATIVE_TIMEOUT,
+)
+
+
+def resolve_referral_code(code):
+    return referral_code_cache.resolve(code)
+
+
+def resolve_referral_codes(codes):
+    return referral_code_cache.resolve_many(codes)
@@ -0,0 +1,144 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from users_management.models import ReferralPath, ReferralStats
+
+PATH_BATCH_SIZE = 1000
+
+
+def _ancestors(user_ids):
+    """
+    Map each of ``user_ids`` to its ``(ancestor_id, depth)`` pairs.
+    """
+    ancestors = defaultdict(list)
+    paths = ReferralPath.objects.filter(descendant_id__in=user_ids).values_list('descendant_id', 'ancestor_id', 'depth')
+    for descendant_id, ancestor_id, depth in paths:
+        ancestors[descendant_id].append((ancestor_id, depth))
+    return ancestors
+
+
+def _adjust_counters(direct, total):
+    """
+    Apply ``{user_id: delta}`` changes to the referral counters.
+
+    Users sharing the same delta are updated with a single query.
+    """
+    user_ids = {user_id for deltas in (direct, total) for user_id, delta in deltas.items() if delta}
+    if not user_ids:
+        return
+    ReferralStats.objects.bulk_create([ReferralStats(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    for field, deltas in (('direct_count', direct), ('total_count', total)):
+        users_by_delta = defaultdict(list)
+        for user_id, delta in deltas.items():
+            if delta:
+                users_by_delta[delta].append(user_id)
+        for delta, delta_user_ids in users_by_delta.items():
+            ReferralStats.objects.filter(user_id__in=delta_user_ids).update(**{field: F(field) + delta})
+
+
+@transaction.atomic
+def add_referrals(users):
+    """
+    Record newly created ``users`` in the referral tree.
+
+    Works for a single ``save()`` as well as a ``bulk_create`` batch (which
+    sends no signals), as long as the users have no referrals of their own yet.
+    """
+    users = [user for user in users if user.recommended_by_id]
+    if not users:
+        return
+    ancestors = _ancestors({user.recommended_by_id for user in users})
+
+    paths = []
+    direct, total = Counter(), Counter()
+    for user in users:
+        direct[user.recommended_by_id] += 1
+        for ancestor_id, depth in [(user.recommended_by_id, 0)] + ancestors[user.recommended_by_id]:
+            paths.append(ReferralPath(
+                ancestor_id=ancestor_id, descendant_id=user.pk, depth=depth + 1, joined_at=user.date_joined
+            ))
+            total[ancestor_id] += 1
+    ReferralPath.objects.bulk_create(paths, batch_size=PATH_BATCH_SIZE)
+    _adjust_counters(direct, total)
+
+
+@transaction.atomic
+def move_referral(user, old_parent_id, new_parent_id):
+    """
+    Re-attach ``user`` and its whole subtree from ``old_parent_id`` to ``new_parent_id``.
+
+    Either parent may be ``None``; moving to ``None`` detaches the subtree,
+    which is also what happens right before a user is deleted.
+    """
+    subtree = [(user.pk, 0, user.date_joined)] + list(
+        ReferralPath.objects.filter(ancestor_id=user.pk).values_list('descendant_id', 'depth', 'joined_at')
+    )
+    size = len(subtree)
+    direct, total = Counter(), Counter()
+
+    if old_parent_id:
+        old_ancestor_ids = [old_parent_id] + [ancestor_id for ancestor_id, _ in _ancestors([old_parent_id])[old_parent_id]]
+        ReferralPath.objects.filter(
+            ancestor_id__in=old_ancestor_ids, descendant_id__in=[pk for pk, _, _ in subtree]
+        ).delete()
+        direct[old_parent_id] -= 1
+        for ancestor_id in old_ancestor_ids:
+            total[ancestor_id] -= size
+
+    if new_parent_id:
+        new_ancestors = [(new_parent_id, 0)] + _ancestors([new_parent_id])[new_parent_id]
+        ReferralPath.objects.bulk_create([
+            ReferralPath(ancestor_id=ancestor_id, descendant_id=pk, depth=ancestor_depth + 1 + depth, joined_at=joined_at)
+            for ancestor_id, ancestor_depth in new_ancestors
+            for pk, depth, joined_at in subtree
+        ], batch_size=PATH_BATCH_SIZE)
+        direct[new_parent_id] += 1
+        for ancestor_id, _ in new_ancestors:
+            total[ancestor_id] += size
+
+    _adjust_counters(direct, total)
+
+
+def referral_stats(user, depth=None, since=None, top=10):
+    """
+    Referral counts of ``user`` plus its ``top`` referrers by subtree size.
+
+    All-time totals come straight from the counters; ``depth`` and ``since``
+    restrict the count to descendants at most ``depth`` levels down and/or who
+    joined on or after ``since``, answered by one indexed count on the closure
+    table. The number of queries does not depend on the size of the tree.
+    """
+    counters = ReferralStats.objects.filter(user=user).values('direct_count', 'total_count').first()
+    counters = counters or {'direct_count': 0, 'total_count': 0}
+
+    paths = ReferralPath.objects.filter(ancestor=user)
+    if depth is not None:
+        paths = paths.filter(depth__lte=depth)
+    if since is not None:
+        paths = paths.filter(joined_at__gte=since)
+    count = counters['total_count'] if depth is None and since is None else paths.count()
+
+    top_referrers = []
+    if top:
+        descendants = ReferralPath.objects.filter(ancestor=user)
+        if depth is not None:
+            descendants = descendants.filter(depth__lte=depth)
+        top_referrers = [
+            {'id': user_id, 'email': email, 'direct': direct, 'total': total}
+            for user_id, email, direct, total in ReferralStats.objects.filter(
+                user_id__in=descendants.values('descendant_id'), total_count__gt=0
+            ).order_by('-total_count', 'user_id').values_list(
+                'user_id', 'user__email', 'direct_count', 'total_count'
+            )[:top]
+        ]
+
+    return {
+        'direct': counters['direct_count'],
+        'total': counters['total_count'],
+        'depth': depth,
+        'since': since,
+        'count': count,
+        'top_referrers': top_referrers,
+    }
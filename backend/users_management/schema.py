@@ -0,0 +1,16 @@
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    """
+    Document ``SignedTokenAuthentication`` as a bearer token scheme.
+    """
+    target_class = 'users_management.authentication.SignedTokenAuthentication'
+    name = 'signedToken'
+
+    def get_security_definition(self, auto_schema):
+        return {
+            'type': 'http',
+            'scheme': 'bearer',
+            'description': "Access token from /api/token/, as `Authorization: Bearer <token>`.",
+        }
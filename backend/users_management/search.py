@@ -0,0 +1,132 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+from users_management.models import UserSearchTrigram
+
+SEARCH_FIELDS = ('email', 'first_name', 'last_name', 'user_type')
+INDEX_BATCH_SIZE = 1000
+# Trigrams are ranked by how many users have them, counted up to this many rows;
+# a term whose rarest trigram reaches it is not selective enough to use the index.
+RARITY_SAMPLE = 1000
+# Candidates are narrowed with a few selective trigrams, the rest is left to the recheck.
+MAX_TERM_TRIGRAMS = 3
+SELECTIVE = 100
+# Trigrams of a term counted at most, so a long term costs a bounded number of queries.
+MAX_COUNTED_TRIGRAMS = 8
+
+
+def trigrams(value, pad=True):
+    """
+    Return the set of trigrams of ``value``, lowercased.
+
+    Padded values get two leading blanks and a trailing one, so the start of a
+    value has trigrams of its own (``'  j'``, ``' jo'``) to match short prefixes.
+    """
+    value = value.lower()
+    if pad:
+        value = f'  {value} '
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def field_trigrams(values):
+    """
+    Return the trigrams of every non-empty value in ``values``.
+    """
+    return set().union(*(trigrams(value) for value in values if value))
+
+
+def _index_rows(users):
+    for user in users:
+        for trigram in field_trigrams(getattr(user, field) for field in SEARCH_FIELDS):
+            yield UserSearchTrigram(user_id=user.pk, trigram=trigram)
+
+
+@transaction.atomic
+def index_users(users):
+    """
+    (Re)build the search index of ``users``, which must be saved.
+
+    Called on ``post_save`` when a searchable field changed; ``bulk_create``
+    sends no signal, so bulk importers call it themselves.
+    """
+    users = list(users)
+    UserSearchTrigram.objects.filter(user_id__in=[user.pk for user in users]).delete()
+    UserSearchTrigram.objects.bulk_create(_index_rows(users), batch_size=INDEX_BATCH_SIZE)
+
+
+def _term_filter(term):
+    """
+    Return a ``Q`` matching users with ``term`` in one of ``SEARCH_FIELDS``.
+
+    Terms of three characters or more match anywhere in a field, shorter terms
+    match the start of a field. Candidates come from the trigram index and
+    are rechecked against the fields, since having all the trigrams of a term
+    does not mean containing it.
+    """
+    if len(term) >= 3:
+        term_trigrams = trigrams(term, pad=False)
+        recheck = reduce(or_, (Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS))
+    else:
+        term_trigrams = {f'  {term}'[-3:]}
+        recheck = reduce(or_, (Q(**{f'{field}__istartswith': term}) for field in SEARCH_FIELDS))
+
+    selective = _selective_trigrams(term_trigrams)
+    if selective is None:
+        # Most users match anyway, a scan finds the first page sooner than the index.
+        return recheck
+    candidates = Q()
+    for trigram in selective:
+        candidates &= Q(pk__in=UserSearchTrigram.objects.filter(trigram=trigram).values('user_id'))
+    return candidates & recheck
+
+
+def _selective_trigrams(term_trigrams):
+    """
+    Return up to ``MAX_TERM_TRIGRAMS`` of the rarest ``term_trigrams``, or ``None``
+    if they are all common, counting at most ``MAX_COUNTED_TRIGRAMS`` of them.
+    """
+    counts = {}
+    for trigram in sorted(term_trigrams)[:MAX_COUNTED_TRIGRAMS]:
+        counts[trigram] = UserSearchTrigram.objects.filter(trigram=trigram)[:RARITY_SAMPLE].count()
+        if sum(count < SELECTIVE for count in counts.values()) == MAX_TERM_TRIGRAMS:
+            break
+    rarest = sorted(counts, key=counts.get)[:MAX_TERM_TRIGRAMS]
+    if counts[rarest[0]] >= RARITY_SAMPLE:
+        return None
+    return rarest
+
+
+def search_users(queryset, search_term):
+    """
+    Filter ``queryset`` to users matching every whitespace-separated word of ``search_term``.
+    """
+    for term in search_term.lower().split():
+        queryset = queryset.filter(_term_filter(term))
+    return queryset
+
+
+class UserSearchFilter(BaseFilterBackend):
+    """
+    ``?search=`` filter for user listings, backed by the trigram index.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        search_term = request.query_params.get(self.search_param, '').strip()
+        if not search_term:
+            return queryset
+        return search_users(queryset, search_term)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': "Words to find in the email, first name, last name or user type "
+                           "(anywhere from 3 characters, at the start for shorter words).",
+            'schema': {'type': 'string'},
+        }]
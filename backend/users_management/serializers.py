@@ -1,7 +1,15 @@
-from django.contrib.auth.password_validation import validate_password
+import hashlib
+from operator import attrgetter, itemgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from rest_framework import serializers
 
+from users_management.exports import EXPORT_FORMATS
+from users_management.hashing import ahash_password, hash_password
 from users_management.models import User
+from users_management.password_validation import validate_password
+from users_management.referral_cache import resolve_referral_code
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -40,18 +48,147 @@ class UserSerializer(serializers.ModelSerializer):
         Create method to handle referral-based registration.
         """
         referral_code = validated_data.pop('referral_code', None)
-        recommended_by = None
+        recommended_by_id = None
 
         if referral_code:
-            try:
-                recommended_by = User.objects.get(referral_code=referral_code)
-            except User.DoesNotExist:
+            recommended_by_id = resolve_referral_code(referral_code)
+            if recommended_by_id is None:
                 raise serializers.ValidationError({"referral_code": "Invalid referral code."})
 
         # Remove confirm_password from validated_data
         validated_data.pop('confirm_password')
         try:
-            user = User.objects.create_user(**validated_data, recommended_by=recommended_by)
+            user = User.objects.create_user(**validated_data, recommended_by_id=recommended_by_id)
             return user  
         except Exception as e:
             raise serializers.ValidationError({"error": str(e)})
+
+    async def acreate(self, validated_data):
+        """
+        Async variant of ``create`` for the ASGI viewset.
+        """
+        referral_code = validated_data.pop('referral_code', None)
+        recommended_by_id = None
+
+        if referral_code:
+            recommended_by_id = await sync_to_async(resolve_referral_code)(referral_code)
+            if recommended_by_id is None:
+                raise serializers.ValidationError({"referral_code": "Invalid referral code."})
+
+        validated_data.pop('confirm_password')
+        try:
+            return await User.objects.acreate_user(**validated_data, recommended_by_id=recommended_by_id)
+        except Exception as e:
+            raise serializers.ValidationError({"error": str(e)})
+
+    def update(self, instance, validated_data):
+        """
+        Hash a new password instead of storing it as given.
+        """
+        validated_data.pop('confirm_password', None)
+        if 'password' in validated_data:
+            validated_data['password'] = hash_password(validated_data['password'])
+        return super().update(instance, validated_data)
+
+    async def aupdate(self, instance, validated_data):
+        """
+        Async variant of ``update``.
+        """
+        validated_data.pop('confirm_password', None)
+        if 'password' in validated_data:
+            validated_data['password'] = await ahash_password(validated_data['password'])
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        await instance.asave()
+        return instance
+
+
+# Fields of a user returned by retrieve and list, i.e. the readable fields of
+# UserSerializer. Only columns whose values are already JSON types belong here.
+READ_FIELDS = ('email',)
+
+
+class UserReader:
+    """
+    Read path of retrieve and list: the representation ``UserSerializer``
+    gives, built without its per-row field machinery.
+
+    Lists are fetched as ``values()`` dicts rather than ``User`` instances,
+    and each row is turned into its representation by one getter built
+    once for the field list.
+    """
+    def __init__(self, fields=READ_FIELDS):
+        self.fields = tuple(fields)
+        # Part of the user ETags, so they change with the representation.
+        self.tag = hashlib.sha256(','.join(self.fields).encode()).hexdigest()[:8]
+        self.get_values = itemgetter(*self.fields)
+        self.get_attributes = attrgetter(*self.fields)
+        if len(self.fields) == 1:
+            # Single-field getters return the value instead of a 1-tuple.
+            self.get_values = self._as_tuple(self.get_values)
+            self.get_attributes = self._as_tuple(self.get_attributes)
+
+    @staticmethod
+    def _as_tuple(getter):
+        return lambda obj: (getter(obj),)
+
+    def values(self, queryset):
+        """
+        Fetch the read fields of ``queryset`` (and the primary key, for keyset pagination).
+        """
+        return queryset.values('id', *self.fields)
+
+    def many(self, rows):
+        fields, get_values = self.fields, self.get_values
+        return [dict(zip(fields, get_values(row))) for row in rows]
+
+    def one(self, user):
+        return dict(zip(self.fields, self.get_attributes(user)))
+
+
+user_reader = UserReader()
+
+
+class BulkUserItemSerializer(serializers.Serializer):
+    """
+    One user of a batch registration; rows are validated together by the view.
+    """
+    email = serializers.CharField()
+    password = serializers.CharField(style={"input_type": "password"}, write_only=True)
+
+
+class BulkUserSerializer(serializers.Serializer):
+    """
+    Users registered by an institute in one call, at most ``USERS_BULK_MAX_BATCH``.
+    """
+    users = BulkUserItemSerializer(many=True, allow_empty=False)
+
+    def validate_users(self, users):
+        if len(users) > settings.USERS_BULK_MAX_BATCH:
+            raise serializers.ValidationError(f"At most {settings.USERS_BULK_MAX_BATCH} users per batch.")
+        return users
+
+
+class ReferralStatsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the referral stats endpoint.
+    """
+    depth = serializers.IntegerField(min_value=1, required=False)
+    since = serializers.DateTimeField(required=False)
+    top = serializers.IntegerField(min_value=0, max_value=100, default=10)
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the user export endpoint.
+    """
+    export_format = serializers.ChoiceField(choices=list(EXPORT_FORMATS), default='csv')
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(style={"input_type": "password"}, write_only=True)
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from users_management.authentication import signed_tokens
+from users_management.caching import user_cache
+from users_management.models import User
+from users_management.referral_cache import referral_code_cache
+from users_management.referrals import add_referrals, move_referral
+from users_management.search import SEARCH_FIELDS, index_users
+
+
+@receiver(post_save, sender=User)
+def invalidate_referral_code_on_save(sender, instance, created, **kwargs):
+    """
+    Drop cached resolutions of the old and new referral code when either the code
+    or the institute flag changed.
+    """
+    if created or instance.has_changed('referral_code') or instance.has_changed('is_institute'):
+        referral_code_cache.invalidate(instance.loaded_value('referral_code'), instance.referral_code)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_referral_code_on_delete(sender, instance, **kwargs):
+    referral_code_cache.invalidate(instance.loaded_value('referral_code'), instance.referral_code)
+
+
+@receiver(post_save, sender=User)
+def update_referral_tree_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        add_referrals([instance])
+    elif instance.has_changed('recommended_by_id'):
+        move_referral(instance, instance.loaded_value('recommended_by_id'), instance.recommended_by_id)
+
+
+@receiver(pre_delete, sender=User)
+def update_referral_tree_on_delete(sender, instance, **kwargs):
+    """
+    Detach the user's subtree from its ancestors; paths from the user itself
+    are removed by the cascade and its referrals become roots (SET_NULL).
+    """
+    move_referral(instance, instance.recommended_by_id, None)
+
+
+@receiver(post_save, sender=User)
+def update_search_index_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or any(instance.has_changed(field) for field in SEARCH_FIELDS):
+        index_users([instance])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_version(sender, instance, **kwargs):
+    user_cache.bump_version(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def bump_user_version_on_permission_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate users whose groups or direct permissions changed, from either side of the relation.
+    """
+    if not reverse:
+        if action.startswith('post_'):
+            user_cache.bump_version(instance.pk)
+    elif action == 'pre_clear':
+        # clear() sends no pk_set, collect the members before they are removed.
+        field = 'groups' if sender is User.groups.through else 'user_permissions'
+        user_cache.bump_version(*User.objects.filter(**{field: instance}).values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        user_cache.bump_version(*pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def bump_group_members_version(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate the members of groups whose permissions changed.
+    """
+    if not reverse:
+        groups = [instance.pk] if action.startswith('post_') else []
+    elif action == 'pre_clear':
+        groups = list(instance.group_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        groups = pk_set
+    else:
+        groups = []
+    if groups:
+        user_cache.bump_version(*User.objects.filter(groups__in=groups).values_list('pk', flat=True).distinct())
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_credential_change(sender, instance, created, **kwargs):
+    """
+    Revoke issued tokens when the claims they carry or the password changed.
+    """
+    if not created and any(
+        instance.has_changed(name) for name in ('email', 'password', 'is_active', 'is_staff', 'is_superuser')
+    ):
+        signed_tokens.revoke_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    signed_tokens.revoke_user(instance.pk)
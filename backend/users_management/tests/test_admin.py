@@ -0,0 +1,90 @@
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from users_management.admin import LargeTableChangeList
+from users_management.models import User
+from users_management.pagination import EstimatedCountPaginator
+from users_management.tests.utils import (FAST_SETTINGS, PASSWORD,
+                                          create_users)
+
+
+@override_settings(**FAST_SETTINGS)
+class UserAdminTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.institute = User.objects.create_user(email='academy@example.com', password=PASSWORD, is_institute=True)
+        self.other_institute = User.objects.create_user(
+            email='school@example.org', password=PASSWORD, is_institute=True,
+        )
+        self.student = User.objects.create_user(email='student@example.com', password=PASSWORD)
+        self.admin = User.objects.create_superuser(email='admin@example.com', password=PASSWORD)
+        self.client.force_login(self.admin)
+
+    def changelist(self, **query):
+        return self.client.get(reverse('admin:users_management_user_changelist'), query)
+
+    def recommended_by_field(self):
+        response = self.client.get(reverse('admin:users_management_user_change', args=[self.student.pk]))
+        return response.context['adminform'].form.fields['recommended_by']
+
+    def autocomplete(self, term=''):
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'users_management', 'model_name': 'user', 'field_name': 'recommended_by', 'term': term,
+        })
+        self.assertEqual(response.status_code, 200)
+        return sorted(int(result['id']) for result in response.json()['results'])
+
+    @override_settings(USERS_ADMIN_LARGE_TABLE=True)
+    def test_large_table_changelist(self):
+        create_users(5)
+        response = self.changelist()
+        changelist = response.context['cl']
+        self.assertIsInstance(changelist, LargeTableChangeList)
+        self.assertIsInstance(changelist.paginator, EstimatedCountPaginator)
+        self.assertFalse(changelist.show_full_result_count)
+        self.assertEqual(changelist.result_count, User.objects.count())
+        # Only the displayed columns are loaded.
+        [user, *_] = changelist.result_list
+        self.assertEqual(
+            {field.attname for field in User._meta.concrete_fields} - user.get_deferred_fields(),
+            {'id', 'email', 'user_type', 'is_institute', 'is_active'},
+        )
+        self.assertContains(response, 'student@example.com')
+
+    @override_settings(USERS_ADMIN_LARGE_TABLE=True)
+    def test_large_table_search(self):
+        changelist = self.changelist(q='academy').context['cl']
+        self.assertEqual([user.email for user in changelist.result_list], ['academy@example.com'])
+
+    def test_changelist(self):
+        changelist = self.changelist().context['cl']
+        self.assertNotIsInstance(changelist, LargeTableChangeList)
+        self.assertTrue(changelist.show_full_result_count)
+        self.assertEqual(changelist.result_list[0].get_deferred_fields(), set())
+
+    @override_settings(USERS_ADMIN_LARGE_TABLE=True)
+    def test_recommended_by_autocomplete(self):
+        field = self.recommended_by_field()
+        self.assertIsInstance(field.widget.widget, AutocompleteSelect)
+        self.assertEqual(set(field.queryset), {self.institute, self.other_institute})
+        # Only institutes are offered, and the term filters them.
+        self.assertEqual(self.autocomplete(), [self.institute.pk, self.other_institute.pk])
+        self.assertEqual(self.autocomplete('example'), [self.institute.pk, self.other_institute.pk])
+        self.assertEqual(self.autocomplete('student'), [])
+        self.assertEqual(self.autocomplete('school'), [self.other_institute.pk])
+
+    @override_settings(USERS_ADMIN_LARGE_TABLE=True)
+    def test_recommended_by_must_be_an_institute(self):
+        response = self.client.post(reverse('admin:users_management_user_change', args=[self.student.pk]), {
+            'email': self.student.email, 'user_type': self.student.user_type, 'recommended_by': self.admin.pk,
+            'is_active': 'on', 'date_joined_0': '2024-01-01', 'date_joined_1': '00:00:00',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['adminform'].form.errors), ['recommended_by'])
+
+    def test_recommended_by_select(self):
+        field = self.recommended_by_field()
+        self.assertNotIsInstance(field.widget.widget, AutocompleteSelect)
+        self.assertEqual(set(field.queryset), {self.institute, self.other_institute})
@@ -0,0 +1,94 @@
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+from rest_framework.routers import DefaultRouter
+
+from users_management.authentication import signed_tokens
+from users_management.models import User
+from users_management.tests.utils import FAST_SETTINGS, PASSWORD
+from users_management.views import AsyncUserViewSet
+
+# The users API as served with USERS_ASYNC_VIEWS.
+router = DefaultRouter()
+router.register(r'users', AsyncUserViewSet, basename='user')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, **FAST_SETTINGS)
+class AsyncUserViewSetTests(TestCase):
+    new_password = {'password': 'New!Passw0rd', 'confirm_password': 'New!Passw0rd'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='member@example.com', password=PASSWORD)
+        self.other = User.objects.create_user(email='other@example.com', password=PASSWORD)
+
+    async def test_create(self):
+        response = await self.async_client.post(
+            reverse('user-list'),
+            {'email': 'new@example.com', 'password': PASSWORD, 'confirm_password': PASSWORD},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertEqual(response.json(), {'email': 'new@example.com'})
+        user = await User.objects.aget(email='new@example.com')
+        self.assertTrue(user.check_password(PASSWORD))
+
+    async def test_create_rejects_mismatched_passwords(self):
+        response = await self.async_client.post(
+            reverse('user-list'),
+            {'email': 'new@example.com', 'password': PASSWORD, 'confirm_password': 'Other!Passw0rd'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(await User.objects.filter(email='new@example.com').aexists())
+
+    async def test_retrieve_with_session(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('user-detail', args=[self.user.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'email': 'member@example.com'})
+        response = await self.async_client.get(
+            reverse('user-detail', args=[self.user.pk]), headers={'If-None-Match': response.headers['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_retrieve_with_token(self):
+        # The token user is loaded without updated_at, refreshed by the view.
+        access = signed_tokens.issue(self.user)['access']
+        response = await self.async_client.get(
+            reverse('user-detail', args=[self.user.pk]), headers={'Authorization': f'Bearer {access}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'email': 'member@example.com'})
+        self.assertTrue(response.headers['ETag'].startswith(f'"{self.user.pk}-'))
+
+    async def test_update(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.patch(
+            reverse('user-detail', args=[self.user.pk]),
+            self.new_password, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200, response.json())
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.check_password('New!Passw0rd'))
+
+    async def test_permission_denied(self):
+        detail = reverse('user-detail', args=[self.other.pk])
+        self.assertEqual((await self.async_client.get(detail)).status_code, 401)
+
+        # Other users are outside a member's queryset.
+        await self.async_client.aforce_login(self.user)
+        self.assertEqual((await self.async_client.get(detail)).status_code, 404)
+        response = await self.async_client.patch(detail, self.new_password, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+        # Staff see every user but only update themselves.
+        staff = await User.objects.acreate_user(email='staff@example.com', password=PASSWORD, is_staff=True)
+        await self.async_client.aforce_login(staff)
+        self.assertEqual((await self.async_client.get(detail)).status_code, 200)
+        response = await self.async_client.patch(detail, self.new_password, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        await self.other.arefresh_from_db()
+        self.assertTrue(self.other.check_password(PASSWORD))
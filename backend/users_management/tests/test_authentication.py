@@ -0,0 +1,152 @@
+import time
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core import signing
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+
+from users_management.authentication import (ACCESS_TOKEN, REFRESH_TOKEN,
+                                             signed_tokens)
+from users_management.models import TokenRevocation, User
+from users_management.tests.utils import FAST_SETTINGS, PASSWORD
+
+
+@override_settings(**FAST_SETTINGS)
+class SignedTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='member@example.com', password=PASSWORD)
+        self.client = APIClient()
+
+    def obtain(self):
+        response = self.client.post(reverse('token-obtain'), {'email': 'member@example.com', 'password': PASSWORD})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def get_profile(self, access):
+        return self.client.get(
+            reverse('user-detail', args=[self.user.pk]), HTTP_AUTHORIZATION=f'Bearer {access}',
+        )
+
+    def refresh(self, refresh):
+        # No authentication scheme on the token views: failures are 403.
+        return self.client.post(reverse('token-refresh'), {'refresh': refresh})
+
+    def test_obtain_and_authenticate(self):
+        tokens = self.obtain()
+        response = self.get_profile(tokens['access'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'email': 'member@example.com'})
+        # A refresh token is not an access token.
+        self.assertEqual(self.get_profile(tokens['refresh']).status_code, 401)
+
+    def test_wrong_password(self):
+        response = self.client.post(reverse('token-obtain'), {'email': 'member@example.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_refresh_rotates(self):
+        tokens = self.obtain()
+        response = self.refresh(tokens['refresh'])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotEqual(response.data['refresh'], tokens['refresh'])
+        self.assertEqual(self.get_profile(response.data['access']).status_code, 200)
+
+        # The refresh token was single use.
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 403)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_refresh_used_concurrently(self):
+        tokens = self.obtain()
+        claims = signed_tokens.verify(tokens['refresh'], REFRESH_TOKEN)
+        # Another request verified the token too and rotated it first.
+        with mock.patch.object(signed_tokens, 'verify', return_value=claims):
+            self.assertEqual(self.refresh(tokens['refresh']).status_code, 200)
+            self.assertEqual(self.refresh(tokens['refresh']).status_code, 403)
+
+    def test_refresh_of_inactive_user(self):
+        tokens = self.obtain()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 403)
+
+    def test_revoke(self):
+        tokens = self.obtain()
+        response = self.client.post(
+            reverse('token-revoke'), {'refresh': tokens['refresh']}, HTTP_AUTHORIZATION=f"Bearer {tokens['access']}",
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_profile(tokens['access']).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 403)
+        # Tokens issued afterwards are not affected.
+        self.assertEqual(self.get_profile(self.obtain()['access']).status_code, 200)
+
+    def test_revoke_user(self):
+        first, second = self.obtain(), self.obtain()
+        time.sleep(0.002)
+        signed_tokens.revoke_user(self.user.pk)
+        for tokens in (first, second):
+            self.assertEqual(self.get_profile(tokens['access']).status_code, 401)
+            self.assertEqual(self.refresh(tokens['refresh']).status_code, 403)
+        time.sleep(0.002)
+        self.assertEqual(self.get_profile(self.obtain()['access']).status_code, 200)
+
+    def test_credential_change_revokes(self):
+        for change in ({'password': 'changed'}, {'is_staff': True}, {'is_active': False}):
+            with self.subTest(change=change):
+                tokens = signed_tokens.issue(self.user)
+                time.sleep(0.002)
+                for name, value in change.items():
+                    setattr(self.user, name, value)
+                self.user.save()
+                with self.assertRaises(signing.BadSignature):
+                    signed_tokens.verify(tokens['access'])
+
+    def test_deleted_user_tokens_stay_revoked(self):
+        tokens = signed_tokens.issue(self.user)
+        time.sleep(0.002)
+        self.user.delete()
+        with self.assertRaises(signing.BadSignature):
+            signed_tokens.verify(tokens['access'])
+
+    def test_verify_makes_no_query(self):
+        access = signed_tokens.issue(self.user)['access']
+        signed_tokens.verify(access)
+        with self.assertNumQueries(0):
+            signed_tokens.verify(access)
+
+    def test_revocations_of_other_workers(self):
+        claims = signed_tokens.verify(signed_tokens.issue(self.user)['access'])
+        # Another worker revoked the token: seen once the list is reloaded.
+        TokenRevocation.objects.create(
+            jti=claims['jti'], user_id=self.user.pk, expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+        )
+        with mock.patch.object(signed_tokens.revocations, 'loaded_at', time.monotonic() - 60):
+            with self.assertRaises(signing.BadSignature):
+                signed_tokens.verify(signed_tokens.signers[ACCESS_TOKEN].sign_object(claims))
+
+    def test_expired_revocations_are_purged(self):
+        claims = signed_tokens.verify(signed_tokens.issue(self.user)['access'])
+        TokenRevocation.objects.create(
+            jti='expired', user_id=self.user.pk, expires_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+        )
+        self.assertTrue(signed_tokens.revoke(claims, ACCESS_TOKEN))
+        self.assertFalse(signed_tokens.revoke(claims, ACCESS_TOKEN))
+        self.assertEqual(TokenRevocation.objects.count(), 2)
+        call_command('purge_token_revocations', stdout=StringIO())
+        self.assertQuerySetEqual(TokenRevocation.objects.values_list('jti', flat=True), [claims['jti']])
+
+
+class SignedTokenSchemaTests(SimpleTestCase):
+    def test_bearer_scheme(self):
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        self.assertEqual(
+            schema['components']['securitySchemes']['signedToken'], {
+                'type': 'http',
+                'scheme': 'bearer',
+                'description': "Access token from /api/token/, as `Authorization: Bearer <token>`.",
+            },
+        )
+        self.assertIn({'signedToken': []}, schema['paths']['/api/users/{id}/']['get']['security'])
@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users_management.models import ReferralPath, User
+from users_management.tests.utils import FAST_SETTINGS, PASSWORD
+from users_management.throttling import get_store
+
+
+def batch(count, prefix='student'):
+    return {'users': [{'email': f'{prefix}{index}@example.com', 'password': PASSWORD} for index in range(count)]}
+
+
+@override_settings(**FAST_SETTINGS, USERS_BULK_MAX_BATCH=50)
+class BulkRegistrationTests(TestCase):
+    url = reverse('user-bulk')
+
+    def setUp(self):
+        self.institute = User.objects.create_user(email='institute@example.com', password=PASSWORD, is_institute=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.institute)
+
+    def test_registers_users_recommended_by_the_institute(self):
+        response = self.client.post(self.url, batch(20), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['rejected']), (20, 0))
+        students = User.objects.filter(email__startswith='student')
+        self.assertEqual(
+            [result['id'] for result in response.data['results']], list(students.order_by('pk').values_list('pk', flat=True))
+        )
+        self.assertEqual(set(students.values_list('recommended_by', flat=True)), {self.institute.pk})
+        self.assertEqual(ReferralPath.objects.filter(ancestor=self.institute).count(), 20)
+        self.assertTrue(students.first().check_password(PASSWORD))
+
+    def test_rejected_users_are_reported_in_place(self):
+        User.objects.create_user(email='student1@example.com', password=PASSWORD)
+        data = batch(4)
+        data['users'][2]['password'] = '123'
+        data['users'].append({'email': 'STUDENT0@example.com', 'password': PASSWORD})
+
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['created', 'rejected', 'rejected', 'created', 'rejected'],
+        )
+        self.assertIn('already exists', response.data['results'][1]['error'])
+        self.assertIn('Duplicate email', response.data['results'][4]['error'])
+        self.assertEqual(User.objects.filter(recommended_by=self.institute).count(), 2)
+
+    def test_nothing_created_is_a_bad_request(self):
+        response = self.client.post(self.url, {'users': [{'email': 'not-an-email', 'password': PASSWORD}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'][0]['status'], 'rejected')
+
+    def test_batch_size_is_limited(self):
+        response = self.client.post(self.url, batch(51), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(email__startswith='student').exists())
+
+    def test_only_institutes(self):
+        self.client.force_authenticate(User.objects.create_user(email='member@example.com', password=PASSWORD))
+        self.assertEqual(self.client.post(self.url, batch(1), format='json').status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(self.url, batch(1), format='json').status_code, 401)
+
+    def test_throttled_per_batch(self):
+        rates = {**FAST_SETTINGS['REST_FRAMEWORK']['DEFAULT_THROTTLE_RATES'], 'user_batch': '2/hour'}
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            THROTTLE_STORE_PATH=os.path.join(directory, 'throttle.sqlite3'),
+            REST_FRAMEWORK={**FAST_SETTINGS['REST_FRAMEWORK'], 'DEFAULT_THROTTLE_RATES': rates},
+        ):
+            statuses = [
+                self.client.post(self.url, batch(30, prefix=f'batch{call}-'), format='json').status_code
+                for call in range(3)
+            ]
+            get_store().clear()
+        self.assertEqual(statuses, [201, 201, 429])
+        self.assertEqual(User.objects.filter(recommended_by=self.institute).count(), 60)
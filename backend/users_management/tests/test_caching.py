@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase, override_settings
+
+from users_management.caching import check_user_cache, user_cache
+from users_management.models import User
+from users_management.tests.utils import (FAST_SETTINGS, PASSWORD,
+                                          use_shared_cache)
+
+
+@override_settings(**FAST_SETTINGS)
+class UserCacheTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        user_cache.local.clear()
+        self.user = User.objects.create_user(email='member@example.com', password=PASSWORD)
+        self.permission = Permission.objects.get(codename='view_user')
+
+    def load(self, user_id):
+        return user_cache.get(user_id, lambda pk: User.objects.filter(pk=pk).first())
+
+    def assertBumps(self, change):
+        version = user_cache.get_version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertGreater(user_cache.get_version(self.user.pk), version)
+
+    def test_cached(self):
+        self.load(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.load(self.user.pk), self.user)
+        # Every lookup gets its own copy.
+        self.assertIsNot(self.load(self.user.pk), self.load(self.user.pk))
+
+    def test_save_bumps_version(self):
+        self.load(self.user.pk)
+        self.user.first_name = 'Renamed'
+        self.assertBumps(self.user.save)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.load(self.user.pk).first_name, 'Renamed')
+
+    def test_update_bumps_version(self):
+        self.assertBumps(lambda: User.objects.filter(pk=self.user.pk).update(first_name='Renamed'))
+        self.assertEqual(self.load(self.user.pk).first_name, 'Renamed')
+
+    def test_delete_bumps_version(self):
+        user_id = self.user.pk
+        self.load(user_id)
+        self.assertBumps(self.user.delete)
+        self.assertIsNone(self.load(user_id))
+
+    def test_permission_changes_bump_version(self):
+        group = Group.objects.create(name='staff')
+        changes = [
+            lambda: self.user.user_permissions.add(self.permission),
+            lambda: self.user.user_permissions.clear(),
+            lambda: self.user.groups.add(group),
+            lambda: group.permissions.add(self.permission),
+            lambda: self.permission.group_set.clear(),
+            lambda: group.user_set.remove(self.user),
+        ]
+        for change in changes:
+            with self.subTest():
+                self.assertBumps(change)
+
+    def test_permissions_reloaded(self):
+        self.assertFalse(self.load(self.user.pk).has_perm('users_management.view_user'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.permission)
+        self.assertTrue(self.load(self.user.pk).has_perm('users_management.view_user'))
+
+
+@override_settings(**FAST_SETTINGS)
+class UnsharedUserCacheTests(TestCase):
+    def test_disabled_with_a_per_process_cache(self):
+        user = User.objects.create_user(email='member@example.com', password=PASSWORD)
+        self.assertFalse(user_cache.enabled)
+        load = mock.Mock(return_value=user)
+        user_cache.get(user.pk, load)
+        user_cache.get(user.pk, load)
+        self.assertEqual(load.call_count, 2)
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.save()
+        self.assertEqual(callbacks, [])
+
+    def test_check(self):
+        # Off by default, without a warning.
+        self.assertEqual(check_user_cache(), [])
+        with override_settings(USER_CACHE_ALIAS='default'):
+            self.assertEqual([error.id for error in check_user_cache()], ['users_management.W001'])
+            use_shared_cache(self)
+            self.assertEqual(check_user_cache(), [])
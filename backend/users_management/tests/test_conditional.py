@@ -0,0 +1,128 @@
+import gzip
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.test import APIClient, APIRequestFactory
+
+from sharma_academy.schema import CachedSpectacularAPIView, build_schema
+from users_management.authentication import signed_tokens
+from users_management.caching import user_cache
+from users_management.models import User
+from users_management.serializers import UserReader
+from users_management.tests.utils import FAST_SETTINGS, PASSWORD
+
+
+@override_settings(**FAST_SETTINGS)
+class ConditionalRetrieveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='member@example.com', password=PASSWORD)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {signed_tokens.issue(self.user)['access']}")
+        self.url = reverse('user-detail', args=[self.user.pk])
+
+    def test_unchanged_user_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.user.refresh_from_db()
+        self.assertEqual(response.headers['Last-Modified'], http_date(int(self.user.updated_at.timestamp())))
+        self.assertIn('private', response.headers['Cache-Control'])
+
+        # The user's updated_at only.
+        with mock.patch.object(UserReader, 'one') as serialize, self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        serialize.assert_not_called()
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changed_user_is_sent_again(self):
+        etag = self.client.get(self.url).headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.email = 'renamed@example.com'
+            self.user.save()
+        # Changing the email revokes the user's tokens.
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {signed_tokens.issue(self.user)['access']}")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'email': 'renamed@example.com'})
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_queryset_update_is_sent_again(self):
+        etag = self.client.get(self.url).headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(first_name='Renamed')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_version_without_shared_cache(self):
+        self.assertIsInstance(user_cache.get_version(self.user.pk), int)
+        with mock.patch.object(user_cache, 'alias', 'default'), override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertIsInstance(user_cache.get_version(self.user.pk), int)
+
+
+@override_settings(**FAST_SETTINGS, API_SCHEMA_DIR=None)
+class CachedSchemaTests(TestCase):
+    url = reverse('api-schema')
+
+    def setUp(self):
+        CachedSpectacularAPIView.artifacts.clear()
+        self.addCleanup(CachedSpectacularAPIView.artifacts.clear)
+
+    def test_same_document_as_spectacular(self):
+        for query in ('', '?format=json'):
+            with self.subTest(query=query):
+                request = APIRequestFactory().get(self.url + query)
+                expected = SpectacularAPIView.as_view()(request).render()
+                response = self.client.get(self.url + query)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response.headers['Content-Type'], expected.headers['Content-Type'])
+                self.assertEqual(response.headers['Content-Disposition'], expected.headers['Content-Disposition'])
+
+    def test_generated_once_and_revalidated(self):
+        with mock.patch.object(SchemaGenerator, 'get_schema', wraps=SchemaGenerator().get_schema) as get_schema:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(get_schema.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_gzip(self):
+        plain = self.client.get(self.url)
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed.headers['ETag'], plain.headers['ETag'])
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+
+    def test_serves_build_artifacts(self):
+        # The document the view generates itself.
+        expected = self.client.get(self.url + '?format=json').content
+        CachedSpectacularAPIView.artifacts.clear()
+        with tempfile.TemporaryDirectory() as directory, override_settings(API_SCHEMA_DIR=directory):
+            build_schema(directory)
+            with mock.patch.object(SchemaGenerator, 'get_schema') as get_schema:
+                response = self.client.get(self.url + '?format=json')
+            get_schema.assert_not_called()
+            self.assertEqual(response.content, expected)
+
+    def test_ignores_artifacts_built_with_other_settings(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(API_SCHEMA_DIR=directory):
+            build_schema(directory)
+            with override_settings(USERS_PAGINATION='cursor'), \
+                    mock.patch.object(SchemaGenerator, 'get_schema', wraps=SchemaGenerator().get_schema) as get_schema, \
+                    self.assertLogs('sharma_academy.schema', 'WARNING'):
+                response = self.client.get(self.url + '?format=json')
+            get_schema.assert_called_once()
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,110 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users_management.exports import EXPORT_COLUMNS, stream_csv
+from users_management.models import User
+from users_management.tests.utils import (FAST_SETTINGS, PASSWORD,
+                                          create_users)
+
+HEADER = [name for name, _ in EXPORT_COLUMNS]
+
+
+def read_csv(response):
+    return list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+
+
+def read_jsonl(response):
+    return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+
+@override_settings(**FAST_SETTINGS)
+class ExportTests(TestCase):
+    def setUp(self):
+        self.institute = User.objects.create_user(email='academy@example.com', password=PASSWORD, is_institute=True)
+        self.student = User.objects.create_user(
+            email='student@example.com', password=PASSWORD, first_name='=HYPERLINK("http://evil")',
+            last_name='@SUM(A1)', recommended_by=self.institute,
+        )
+        self.staff = User.objects.create_user(email='staff@example.com', password=PASSWORD, is_staff=True)
+
+    def test_csv(self):
+        header, *rows = list(csv.reader(StringIO(''.join(stream_csv(User.objects.order_by('pk'))))))
+        self.assertEqual(header, HEADER)
+        self.assertEqual([row[1] for row in rows], ['academy@example.com', 'student@example.com', 'staff@example.com'])
+        student = dict(zip(header, rows[1]))
+        self.assertEqual(student['recommended_by_email'], 'academy@example.com')
+        self.assertEqual(student['is_institute'], 'False')
+        # Formulas are shown as text.
+        self.assertEqual(student['first_name'], '\'=HYPERLINK("http://evil")')
+        self.assertEqual(student['last_name'], "'@SUM(A1)")
+
+    def test_csv_chunks(self):
+        create_users(5)
+        chunks = list(stream_csv(User.objects.order_by('pk'), chunk_size=3))
+        # The header, then three rows per chunk.
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [1, 3, 3, 2])
+
+    def test_api_export(self):
+        create_users(4)
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.get(reverse('user-export'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv"')
+        header, *rows = read_csv(response)
+        self.assertEqual(header, HEADER)
+        self.assertEqual(len(rows), User.objects.count())
+        self.assertEqual([int(row[0]) for row in rows], sorted(User.objects.values_list('pk', flat=True)))
+
+    def test_api_export_jsonl(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.get(reverse('user-export'), {'export_format': 'jsonl', 'search': 'hyperlink'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        [row] = read_jsonl(response)
+        self.assertEqual(list(row), HEADER)
+        # JSON Lines carry the values as they are.
+        self.assertEqual(row['first_name'], '=HYPERLINK("http://evil")')
+        self.assertEqual(row['recommended_by_email'], 'academy@example.com')
+        self.assertIs(row['is_institute'], False)
+        self.assertEqual(client.get(reverse('user-export'), {'export_format': 'xlsx'}).status_code, 400)
+
+    def test_api_export_is_staff_only(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('user-export')).status_code, 401)
+        client.force_authenticate(self.institute)
+        self.assertEqual(client.get(reverse('user-export')).status_code, 403)
+
+    def export_action(self, action, users):
+        return self.client.post(reverse('admin:users_management_user_changelist'), {
+            'action': action, '_selected_action': [user.pk for user in users],
+        })
+
+    def test_admin_actions(self):
+        create_users(3)
+        self.client.force_login(User.objects.create_superuser(email='admin@example.com', password=PASSWORD))
+        selected = [self.institute, self.student]
+        response = self.export_action('export_csv', selected)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv"')
+        header, *rows = read_csv(response)
+        self.assertEqual([row[1] for row in rows], ['academy@example.com', 'student@example.com'])
+
+        response = self.export_action('export_jsonl', selected)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([row['email'] for row in read_jsonl(response)], ['academy@example.com', 'student@example.com'])
+
+    def test_admin_actions_need_the_view_permission(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.export_action('export_csv', [self.student]).status_code, 403)
+        self.staff.user_permissions.add(Permission.objects.get(codename='view_user'))
+        response = self.export_action('export_csv', [self.student])
+        self.assertEqual(len(read_csv(response)), 2)
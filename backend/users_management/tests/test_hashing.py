@@ -0,0 +1,125 @@
+import threading
+import time
+from concurrent.futures import Future
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.test import SimpleTestCase, override_settings
+
+from users_management.hashing import PasswordHashingPool
+from users_management.tests.utils import FAST_SETTINGS
+
+PASSWORDS = [f'Password-{index}!' for index in range(7)]
+
+
+class ManualExecutor:
+    """
+    An executor that runs a submitted chunk only when the test says so.
+    """
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        future = Future()
+        self.submitted.append((future, function, args))
+        return future
+
+    def run(self, index):
+        future, function, args = self.submitted[index]
+        future.set_result(function(*args))
+
+    def wait_for(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while len(self.submitted) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return len(self.submitted)
+
+    def shutdown(self):
+        pass
+
+
+@override_settings(**FAST_SETTINGS)
+class PasswordHashingPoolTests(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        pool = PasswordHashingPool(**kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def assertHashes(self, hashes, passwords):
+        self.assertEqual(len(hashes), len(passwords))
+        for encoded, password in zip(hashes, passwords):
+            self.assertTrue(check_password(password, encoded), password)
+
+    def test_small_batches_are_hashed_in_the_caller(self):
+        pool = self.make_pool(workers=2, min_batch=3)
+        pool._executor = mock.Mock()
+        self.assertHashes(pool.hash_many(PASSWORDS[:2]), PASSWORDS[:2])
+        pool._executor.submit.assert_not_called()
+        # As is everything with a single worker.
+        single = self.make_pool(workers=1)
+        with mock.patch.object(PasswordHashingPool, 'executor') as executor:
+            self.assertHashes(single.hash_many(PASSWORDS), PASSWORDS)
+        executor.submit.assert_not_called()
+
+    def test_hash_many_keeps_the_order(self):
+        pool = self.make_pool(workers=2, chunk_size=3)
+        pool._executor = executor = ManualExecutor()
+        result = []
+        thread = threading.Thread(target=lambda: result.extend(pool.hash_many(PASSWORDS)))
+        thread.start()
+        self.assertEqual(executor.wait_for(3), 3)
+        # Chunks finishing out of order.
+        for index in (2, 0, 1):
+            executor.run(index)
+        thread.join(5)
+        self.assertEqual([len(args[0]) for _, _, args in executor.submitted], [3, 3, 1])
+        self.assertHashes(result, PASSWORDS)
+
+    def test_queue_is_bounded(self):
+        pool = self.make_pool(workers=2, queue_size=2, chunk_size=1)
+        pool._executor = executor = ManualExecutor()
+        result = []
+        thread = threading.Thread(target=lambda: result.extend(pool.hash_many(PASSWORDS[:4])))
+        thread.start()
+        self.assertEqual(executor.wait_for(2), 2)
+        # The caller waits for a free slot instead of queueing more chunks.
+        self.assertEqual(executor.wait_for(3, timeout=0.1), 2)
+        executor.run(1)
+        self.assertEqual(executor.wait_for(3), 3)
+        self.assertEqual(executor.wait_for(4, timeout=0.1), 3)
+        executor.run(0)
+        self.assertEqual(executor.wait_for(4), 4)
+        executor.run(3)
+        executor.run(2)
+        thread.join(5)
+        self.assertHashes(result, PASSWORDS[:4])
+        # Every slot was given back.
+        for _ in range(pool.queue_size):
+            self.assertTrue(pool._slots.acquire(blocking=False))
+
+    def test_slot_released_when_submit_fails(self):
+        pool = self.make_pool(workers=2, queue_size=1, chunk_size=1)
+        pool._executor = mock.Mock(**{'submit.side_effect': RuntimeError('cannot schedule new futures')})
+        with self.assertRaises(RuntimeError):
+            pool.hash_many(PASSWORDS[:2])
+        self.assertTrue(pool._slots.acquire(blocking=False))
+
+    async def test_ahash_many(self):
+        pool = self.make_pool(workers=1, queue_size=2)
+        self.assertHashes(await pool.ahash_many(iter(PASSWORDS)), PASSWORDS)
+
+
+class PasswordHashingWorkerTests(SimpleTestCase):
+    def test_worker_processes(self):
+        pool = PasswordHashingPool(workers=2, chunk_size=1)
+        self.addCleanup(pool.shutdown)
+        hashes = pool.hash_many(PASSWORDS[:3])
+        self.assertEqual(len(hashes), 3)
+        for encoded, password in zip(hashes, PASSWORDS):
+            self.assertTrue(check_password(password, encoded), password)
+        # Spawned workers hash with the caller's hashers, even overridden ones.
+        with override_settings(**FAST_SETTINGS):
+            hashes = pool.hash_many(PASSWORDS[:3])
+            self.assertEqual([encoded.split('$')[0] for encoded in hashes], ['md5'] * 3)
+            for encoded, password in zip(hashes, PASSWORDS):
+                self.assertTrue(check_password(password, encoded), password)
@@ -0,0 +1,150 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users_management.importers import UserCSVImporter
+from users_management.jobs import ImportJobRunner, claim_job, enqueue_import
+from users_management.models import ImportJob, User
+from users_management.tests.utils import (FAST_SETTINGS, csv_upload,
+                                          run_import_jobs)
+
+
+def queue(rows, **kwargs):
+    return enqueue_import(csv_upload(rows, **kwargs).read().decode(), 'users.csv')
+
+
+@override_settings(**FAST_SETTINGS, IMPORT_JOB_STALE_AFTER=60)
+@mock.patch.object(UserCSVImporter, 'chunk_size', 10)
+class ImportJobTests(TestCase):
+    def imported(self):
+        return User.objects.filter(email__startswith='import').count()
+
+    def test_import(self):
+        job = queue(25)
+        self.assertEqual(job.total_rows, 25)
+        run_import_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.DONE)
+        self.assertEqual((job.rows_validated, job.rows_imported, job.lines_done), (25, 25, 25))
+        self.assertEqual(self.imported(), 25)
+
+    def test_rejected_rows_create_nothing(self):
+        job = queue(25, referral_code='UNKNOWN')
+        run_import_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertEqual(job.error_count, 25)
+        self.assertEqual(list(job.errors.values_list('line', flat=True)), list(range(2, 27)))
+        self.assertEqual(self.imported(), 0)
+
+    def test_failed_import_resumes_from_checkpoint(self):
+        job = queue(25)
+        save_users = UserCSVImporter.save_users
+        calls = []
+
+        def fail_second_chunk(importer, users):
+            calls.append(len(users))
+            if len(calls) == 2:
+                raise RuntimeError("disk full")
+            return save_users(importer, users)
+
+        with mock.patch.object(UserCSVImporter, 'save_users', fail_second_chunk), self.assertLogs('users_management.jobs'):
+            run_import_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.lines_done, job.rows_imported), (ImportJob.FAILED, 10, 10))
+        self.assertIn("disk full", job.message)
+        self.assertEqual(self.imported(), 10)
+
+        # What the admin retry action does.
+        ImportJob.objects.filter(pk=job.pk).update(status=ImportJob.IMPORTING, worker='', heartbeat=None)
+        run_import_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_imported, job.error_count), (ImportJob.DONE, 25, 0))
+        self.assertEqual(self.imported(), 25)
+
+    def test_interrupted_job_is_released(self):
+        job = queue(25)
+        stop = threading.Event()
+        save_users = UserCSVImporter.save_users
+
+        def stop_after_chunk(importer, users):
+            stop.set()
+            return save_users(importer, users)
+
+        with mock.patch.object(UserCSVImporter, 'save_users', stop_after_chunk):
+            ImportJobRunner(claim_job('first'), 'first', stop).run()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.lines_done, job.worker, job.heartbeat), (ImportJob.IMPORTING, 10, '', None))
+
+        run_import_jobs('second')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.rows_imported), (ImportJob.DONE, 'second', 25))
+        self.assertEqual(self.imported(), 25)
+
+    def test_only_silent_workers_lose_their_job(self):
+        job = queue(5)
+        self.assertEqual(claim_job('first'), job)
+        ImportJob.objects.filter(pk=job.pk).update(status=ImportJob.IMPORTING)
+        self.assertIsNone(claim_job('second'))
+
+        ImportJob.objects.filter(pk=job.pk).update(heartbeat=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(claim_job('second'), job)
+        job.refresh_from_db()
+        self.assertEqual(job.worker, 'second')
+
+    @override_settings(IMPORT_JOB_HEARTBEAT=0)
+    def test_heartbeat_survives_failed_beats(self):
+        queue(5)
+        runner = ImportJobRunner(claim_job('first'), 'first')
+        beats = []
+
+        def update(**fields):
+            beats.append(fields['heartbeat'])
+            if len(beats) < 3:
+                raise OperationalError("database is locked")
+            runner.finished.set()
+            return 1
+
+        # The heartbeat thread closes its own connection, not the test's.
+        with mock.patch.object(ImportJob.objects, 'filter') as filter, mock.patch('users_management.jobs.connection'), \
+                self.assertLogs('users_management.jobs', 'ERROR') as logs:
+            filter.return_value.update.side_effect = update
+            runner.beat()
+        self.assertEqual(len(beats), 3)
+        self.assertEqual(len(logs.records), 2)
+
+    def test_progress_and_eta(self):
+        job = queue(100)
+        job.status = ImportJob.IMPORTING
+        job.rows_imported = 25
+        job.phase_started_at = timezone.now() - timedelta(seconds=30)
+        self.assertEqual(job.phase_progress, (25, 100))
+        self.assertAlmostEqual(job.eta.total_seconds(), 90, delta=1)
+
+
+@override_settings(**FAST_SETTINGS)
+class ImportJobAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser(email='admin@example.com', password='!'))
+
+    def test_progress_page_and_error_report(self):
+        response = self.client.post(reverse('admin:bulk_create_users'), {'csv_file': csv_upload(3, referral_code='UNKNOWN')})
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse('admin:import_job_progress', args=[job.pk]))
+
+        response = self.client.get(reverse('admin:import_job_progress', args=[job.pk]))
+        self.assertContains(response, '<meta http-equiv="refresh"')
+
+        run_import_jobs()
+        response = self.client.get(reverse('admin:import_job_progress', args=[job.pk]))
+        self.assertNotContains(response, '<meta http-equiv="refresh"')
+        self.assertContains(response, "Invalid referral code &#x27;UNKNOWN&#x27; for email: import2@example.com")
+
+        response = self.client.get(reverse('admin:import_job_errors', args=[job.pk]))
+        self.assertEqual(response.content.decode().splitlines()[0], 'line,email,error')
+        self.assertEqual(len(response.content.decode().splitlines()), 4)
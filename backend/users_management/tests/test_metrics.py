@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from users_management.metrics import (LATENCY_BUCKETS, MetricsRegistry,
+                                      registry)
+from users_management.tests.utils import FAST_SETTINGS
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.registry = MetricsRegistry(directory=self.directory, flush_interval=3600)
+
+    def write_snapshot(self, pid, registry):
+        with open(os.path.join(self.directory, f'{pid}.json'), 'w') as file:
+            json.dump(registry.snapshot(), file)
+
+    def test_threads_are_merged(self):
+        def observe():
+            self.registry.observe_request('user-list', 'GET', 200, 0.02, 3)
+            self.registry.increment('logins_total', result='ok')
+
+        threads = [threading.Thread(target=observe) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = self.registry.snapshot()
+        [(view, method, status, values)] = snapshot['requests']
+        self.assertEqual((view, method, status, values[0]), ('user-list', 'GET', 200, 4))
+        self.assertEqual(snapshot['counters'], [['logins_total', {'result': 'ok'}, 4]])
+
+    def test_processes_are_summed(self):
+        self.registry.observe_request('user-list', 'GET', 200, 0.02, 3)
+        other = MetricsRegistry()
+        other.observe_request('user-list', 'GET', 200, 0.2, 1)
+        # The parent of the test runner is alive, the other process exited.
+        self.write_snapshot(os.getppid(), other)
+        self.write_snapshot(dead_pid(), other)
+        self.assertEqual(len(self.registry.collect()), 2)
+        self.assertIn('http_requests_total{view="user-list",method="GET",status="200"} 2\n', self.registry.render())
+        # The dead process' file is removed.
+        self.assertEqual(sorted(os.listdir(self.directory)), [f'{os.getppid()}.json'])
+
+    def test_render(self):
+        self.registry.observe_request('user-list', 'GET', 200, 0.02, 3)
+        self.registry.observe_request('user-list', 'GET', 404, 0.3, 0)
+        self.registry.increment('imports_total', status='done')
+        lines = self.registry.render().splitlines()
+        self.assertIn('# TYPE http_requests_total counter', lines)
+        self.assertIn('http_requests_total{view="user-list",method="GET",status="404"} 1', lines)
+        # Histograms by view and method, with cumulative buckets.
+        buckets = [line for line in lines if line.startswith('http_request_duration_seconds_bucket')]
+        self.assertEqual(len(buckets), len(LATENCY_BUCKETS) + 1)
+        self.assertIn('http_request_duration_seconds_bucket{view="user-list",method="GET",le="0.025"} 1', lines)
+        self.assertIn('http_request_duration_seconds_bucket{view="user-list",method="GET",le="+Inf"} 2', lines)
+        self.assertIn('http_request_duration_seconds_count{view="user-list",method="GET"} 2', lines)
+        self.assertIn('http_request_db_queries_sum{view="user-list",method="GET"} 3', lines)
+        self.assertIn('imports_total{status="done"} 1', lines)
+
+    def test_labels_are_escaped(self):
+        self.registry.increment('errors_total', message='say "hi"\n')
+        self.assertIn('errors_total{message="say \\"hi\\"\\n"} 1', self.registry.render())
+
+    def test_clear(self):
+        self.registry.write()
+        self.write_snapshot(os.getppid(), MetricsRegistry())
+        self.registry.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+@override_settings(**FAST_SETTINGS)
+class MetricsMiddlewareTests(TestCase):
+    def requests_of(self, view):
+        for name, method, status, values in registry.snapshot()['requests']:
+            if (name, method) == view:
+                yield status, values[0]
+
+    def test_requests_are_recorded(self):
+        before = dict(self.requests_of(('user-list', 'GET')))
+        self.client.get(reverse('user-list'))
+        after = dict(self.requests_of(('user-list', 'GET')))
+        self.assertEqual(after[401], before.get(401, 0) + 1)
+
+    def test_metrics_from_allowed_ips_only(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(b'# TYPE http_requests_total counter', response.content)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code, 403)
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users_management.models import User
+from users_management.pagination import (EstimatedCountPaginator,
+                                         UserCursorPagination,
+                                         estimated_count,
+                                         planner_row_estimate)
+from users_management.tests.utils import FAST_SETTINGS, create_users
+
+
+@override_settings(**FAST_SETTINGS)
+class EstimatedCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_users(30)
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_planner_row_estimate(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite statistics.")
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS sqlite_stat1')
+        # No statistics table: the failed query leaves the transaction usable.
+        self.assertIsNone(planner_row_estimate(User))
+        self.assertEqual(User.objects.count(), 30)
+        self.analyze()
+        self.assertEqual(planner_row_estimate(User), 30)
+
+    def test_unfiltered_querysets_use_the_statistics(self):
+        self.analyze()
+        create_users(5, prefix='more')
+        # The statistics query alone: a savepoint is only needed on PostgreSQL.
+        with self.assertNumQueries(1):
+            self.assertEqual(estimated_count(User.objects.all()), 30)
+
+    def test_postgresql_statistics_in_a_savepoint(self):
+        # The pg_class query fails on any other database, as it could on PostgreSQL.
+        with mock.patch.object(connection, 'vendor', 'postgresql'), CaptureQueriesContext(connection) as context:
+            self.assertIsNone(planner_row_estimate(User))
+        statements = [query['sql'].split(' "')[0] for query in context.captured_queries]
+        self.assertEqual(statements[0], 'SAVEPOINT')
+        self.assertIn('ROLLBACK TO SAVEPOINT', statements)
+        self.assertEqual(User.objects.count(), 30)
+
+    def test_filtered_querysets_are_counted_once(self):
+        queryset = User.objects.filter(email__startswith='user1')
+        self.assertEqual(estimated_count(queryset), 11)
+        User.objects.filter(email='user1@example.com').delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(estimated_count(User.objects.filter(email__startswith='user1')), 11)
+        cache.clear()
+        self.assertEqual(estimated_count(queryset), 10)
+
+    def test_paginator(self):
+        paginator = EstimatedCountPaginator(User.objects.filter(email__startswith='user').order_by('pk'), 10)
+        self.assertEqual((paginator.count, paginator.num_pages), (30, 3))
+        self.assertEqual(len(paginator.page(3).object_list), 10)
+
+
+@override_settings(**FAST_SETTINGS)
+class UserCursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = create_users(25)
+
+    def paginate(self, url, **params):
+        pagination = UserCursorPagination()
+        request = Request(APIRequestFactory().get(url, params))
+        page = pagination.paginate_queryset(User.objects.all(), request)
+        return pagination.get_paginated_response([user.email for user in page]).data
+
+    def test_pages(self):
+        emails = [user.email for user in reversed(self.users)]
+        first = self.paginate('/api/users/', page_size=10)
+        self.assertNotIn('count', first)
+        self.assertIsNone(first['previous'])
+        self.assertEqual(first['results'], emails[:10])
+        # Rows inserted meanwhile do not shift the next page.
+        create_users(5, prefix='new')
+        second = self.paginate(first['next'])
+        self.assertEqual(second['results'], emails[10:20])
+        self.assertEqual(self.paginate(second['next'])['results'], emails[20:])
+
+    def test_count(self):
+        self.assertEqual(self.paginate('/api/users/', count='true')['count'], 25)
+
+    def test_max_page_size(self):
+        create_users(100, prefix='more')
+        self.assertEqual(len(self.paginate('/api/users/', page_size=1000)['results']), 100)
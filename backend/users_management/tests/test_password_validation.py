@@ -0,0 +1,82 @@
+import random
+import string
+
+from django.contrib.auth import password_validation as django_validation
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+
+from users_management.benchmarks.password_validation import \
+    FourScanStrongPasswordValidator
+from users_management.models import User
+from users_management.password_validation import (PasswordValidationEngine,
+                                                  validate_password)
+from users_management.validators import StrongPasswordValidator
+
+PASSWORDS = [
+    '', 'short', 'password', '12345678', 'Str0ng!Passw0rd', 'Str0ngPassw0rd', 'str0ng!passw0rd',
+    'STR0NG!PASSW0RD', 'Strong!Password', 'Str0ng_Passw0rd', 'Str0ng Passw0rd', 'member@example.com',
+    'Member@Example1', 'Pässwörd1!', 'Ünïcödé٣x', 'Aa1٣٣٣٣٣', 'Aa1😀aaaa',
+]
+
+
+def messages(password, validate, *args):
+    try:
+        validate(password, *args)
+    except ValidationError as error:
+        return error.messages
+    return []
+
+
+def random_passwords(count, seed=0):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + string.punctuation + ' _éÉßİ٣²½ 😀'
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 14))) for _ in range(count)]
+
+
+class PasswordValidationEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = PasswordValidationEngine()
+        self.user = User(email='member@example.com', first_name='Member')
+
+    def test_validate_matches_django(self):
+        for password in PASSWORDS:
+            with self.subTest(password=password):
+                self.assertEqual(
+                    messages(password, validate_password),
+                    messages(password, django_validation.validate_password),
+                )
+                self.assertEqual(
+                    messages(password, validate_password, self.user),
+                    messages(password, django_validation.validate_password, self.user),
+                )
+
+    def test_validate_many_matches_django(self):
+        passwords = PASSWORDS + PASSWORDS[::-1] + random_passwords(200)
+        results = self.engine.validate_many(passwords)
+        self.assertEqual(len(results), len(passwords))
+        for password, result in zip(passwords, results):
+            with self.subTest(password=password):
+                self.assertEqual(
+                    result.messages if result else [],
+                    messages(password, django_validation.validate_password),
+                )
+
+    def test_validate_many_with_users(self):
+        other = User(email='other@example.com')
+        passwords = ['Member@Example1', 'Member@Example1']
+        results = self.engine.validate_many(passwords, users=[self.user, other])
+        # The same password is checked against each user's attributes.
+        self.assertEqual(results[0].messages, messages(passwords[0], django_validation.validate_password, self.user))
+        self.assertNotEqual(results[0].messages, [])
+        self.assertIsNone(results[1])
+
+
+class StrongPasswordValidatorTests(SimpleTestCase):
+    def test_same_as_the_regex_validator(self):
+        validator, regex_validator = StrongPasswordValidator(), FourScanStrongPasswordValidator()
+        for password in PASSWORDS + random_passwords(2000, seed=1):
+            with self.subTest(password=password):
+                self.assertEqual(
+                    messages(password, validator.validate),
+                    messages(password, regex_validator.validate),
+                )
@@ -0,0 +1,154 @@
+import json
+import threading
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.client import RequestFactory
+
+from users_management import profiling
+from users_management.models import User
+from users_management.profiling import (Sample, SamplingProfiler,
+                                        SamplingProfilerMiddleware, profile)
+
+
+def make_sample(path='/api/users/'):
+    return Sample(RequestFactory().get(path))
+
+
+class SamplingProfilerTests(SimpleTestCase):
+    def setUp(self):
+        # No flusher thread and no exit hook: write() is what is asserted.
+        patcher = mock.patch.object(SamplingProfiler, '_ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sampling(self):
+        self.assertFalse(SamplingProfiler(rate=0).should_sample('/api/users/'))
+        profiler = SamplingProfiler(rate=0.25)
+        with mock.patch.object(profiling.random, 'random', return_value=0.2):
+            self.assertTrue(profiler.should_sample('/api/users/'))
+        with mock.patch.object(profiling.random, 'random', return_value=0.3):
+            self.assertFalse(profiler.should_sample('/api/users/'))
+
+    def test_allowlist(self):
+        profiler = SamplingProfiler(rate=1, allowlist=['/api/users/*', '/api/token/'])
+        self.assertTrue(profiler.should_sample('/api/users/1/'))
+        self.assertTrue(profiler.should_sample('/api/token/'))
+        self.assertFalse(profiler.should_sample('/api/token/refresh/'))
+        self.assertIsNone(profiler.start(RequestFactory().get('/admin/')))
+        self.assertIsInstance(profiler.start(RequestFactory().get('/api/users/')), Sample)
+
+    def test_ring_buffer_drops_the_oldest(self):
+        profiler = SamplingProfiler(rate=1, buffer_size=3, flush_batch=10)
+        samples = [make_sample(f'/api/users/{index}/') for index in range(5)]
+        for sample in samples:
+            profiler.record(sample)
+        self.assertEqual(list(profiler.buffer), samples[2:])
+        self.assertEqual(profiler.dropped, 2)
+
+        with mock.patch.object(profiler, 'write') as write, self.assertLogs(profiling.logger, 'WARNING') as logs:
+            profiler.flush()
+        write.assert_called_once_with(samples[2:])
+        self.assertEqual(logs.output, [f'WARNING:{profiling.__name__}:Profiling buffer full, dropped 2 samples.'])
+        self.assertEqual(profiler.dropped, 0)
+
+    def test_flush_in_batches(self):
+        profiler = SamplingProfiler(rate=1, flush_batch=2)
+        samples = [make_sample() for _ in range(5)]
+        profiler.buffer.extend(samples)
+        with mock.patch.object(profiler, 'write') as write:
+            profiler.flush()
+        self.assertEqual([call.args[0] for call in write.call_args_list], [samples[:2], samples[2:4], samples[4:]])
+        self.assertFalse(profiler.buffer)
+
+    def test_full_batch_wakes_the_flusher(self):
+        profiler = SamplingProfiler(rate=1, flush_batch=2)
+        profiler.record(make_sample())
+        self.assertFalse(profiler._wake.is_set())
+        profiler.record(make_sample())
+        self.assertTrue(profiler._wake.is_set())
+
+
+class FlusherTests(SimpleTestCase):
+    def test_flusher_writes_in_the_background(self):
+        profiler = SamplingProfiler(rate=1, flush_interval=3600, flush_batch=2)
+        written = threading.Event()
+        batches = []
+
+        def write(samples):
+            batches.append(samples)
+            written.set()
+
+        samples = [make_sample(), make_sample()]
+        with mock.patch.object(profiler, 'write', side_effect=write), \
+                mock.patch.object(profiling, 'atexit') as atexit:
+            for sample in samples:
+                profiler.record(sample)
+            self.assertTrue(written.wait(5))
+        self.assertEqual(batches, [samples])
+        # One flusher per process, flushed at exit.
+        self.assertTrue(profiler._flusher.is_alive())
+        atexit.register.assert_called_once_with(profiler.flush)
+
+    def test_flusher_survives_failed_writes(self):
+        profiler = SamplingProfiler(rate=1, flush_interval=3600, flush_batch=1)
+        written = threading.Event()
+        batches = []
+
+        def write(samples):
+            batches.append(samples)
+            written.set()
+            if len(batches) == 1:
+                raise Exception("database is down")
+
+        with mock.patch.object(profiler, 'write', side_effect=write), \
+                mock.patch.object(profiling, 'atexit'), self.assertLogs(profiling.logger, 'ERROR'):
+            profiler.record(make_sample())
+            self.assertTrue(written.wait(5))
+            written.clear()
+            profiler.record(make_sample())
+            self.assertTrue(written.wait(5))
+        self.assertEqual(len(batches), 2)
+
+
+class SamplingProfilerMiddlewareTests(TestCase):
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_ALLOWLIST=['/api/*'])
+    def test_sampled_request(self):
+        @profile(name='Count users')
+        def count_users():
+            return User.objects.count()
+
+        def get_response(request):
+            count_users()
+            return HttpResponse(str(User.objects.count()), content_type='text/plain; charset="utf-8"')
+
+        middleware = SamplingProfilerMiddleware(get_response)
+        with mock.patch.object(middleware.profiler, 'record') as record:
+            middleware(RequestFactory().get('/api/users/', {'page': 2}))
+            middleware(RequestFactory().get('/admin/'))
+        [[sample], _] = record.call_args
+        self.assertEqual((sample.path, sample.query_string, sample.status_code), ('/api/users/', 'page=2', 200))
+        self.assertEqual(len(sample.queries), 2)
+        [(name, func_name, *_, exception_raised, query_range)] = sample.profiles
+        self.assertEqual((name, func_name, exception_raised, query_range), ('Count users', 'count_users', False, range(0, 1)))
+        # Outside the request, nothing is recorded.
+        self.assertIsNone(profiling._current_sample.get())
+
+    @skipUnless(apps.is_installed('silk'), "Silk is not installed (SILK_ENABLED).")
+    def test_write(self):
+        from silk.models import Profile, Response, SQLQuery
+
+        sample = make_sample()
+        sample.duration, sample.status_code = 0.05, 200
+        sample.content_type = 'text/plain; charset="utf-8"'
+        sample.queries = [('SELECT 1', sample.start_time, 0.001), ('SELECT 2', sample.start_time, 0.002)]
+        sample.profiles = [('Get User', 'get_queryset', __file__, 1, sample.start_time, 0.01, False, range(1, 2))]
+        SamplingProfiler().write([sample])
+
+        response = Response.objects.get()
+        self.assertEqual(json.loads(response.encoded_headers), {'content-type': 'text/plain; charset="utf-8"'})
+        self.assertEqual(response.request.num_sql_queries, 2)
+        self.assertEqual(SQLQuery.objects.count(), 2)
+        self.assertEqual(list(Profile.objects.get().queries.values_list('query', flat=True)), ['SELECT 2'])
@@ -0,0 +1,190 @@
+import math
+
+from django.db import connection
+from django.db.models import AutoField
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users_management.authentication import signed_tokens
+from users_management.importers import UserCSVImporter
+from users_management.models import (ImportJob, ImportJobError, User,
+                                     UserSearchTrigram)
+from users_management.referral_cache import referral_code_cache
+from users_management.search import (INDEX_BATCH_SIZE, SEARCH_FIELDS,
+                                     field_trigrams)
+from users_management.tests.utils import (FAST_SETTINGS, PASSWORD,
+                                          create_users, csv_upload,
+                                          run_import_jobs, use_shared_cache)
+
+
+def bulk_insert_queries(model, count, batch_size=None):
+    """
+    Number of INSERTs ``bulk_create()`` of ``count`` new ``model`` rows makes on
+    this database, whose limit on query parameters may cap ``batch_size``.
+    """
+    fields = [field for field in model._meta.concrete_fields if not isinstance(field, AutoField)]
+    max_batch_size = max(connection.ops.bulk_batch_size(fields, [None] * count), 1)
+    batch_size = min(batch_size, max_batch_size) if batch_size else max_batch_size
+    return math.ceil(count / batch_size)
+
+
+@override_settings(**FAST_SETTINGS)
+class QueryBudgetTestCase(TestCase):
+    """
+    Exact number of queries of each users API operation, so an N+1 or an
+    extra round trip fails the build instead of shipping.
+    """
+    def setUp(self):
+        use_shared_cache(self)
+        referral_code_cache.clear()
+        # Fresh, so no budget includes its periodic reload.
+        signed_tokens.revocations.load()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='member@example.com', password=PASSWORD)
+
+    def register(self, email, **data):
+        return self.client.post(
+            reverse('user-list'), {'email': email, 'password': PASSWORD, 'confirm_password': PASSWORD, **data}
+        )
+
+
+class RegistrationQueryTests(QueryBudgetTestCase):
+    def test_register(self):
+        # Email check, insert, and the search index refresh in its savepoint.
+        with self.assertNumQueries(8):
+            response = self.register('new@example.com')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_register_with_referral_code(self):
+        institute = User.objects.create_user(email='institute@example.com', password=PASSWORD, is_institute=True)
+        # Plus the referral code lookup and the referral tree update in its savepoint.
+        with self.assertNumQueries(14):
+            response = self.register('referred@example.com', referral_code=institute.referral_code)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(User.objects.get(email='referred@example.com').recommended_by, institute)
+
+    def test_bulk_register(self):
+        institute = User.objects.create_user(email='institute@example.com', password=PASSWORD, is_institute=True)
+        access = signed_tokens.issue(institute)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        users = [{'email': f'student{index}@example.com', 'password': PASSWORD} for index in range(100)]
+        # The institute flag (not carried by the token), one email check for the
+        # whole batch, then bulk inserts of the users, their referral paths and
+        # search index: per batch, not per user.
+        with self.assertNumQueries(21):
+            response = self.client.post(reverse('user-bulk'), {'users': users}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+
+class LoginQueryTests(QueryBudgetTestCase):
+    def test_get_by_natural_key(self):
+        with self.assertNumQueries(1):
+            User.objects.get_by_natural_key('member@example.com')
+
+    def test_obtain_token(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse('token-obtain'), {'email': 'member@example.com', 'password': PASSWORD}
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+
+
+class UserViewSetQueryTests(QueryBudgetTestCase):
+    def test_retrieve_with_token(self):
+        access = signed_tokens.issue(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        url = reverse('user-detail', args=[self.user.pk])
+        self.client.get(url)
+        # The user's updated_at (the ETag), the profile is served from the token
+        # user; revocations are checked in memory.
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_with_session(self):
+        self.client.force_login(self.user)
+        # The session and the session's user, the profile is served from the latter.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('user-detail', args=[self.user.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_update(self):
+        self.client.force_login(self.user)
+        # Session, session user, the user row, email check, update and the search
+        # index refresh; the password change revokes the user's tokens.
+        with self.assertNumQueries(10):
+            response = self.client.patch(
+                reverse('user-detail', args=[self.user.pk]),
+                {'email': 'renamed@example.com', 'password': PASSWORD, 'confirm_password': PASSWORD},
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_staff_listing_does_not_grow_with_users(self):
+        staff = User.objects.create_user(email='staff@example.com', password=PASSWORD, is_staff=True)
+        self.client.force_login(staff)
+        create_users(5)
+        self.client.get(reverse('user-list'))
+        # Session, count and page; the session's user is cached after the first request.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('user-list'))
+        create_users(50, prefix='more')
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, 200)
+
+
+class AdminImportQueryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password=PASSWORD)
+        self.client.force_login(self.admin)
+
+    def import_csv(self, upload):
+        return self.client.post(reverse('admin:bulk_create_users'), {'csv_file': upload})
+
+    def import_inserts(self, rows):
+        """
+        INSERTs of ``csv_upload(rows)``'s users and their search index, one
+        ``bulk_create()`` of each per chunk.
+        """
+        importer = UserCSVImporter()
+        users = [User(email=f'import{index}@example.com') for index in range(rows)]
+        queries = 0
+        for start in range(0, rows, importer.chunk_size):
+            chunk = users[start:start + importer.chunk_size]
+            trigrams = sum(len(field_trigrams(getattr(user, field) for field in SEARCH_FIELDS)) for user in chunk)
+            queries += bulk_insert_queries(User, len(chunk), importer.batch_size)
+            queries += bulk_insert_queries(UserSearchTrigram, trigrams, INDEX_BATCH_SIZE)
+        return queries
+
+    def test_upload_queues_a_job(self):
+        # Session and admin user, then the job insert, whatever the size of the file.
+        with self.assertNumQueries(3):
+            response = self.import_csv(csv_upload(1000))
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse('admin:import_job_progress', args=[job.pk]))
+        self.assertEqual(job.total_rows, 1000)
+
+    def test_import_1k_rows(self):
+        # Claiming the job, then per chunk a validation pass and an import pass,
+        # plus the bulk inserts, batched as the database allows.
+        self.import_csv(csv_upload(1000))
+        with self.assertNumQueries(23 + self.import_inserts(1000)):
+            run_import_jobs()
+        self.assertEqual(User.objects.filter(email__startswith='import').count(), 1000)
+
+    def test_import_2k_rows(self):
+        # Queries grow with the number of chunks, not rows.
+        self.import_csv(csv_upload(2000))
+        with self.assertNumQueries(36 + self.import_inserts(2000)):
+            run_import_jobs()
+        self.assertEqual(ImportJob.objects.get().status, ImportJob.DONE)
+
+    def test_rejected_import_writes_nothing(self):
+        self.import_csv(csv_upload(1000, referral_code='UNKNOWN'))
+        # The validation pass, then every rejected row's error.
+        with self.assertNumQueries(14 + bulk_insert_queries(ImportJobError, 1000)):
+            run_import_jobs()
+        self.assertEqual(ImportJob.objects.get().status, ImportJob.FAILED)
+        self.assertFalse(User.objects.filter(email__startswith='import').exists())
@@ -0,0 +1,105 @@
+import datetime
+import decimal
+import uuid
+
+from django.test import TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework import viewsets
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from users_management.models import User
+from users_management.pagination import UserCursorPagination
+from users_management.renderers import FastJSONRenderer
+from users_management.serializers import UserSerializer
+from users_management.tests.utils import FAST_SETTINGS, create_users
+from users_management.views import UserViewSet
+
+
+class FastJSONRendererTests(TestCase):
+    def assertSameBytes(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_same_bytes_as_json_renderer(self):
+        self.assertSameBytes({
+            'text': 'Ünïcødé "quoted" \\ \n \t \x00     😀',
+            'numbers': [0, -1, 2 ** 63 - 1, True, False, None],
+            'nested': {'list': [{'a': []}, {}], 'tuple': (1, 2)},
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'datetime': datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2024, 1, 2),
+            'time': datetime.time(3, 4, 5, 678901),
+            'duration': datetime.timedelta(days=1, seconds=5),
+            'decimal': decimal.Decimal('1.10'),
+            'error': ErrorDetail('Invalid.', code='invalid'),
+            'lazy': gettext_lazy('This field is required.'),
+        })
+
+    def test_falls_back_for_what_orjson_cannot_encode(self):
+        self.assertSameBytes({'big': 2 ** 70})
+        self.assertSameBytes({1: 'int key'})
+        self.assertSameBytes({'a': [1, 2]}, 'application/json; indent=4')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class SerializerUserViewSet(UserViewSet):
+    """
+    The users API as served through ``UserSerializer`` and ``JSONRenderer``.
+    """
+    renderer_classes = [JSONRenderer]
+    list = viewsets.ModelViewSet.list
+    retrieve = viewsets.ModelViewSet.retrieve
+
+
+class CursorUserViewSet(UserViewSet):
+    pagination_class = UserCursorPagination
+
+
+class SerializerCursorUserViewSet(SerializerUserViewSet):
+    pagination_class = UserCursorPagination
+
+
+@override_settings(**FAST_SETTINGS)
+class ReadPathTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.staff = User.objects.create_user(email='staff@example.com', password='!', is_staff=True)
+        create_users(25)
+        User.objects.create_user(email='ünïcødé@exämple.com', password='!')
+
+    def render(self, viewset, action, path, **kwargs):
+        request = self.factory.get(path)
+        force_authenticate(request, self.staff)
+        response = viewset.as_view({'get': action})(request, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response.render().content
+
+    def assertSameResponse(self, viewset, legacy_viewset, action, path, **kwargs):
+        content = self.render(viewset, action, path, **kwargs)
+        self.assertEqual(content, self.render(legacy_viewset, action, path, **kwargs))
+        return content
+
+    def test_list(self):
+        for path in ('/users/', '/users/?page=2', '/users/?search=user1'):
+            with self.subTest(path=path):
+                self.assertSameResponse(UserViewSet, SerializerUserViewSet, 'list', path)
+
+    def test_cursor_list(self):
+        content = self.assertSameResponse(CursorUserViewSet, SerializerCursorUserViewSet, 'list', '/users/?count=true')
+        self.assertIn('ünïcødé@exämple.com'.encode(), content)
+
+    def test_retrieve(self):
+        for user in (self.staff, User.objects.get(email='user3@example.com')):
+            with self.subTest(user=user.email):
+                self.assertSameResponse(UserViewSet, SerializerUserViewSet, 'retrieve', '/users/', pk=user.pk)
+
+    def test_read_fields_match_serializer(self):
+        user = User.objects.get(email='user3@example.com')
+        self.assertEqual(
+            self.render(UserViewSet, 'retrieve', '/users/', pk=user.pk),
+            JSONRenderer().render(UserSerializer(user).data),
+        )
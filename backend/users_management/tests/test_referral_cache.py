@@ -0,0 +1,89 @@
+import time
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from users_management.models import User
+from users_management.referral_cache import (ReferralCodeCache,
+                                             referral_code_cache)
+from users_management.tests.utils import (FAST_SETTINGS, PASSWORD,
+                                          use_shared_cache)
+
+
+@override_settings(**FAST_SETTINGS)
+class ReferralCodeCacheTests(TestCase):
+    def setUp(self):
+        self.cache = ReferralCodeCache()
+        self.institute = User.objects.create_user(email='institute@example.com', password=PASSWORD, is_institute=True)
+        self.code = self.institute.referral_code
+
+    def test_lookup(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.resolve(self.code), self.institute.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.resolve(self.code), self.institute.pk)
+
+    def test_many_codes_in_bounded_queries(self):
+        other = User.objects.create_user(email='other@example.com', password=PASSWORD, is_institute=True)
+        codes = [self.code, other.referral_code, 'UNKNOWN']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.resolve_many(codes), {self.code: self.institute.pk, other.referral_code: other.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.cache.resolve_many(codes)), 2)
+
+    def test_unknown_codes_are_cached(self):
+        self.assertIsNone(self.cache.resolve('UNKNOWN'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.cache.resolve('UNKNOWN'))
+        # Students have no valid code either.
+        student = User.objects.create_user(email='student@example.com', password=PASSWORD, referral_code='STUDENT')
+        self.assertIsNone(self.cache.resolve(student.referral_code))
+
+    def test_invalidate(self):
+        self.cache.resolve('NEWCODE')
+        self.cache.invalidate('NEWCODE')
+        institute = User.objects.create_user(email='new@example.com', password=PASSWORD, is_institute=True)
+        User.objects.filter(pk=institute.pk).update(referral_code='NEWCODE')
+        self.assertEqual(self.cache.resolve('NEWCODE'), institute.pk)
+
+    def test_local_entries_time_out(self):
+        cache = ReferralCodeCache(timeout=0.01)
+        cache.resolve(self.code)
+        # Another process removed the institute flag: this process was not told.
+        User.objects.filter(pk=self.institute.pk).update(is_institute=False)
+        self.assertEqual(cache.resolve(self.code), self.institute.pk)
+        time.sleep(0.02)
+        self.assertIsNone(cache.resolve(self.code))
+
+    def test_shared_tier(self):
+        use_shared_cache(self)
+        cache, other_process = ReferralCodeCache(alias='default'), ReferralCodeCache(alias='default')
+        cache.resolve(self.code)
+        self.assertEqual(caches['default'].get(cache.key_prefix + self.code), self.institute.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(other_process.resolve(self.code), self.institute.pk)
+            self.assertEqual(other_process.resolve(self.code), self.institute.pk)
+        cache.invalidate(self.code)
+        self.assertIsNone(caches['default'].get(cache.key_prefix + self.code))
+
+    def test_shared_invalidation_reaches_other_processes(self):
+        use_shared_cache(self)
+        cache, other_process = ReferralCodeCache(alias='default'), ReferralCodeCache(alias='default')
+        other_process.resolve(self.code)
+        User.objects.filter(pk=self.institute.pk).update(is_institute=False)
+        cache.invalidate(self.code)
+        # The local entry of the other process is dropped as the shared version changed.
+        with self.assertNumQueries(1):
+            self.assertIsNone(other_process.resolve(self.code))
+
+    def test_signals_invalidate(self):
+        referral_code_cache.clear()
+        self.assertEqual(referral_code_cache.resolve(self.code), self.institute.pk)
+        self.institute.is_institute = False
+        self.institute.save()
+        self.assertIsNone(referral_code_cache.resolve(self.code))
+        self.assertIsNone(referral_code_cache.resolve('UNKNOWN'))
+        self.institute.is_institute = True
+        self.institute.referral_code = 'UNKNOWN'
+        self.institute.save()
+        self.assertEqual(referral_code_cache.resolve('UNKNOWN'), self.institute.pk)
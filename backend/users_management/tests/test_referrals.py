@@ -0,0 +1,118 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users_management.models import ReferralPath, ReferralStats, User
+from users_management.tests.utils import FAST_SETTINGS, PASSWORD
+
+JOINED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@override_settings(**FAST_SETTINGS)
+class ReferralTreeTests(TestCase):
+    """
+    The closure table, the counters and the stats endpoint, against the tree
+    recomputed from ``recommended_by`` after every change.
+    """
+    def setUp(self):
+        # a ─┬─ b ─┬─ d ── f
+        #    │     └─ e
+        #    └─ c ── g
+        self.users = {}
+        for day, (name, parent) in enumerate([
+            ('a', None), ('b', 'a'), ('c', 'a'), ('d', 'b'), ('e', 'b'), ('f', 'd'), ('g', 'c'),
+        ]):
+            self.users[name] = User.objects.create_user(
+                email=f'{name}@example.com', password=PASSWORD,
+                recommended_by=self.users.get(parent), date_joined=JOINED + timedelta(days=day),
+            )
+        staff = User.objects.create_user(email='staff@example.com', password=PASSWORD, is_staff=True)
+        self.client = APIClient()
+        self.client.force_login(staff)
+
+    def recompute(self):
+        """
+        ``{(ancestor, descendant): depth}`` of the tree, from ``recommended_by``.
+        """
+        parents = dict(User.objects.values_list('pk', 'recommended_by_id'))
+        paths = {}
+        for user_id in parents:
+            ancestor_id, depth = parents[user_id], 1
+            while ancestor_id is not None:
+                paths[ancestor_id, user_id] = depth
+                ancestor_id, depth = parents[ancestor_id], depth + 1
+        return paths
+
+    def assertTreeConsistent(self):
+        paths = self.recompute()
+        self.assertEqual(
+            {(ancestor, descendant): depth for ancestor, descendant, depth
+             in ReferralPath.objects.values_list('ancestor_id', 'descendant_id', 'depth')},
+            paths,
+        )
+        direct = Counter(ancestor for (ancestor, _), depth in paths.items() if depth == 1)
+        total = Counter(ancestor for ancestor, _ in paths)
+        counters = {user_id: (direct_count, total_count) for user_id, direct_count, total_count
+                    in ReferralStats.objects.values_list('user_id', 'direct_count', 'total_count')}
+        for user_id in User.objects.values_list('pk', flat=True):
+            self.assertEqual(counters.get(user_id, (0, 0)), (direct[user_id], total[user_id]), user_id)
+        for user in User.objects.filter(email__in=[f'{name}@example.com' for name in 'abcdefg']):
+            self.assertStats(user, paths)
+
+    def assertStats(self, user, paths):
+        joined = dict(User.objects.values_list('pk', 'date_joined'))
+        descendants = {descendant: depth for (ancestor, descendant), depth in paths.items() if ancestor == user.pk}
+        totals = Counter(ancestor for ancestor, _ in paths)
+        since = JOINED + timedelta(days=4)
+        for query, expected_count in [
+            ({}, len(descendants)),
+            ({'depth': 1}, sum(depth == 1 for depth in descendants.values())),
+            ({'since': since.isoformat()}, sum(joined[pk] >= since for pk in descendants)),
+        ]:
+            with self.subTest(user=user.email, query=query):
+                response = self.client.get(reverse('user-referral-stats', args=[user.pk]), query)
+                self.assertEqual(response.status_code, 200, response.data)
+                self.assertEqual(response.data['direct'], sum(depth == 1 for depth in descendants.values()))
+                self.assertEqual(response.data['total'], len(descendants))
+                self.assertEqual(response.data['count'], expected_count)
+                candidates = [pk for pk, depth in descendants.items()
+                              if totals[pk] and ('depth' not in query or depth <= query['depth'])]
+                self.assertEqual(
+                    [referrer['id'] for referrer in response.data['top_referrers']],
+                    sorted(candidates, key=lambda pk: (-totals[pk], pk)),
+                )
+
+    def test_created(self):
+        self.assertTreeConsistent()
+        self.assertEqual(len(self.recompute()), 11)
+
+    def test_move_user_with_descendants(self):
+        b = self.users['b']
+        b.recommended_by = self.users['c']
+        b.save()
+        self.assertTreeConsistent()
+        self.assertEqual(ReferralPath.objects.get(ancestor=self.users['a'], descendant=self.users['f']).depth, 4)
+
+    def test_detach_user_with_descendants(self):
+        d = self.users['d']
+        d.recommended_by = None
+        d.save()
+        self.assertTreeConsistent()
+        self.assertFalse(ReferralPath.objects.filter(descendant=self.users['f'], ancestor=self.users['a']).exists())
+
+    def test_delete_mid_tree_user(self):
+        self.users['d'].delete()
+        self.assertTreeConsistent()
+        # The deleted user's referrals become roots.
+        self.assertIsNone(User.objects.get(pk=self.users['f'].pk).recommended_by_id)
+        self.assertEqual(ReferralStats.objects.get(user=self.users['a']).total_count, 4)
+
+    def test_cycles_are_rejected(self):
+        a = self.users['a']
+        a.recommended_by = self.users['f']
+        with self.assertRaisesMessage(ValidationError, "cannot be recommended by themselves or their own referrals"):
+            a.full_clean()
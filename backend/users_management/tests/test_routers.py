@@ -0,0 +1,125 @@
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.client import RequestFactory
+
+from sharma_academy.routers import (PrimaryReplicaRouter,
+                                    ReplicaPinningMiddleware, set_request_user,
+                                    use_primary)
+from users_management.backends import CachedModelBackend
+from users_management.models import User
+from users_management.tests.utils import FAST_SETTINGS, PASSWORD
+
+
+@override_settings(REPLICA_PIN_SECONDS=15, REPLICA_PIN_COOKIE='db_primary')
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter(replicas=['replica1'])
+        self.factory = RequestFactory()
+
+    def through_middleware(self, request, view):
+        middleware = ReplicaPinningMiddleware(view)
+        # As with DATABASE_REPLICA_URLS set.
+        middleware.pin_users = True
+        return middleware(request)
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(User), 'replica1')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_without_replicas_everything_uses_primary(self):
+        self.assertEqual(PrimaryReplicaRouter(replicas=[]).db_for_read(User), 'default')
+
+    def test_reads_in_a_transaction_use_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_use_primary(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+            self.assertEqual(self.router.db_for_read(User, replica_ok=True), 'replica1')
+        self.assertEqual(self.router.db_for_read(User), 'replica1')
+
+    def test_only_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'users_management'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'users_management'))
+
+    def test_unsafe_request_reads_primary(self):
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        self.through_middleware(self.factory.get('/'), view)
+        self.through_middleware(self.factory.post('/'), view)
+        self.assertEqual(reads, ['replica1', 'default'])
+
+    def test_write_pins_client_to_primary(self):
+        def write(request):
+            self.router.db_for_write(User)
+            return HttpResponse(status=201)
+
+        response = self.through_middleware(self.factory.post('/'), write)
+        cookie = response.cookies['db_primary']
+        self.assertEqual(cookie['max-age'], 15)
+
+        reads = []
+
+        def read(request):
+            reads.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        request = self.factory.get('/')
+        request.COOKIES['db_primary'] = cookie.value
+        response = self.through_middleware(request, read)
+        self.assertNotIn('db_primary', response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES['db_primary'] = str(int(time.time()) - 1)
+        self.through_middleware(request, read)
+        self.assertEqual(reads, ['default', 'replica1'])
+
+    def test_failed_write_request_does_not_pin(self):
+        response = self.through_middleware(self.factory.post('/'), lambda request: HttpResponse(status=400))
+        self.assertNotIn('db_primary', response.cookies)
+
+    def test_write_pins_user_to_primary(self):
+        caches['default'].clear()
+
+        def write(request):
+            set_request_user(7)
+            self.router.db_for_write(User)
+            return HttpResponse(status=201)
+
+        self.through_middleware(self.factory.post('/'), write)
+
+        reads = []
+
+        def read_as(user_id):
+            def read(request):
+                reads.append(self.router.db_for_read(User))
+                set_request_user(user_id)
+                reads.append(self.router.db_for_read(User))
+                return HttpResponse()
+            return read
+
+        # Another client of the same user, without the cookie, once authenticated.
+        self.through_middleware(self.factory.get('/'), read_as(7))
+        self.through_middleware(self.factory.get('/'), read_as(8))
+        self.assertEqual(reads, ['replica1', 'default', 'replica1', 'replica1'])
+
+
+@override_settings(**FAST_SETTINGS)
+class PrimaryLoaderTests(TestCase):
+    def test_cache_misses_are_loaded_from_primary(self):
+        user = User.objects.create_user(email='member@example.com', password=PASSWORD)
+        # The replica does not exist: loading from it would fail.
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', return_value='replica1'):
+            self.assertEqual(CachedModelBackend().get_user(user.pk), user)
@@ -0,0 +1,94 @@
+from importlib import import_module
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users_management import search
+from users_management.models import User, UserSearchTrigram
+from users_management.tests.utils import (FAST_SETTINGS, PASSWORD,
+                                          create_users)
+
+
+@override_settings(**FAST_SETTINGS)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.john = User.objects.create_user(email='john.smith@example.com', password=PASSWORD, first_name='John')
+        self.jane = User.objects.create_user(email='jane@example.org', password=PASSWORD, last_name='Johnson')
+        self.institute = User.objects.create_user(email='academy@example.com', password=PASSWORD, is_institute=True)
+        self.staff = User.objects.create_user(email='staff@example.org', password=PASSWORD, is_staff=True)
+
+    def search(self, term):
+        return set(search.search_users(User.objects.all(), term))
+
+    def test_trigrams(self):
+        self.assertEqual(search.trigrams('Jo'), {'  j', ' jo', 'jo '})
+        self.assertEqual(search.trigrams('John', pad=False), {'joh', 'ohn'})
+
+    def test_migration_builds_the_same_index(self):
+        migration = import_module('users_management.migrations.0004_user_search_trigram')
+        self.assertEqual(migration.SEARCH_FIELDS, search.SEARCH_FIELDS)
+        values = ['john.smith@example.com', 'John', '', None, 'Student']
+        self.assertEqual(migration.field_trigrams(values), search.field_trigrams(values))
+
+    def test_search_users(self):
+        self.assertEqual(self.search('john'), {self.john, self.jane})
+        self.assertEqual(self.search('JOHN smith'), {self.john})
+        # Short words match the start of a field only.
+        self.assertEqual(self.search('ja'), {self.jane})
+        self.assertEqual(self.search('hn'), set())
+        self.assertEqual(self.search('institute'), {self.institute})
+        self.assertEqual(self.search('.org'), {self.jane, self.staff})
+        # Having every trigram of a word is not containing it.
+        self.assertEqual(self.search('johnsmith'), set())
+
+    def test_index_follows_changes(self):
+        self.john.first_name = 'Jonathan'
+        self.john.save()
+        self.assertEqual(self.search('jonathan'), {self.john})
+        self.john.delete()
+        self.assertEqual(self.search('jonathan'), set())
+        self.assertFalse(UserSearchTrigram.objects.filter(user_id=self.john.pk).exists())
+
+    def test_selective_trigrams(self):
+        search.index_users(create_users(5, prefix='common'))
+        with mock.patch.object(search, 'SELECTIVE', 3):
+            # The three rarest, as soon as three rare ones are found.
+            selective = search._selective_trigrams(search.trigrams('john', pad=False) | {'com'})
+        self.assertEqual(set(selective), {'joh', 'ohn', 'com'})
+        with mock.patch.object(search, 'RARITY_SAMPLE', 5):
+            self.assertIsNone(search._selective_trigrams({'com', 'omm'}))
+            # Rarest first.
+            self.assertEqual(search._selective_trigrams({'com', 'joh'}), ['joh', 'com'])
+
+    def test_selective_trigrams_query_cap(self):
+        term_trigrams = search.trigrams('abcdefghijklmnopqrstuvwxyz', pad=False)
+        # No trigram is rare enough to stop early.
+        with mock.patch.object(search, 'SELECTIVE', 0), self.assertNumQueries(search.MAX_COUNTED_TRIGRAMS):
+            search._selective_trigrams(term_trigrams)
+
+    def test_filter(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.get(reverse('user-list'), {'search': 'john'})
+        self.assertEqual(
+            sorted(user['email'] for user in response.json()['results']),
+            ['jane@example.org', 'john.smith@example.com'],
+        )
+        self.assertEqual(len(client.get(reverse('user-list'), {'search': ' '}).json()['results']), 4)
+
+    def test_admin_search(self):
+        model_admin = site._registry[User]
+        request = RequestFactory().get('/')
+        queryset, may_have_duplicates = model_admin.get_search_results(request, User.objects.all(), 'john')
+        self.assertEqual(set(queryset), {self.john, self.jane})
+        self.assertFalse(may_have_duplicates)
+        queryset, _ = model_admin.get_search_results(request, User.objects.all(), '  ')
+        self.assertEqual(queryset.count(), 4)
+        # The recommended_by autocomplete only offers institutes.
+        request = RequestFactory().get('/', {'field_name': 'recommended_by'})
+        queryset, _ = model_admin.get_search_results(request, User.objects.all(), 'example')
+        self.assertEqual(set(queryset), {self.institute})
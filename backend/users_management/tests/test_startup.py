@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from phonenumber_field.formfields import \
+    PhoneNumberField as PhoneNumberFormField
+from phonenumber_field.modelfields import \
+    PhoneNumberField as OriginalPhoneNumberField
+from phonenumber_field.phonenumber import PhoneNumber
+
+from users_management.models import User
+from users_management.tests.utils import FAST_SETTINGS
+
+
+@override_settings(**FAST_SETTINGS)
+class PhoneNumberFieldTests(TestCase):
+    def test_values(self):
+        user = User.objects.create_user(email='phone@example.com', password='!', phone_number='+1 415 555 2671')
+        self.assertIsInstance(user.phone_number, PhoneNumber)
+        self.assertEqual(User.objects.values_list('phone_number', flat=True).get(pk=user.pk), '+14155552671')
+        user.refresh_from_db()
+        self.assertEqual(user.phone_number, PhoneNumber.from_string('+14155552671'))
+
+        user.phone_number = 'not a number'
+        user.save()
+        user.refresh_from_db()
+        self.assertEqual(user.phone_number.raw_input, 'not a number')
+
+        user.phone_number = None
+        user.save()
+        self.assertIsNone(User.objects.get(pk=user.pk).phone_number)
+        self.assertEqual(User.objects.get(phone_number__isnull=True), user)
+
+    def test_same_as_original_field(self):
+        field = User._meta.get_field('phone_number')
+        original = OriginalPhoneNumberField(unique=True, blank=True, null=True)
+        original.set_attributes_from_name('phone_number')
+        self.assertEqual(field.deconstruct(), original.deconstruct())
+        self.assertIsInstance(field.formfield(), PhoneNumberFormField)
+        # Migrations still refer to phonenumber_field's field, and need no change.
+        call_command('makemigrations', 'users_management', check=True, dry_run=True, stdout=StringIO())
+
+
+class StartupTests(SimpleTestCase):
+    def run_python(self, code, **environment):
+        return subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE, **environment},
+        ).stdout
+
+    def test_disabled_tooling_is_not_imported(self):
+        output = self.run_python(
+            "import sys\n"
+            "import sharma_academy.wsgi\n"
+            "print(sorted({name.partition('.')[0] for name in sys.modules} & {'phonenumbers', 'silk', 'drf_spectacular'}))\n"
+            "print('users_management.views' in sys.modules)\n",
+            API_SCHEMA_ENABLED='false', SILK_ENABLED='false',
+        )
+        # The URLconf and the views are loaded, not the phone number metadata or the disabled apps.
+        self.assertEqual(output.split(), ['[]', 'True'])
+
+    def test_profile_startup(self):
+        stdout = StringIO()
+        call_command('profile_startup', 'wsgi', repeat=1, top=5, memory=False, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn('sharma_academy.wsgi:', output)
+        self.assertRegex(output, r'\ndjango +\d+ +[\d.]+ +0\n')
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from users_management.throttling import (AnonRateThrottle,
+                                         SlidingWindowStore, get_store)
+
+
+def _hammer(path, barrier, key, limit, attempts, now, results):
+    store = SlidingWindowStore(path)
+    barrier.wait()
+    results.put(sum(store.hit(key, limit, 3600, now)[0] for _ in range(attempts)))
+
+
+class SlidingWindowStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'throttle.sqlite3')
+        self.store = SlidingWindowStore(self.path)
+
+    def test_limit_is_exact_across_processes(self):
+        processes, limit, attempts = 8, 50, 25
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(processes)
+        results = context.Queue()
+        workers = [
+            context.Process(target=_hammer, args=(self.path, barrier, 'client', limit, attempts, 1800.0, results))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        allowed = sum(results.get(timeout=60) for _ in workers)
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(allowed, limit)
+        self.assertFalse(self.store.hit('client', limit, 3600, 1800.0)[0])
+
+    def test_buckets_slide_out(self):
+        # Ten buckets of 10 seconds.
+        self.store.buckets = 10
+        for _ in range(5):
+            self.assertTrue(self.store.hit('client', 10, 100, 50.0)[0])
+        for _ in range(5):
+            self.assertTrue(self.store.hit('client', 10, 100, 120.0)[0])
+        allowed, wait = self.store.hit('client', 10, 100, 155.0)
+        self.assertFalse(allowed)
+        # The bucket [50, 60) counts until the window no longer touches it.
+        self.assertAlmostEqual(wait, 5.0)
+
+        for _ in range(5):
+            self.assertTrue(self.store.hit('client', 10, 100, 160.0)[0])
+        allowed, wait = self.store.hit('client', 10, 100, 160.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 70.0)
+        # Old buckets are deleted as the window moves on.
+        self.assertEqual(self.store.connection.execute('SELECT COUNT(*) FROM throttle_buckets').fetchone(), (2,))
+
+    def test_limit_holds_over_any_window(self):
+        limit, duration = 5, 60
+        allowed = [now / 10 for now in range(0, 3000, 7) if self.store.hit('client', limit, duration, now / 10)[0]]
+        self.assertTrue(allowed)
+        for index, start in enumerate(allowed):
+            self.assertLessEqual(sum(1 for time in allowed[index:] if time < start + duration), limit)
+
+    def test_keys_are_independent(self):
+        self.assertTrue(self.store.hit('a', 1, 60, 0.0)[0])
+        self.assertFalse(self.store.hit('a', 1, 60, 0.0)[0])
+        self.assertTrue(self.store.hit('b', 1, 60, 0.0)[0])
+
+
+class AnonRateThrottleTests(SimpleTestCase):
+    def test_throttles_with_configured_rate(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            THROTTLE_STORE_PATH=os.path.join(directory, 'throttle.sqlite3'),
+            REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'anon': '3/min'}},
+        ):
+            request = APIView().initialize_request(APIRequestFactory().get('/'))
+            results = [AnonRateThrottle().allow_request(request, None) for _ in range(4)]
+            self.assertEqual(results, [True, True, True, False])
+            get_store().clear()
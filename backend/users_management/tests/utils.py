@@ -0,0 +1,67 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from users_management.caching import user_cache
+from users_management.jobs import work
+from users_management.models import User
+
+PASSWORD = 'Str0ng!Passw0rd'
+
+# Throttle counters of the test run, kept out of the shared store.
+THROTTLE_DIRECTORY = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, THROTTLE_DIRECTORY, ignore_errors=True)
+
+# Cheap hashing and no rate limits, so tests measure the code rather than PBKDF2 or the throttle.
+FAST_SETTINGS = {
+    'THROTTLE_STORE_PATH': os.path.join(THROTTLE_DIRECTORY, 'throttle.sqlite3'),
+    'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+    'REST_FRAMEWORK': {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'anon': None, 'user': None, 'user_batch': None}},
+}
+
+
+def use_shared_cache(test):
+    """
+    Make the default cache a file based one, shared like Redis would be, and
+    enable the user cache on it for the duration of ``test``.
+    """
+    directory = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    shared = override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory},
+    })
+    shared.enable()
+    test.addCleanup(shared.disable)
+    test.addCleanup(setattr, user_cache, 'alias', user_cache.alias)
+    user_cache.alias = 'default'
+
+
+def create_users(count, prefix='user', **fields):
+    """
+    Create ``count`` users with one ``bulk_create``, ``<prefix><n>@example.com``.
+    """
+    return User.objects.bulk_create(
+        User(email=f'{prefix}{index}@example.com', password='!', **fields) for index in range(count)
+    )
+
+
+def csv_upload(rows, name='users.csv', referral_code=''):
+    """
+    A CSV upload of ``rows`` new users for the admin bulk import.
+    """
+    lines = ['email,referral_code,password']
+    lines += [f'import{index}@example.com,{referral_code},{PASSWORD}{index}' for index in range(rows)]
+    return SimpleUploadedFile(name, ('\n'.join(lines) + '\n').encode(), content_type='text/csv')
+
+
+def run_import_jobs(worker='test-worker'):
+    """
+    Run the queued import jobs in this thread, like ``manage.py run_workers --once``.
+    """
+    work(worker, threading.Event(), once=True)
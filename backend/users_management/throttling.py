@@ -0,0 +1,171 @@
+import os
+import random
+import sqlite3
+import threading
+
+from django.conf import settings
+from rest_framework import throttling
+from rest_framework.settings import api_settings
+
+from users_management.metrics import registry
+
+
+class SlidingWindowStore:
+    """
+    Sliding-window request counters shared by every process on the host.
+
+    The window of each throttle key is split into ``buckets`` sub-windows of
+    ``duration / buckets`` seconds, one row per bucket holding its request
+    count. A request is allowed when the buckets overlapping the last
+    ``duration`` seconds, including the oldest one only partly inside it,
+    hold fewer than ``limit`` requests. The limit is therefore never
+    exceeded over any ``duration`` seconds; the price is that a client can be
+    refused for up to one bucket (``duration / buckets``) longer than a
+    timestamp log would refuse it. A hit sums and bumps at most
+    ``buckets + 1`` rows inside a ``BEGIN IMMEDIATE`` transaction on a SQLite
+    database in WAL mode, so checking and counting a request is O(1) and
+    atomic across worker processes, whatever the rate. Rows of idle keys are
+    pruned now and then.
+    """
+    buckets = 20
+    prune_probability = 0.001
+
+    def __init__(self, path, timeout=5.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # Connections are per thread and must not be inherited by forked workers.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle_buckets ('
+                ' key TEXT NOT NULL,'
+                ' bucket INTEGER NOT NULL,'
+                ' count INTEGER NOT NULL,'
+                ' expires REAL NOT NULL,'
+                ' PRIMARY KEY (key, bucket)'
+                ') WITHOUT ROWID'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def hit(self, key, limit, duration, now):
+        """
+        Count a request for ``key`` if fewer than ``limit`` were made in the last
+        ``duration`` seconds.
+
+        Return ``(allowed, wait)``, ``wait`` being the number of seconds until
+        the next request would be allowed (``None`` when this one was).
+        """
+        width = duration / self.buckets
+        bucket = int(now // width)
+        oldest = bucket - self.buckets
+
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            counts = connection.execute(
+                'SELECT bucket, count FROM throttle_buckets WHERE key = ? AND bucket >= ? ORDER BY bucket',
+                (key, oldest),
+            ).fetchall()
+            total = sum(count for _, count in counts)
+            allowed = total + 1 <= limit
+            if allowed:
+                connection.execute(
+                    'INSERT INTO throttle_buckets (key, bucket, count, expires) VALUES (?, ?, 1, ?)'
+                    ' ON CONFLICT (key, bucket) DO UPDATE SET count = count + 1',
+                    (key, bucket, (bucket + self.buckets + 1) * width),
+                )
+                connection.execute('DELETE FROM throttle_buckets WHERE key = ? AND bucket < ?', (key, oldest))
+            if random.random() < self.prune_probability:
+                connection.execute('DELETE FROM throttle_buckets WHERE expires < ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+        if allowed:
+            return True, None
+        return False, self._wait(limit, width, now, total, counts)
+
+    def _wait(self, limit, width, now, total, counts):
+        # The oldest buckets stop counting one after the other, until the rest leave room for a request.
+        for bucket, count in counts:
+            total -= count
+            if total + 1 <= limit:
+                return max(0.0, (bucket + self.buckets + 1) * width - now)
+        return 0.0
+
+    def clear(self):
+        self.connection.execute('DELETE FROM throttle_buckets')
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Return the store at ``settings.THROTTLE_STORE_PATH``.
+    """
+    global _store
+    path = str(settings.THROTTLE_STORE_PATH)
+    if _store is None or _store.path != path:
+        with _store_lock:
+            if _store is None or _store.path != path:
+                _store = SlidingWindowStore(path)
+    return _store
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Count requests in the shared ``SlidingWindowStore`` instead of storing a
+    list of timestamps per client in the Django cache.
+
+    Scopes, rates and cache keys are those of the DRF throttle it is mixed into;
+    rates are read from the current ``REST_FRAMEWORK`` settings on every request.
+    """
+    @property
+    def THROTTLE_RATES(self):
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self._wait = get_store().hit(self.key, self.num_requests, self.duration, self.timer())
+        if not allowed:
+            resolver_match = getattr(request, 'resolver_match', None)
+            registry.increment(
+                'throttle_rejections_total', scope=self.scope,
+                view=resolver_match.view_name if resolver_match is not None else 'unmatched',
+            )
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class BatchRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    """
+    Throttle batch registrations per call rather than per user in the batch.
+    """
+    scope = 'user_batch'
@@ -1,11 +1,17 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from users_management.views import UserViewSet
+from users_management.views import (AsyncUserViewSet, TokenObtainView,
+                                    TokenRefreshView, TokenRevokeView,
+                                    UserViewSet)
 
 router = DefaultRouter()
-router.register(r'users', UserViewSet, basename='user')
+router.register(r'users', AsyncUserViewSet if settings.USERS_ASYNC_VIEWS else UserViewSet, basename='user')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('token/', TokenObtainView.as_view(), name='token-obtain'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('token/revoke/', TokenRevokeView.as_view(), name='token-revoke'),
 ]
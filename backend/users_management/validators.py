@@ -1,20 +1,29 @@
-import re
+import string
 
 from django.core.exceptions import ValidationError
 
+UPPERCASE = frozenset(string.ascii_uppercase)
+LOWERCASE = frozenset(string.ascii_lowercase)
+DIGITS = frozenset(string.digits)
+
 
 class StrongPasswordValidator:
     def __init__(self, min_length=8):
         self.min_length = min_length
 
     def validate(self, password, user=None):
-        if not re.search(r'[A-Z]', password):
+        # Collect the distinct characters in one pass and test each class
+        # against that set. A character is special (regex [\W_]) exactly when
+        # it is not alphanumeric, which str.isalnum() answers for the whole
+        # password at once.
+        characters = set(password)
+        if UPPERCASE.isdisjoint(characters):
             raise ValidationError("Password must contain at least one uppercase letter.")
-        if not re.search(r'[a-z]', password):
+        if LOWERCASE.isdisjoint(characters):
             raise ValidationError("Password must contain at least one lowercase letter.")
-        if not re.search(r'[0-9]', password):
+        if DIGITS.isdisjoint(characters):
             raise ValidationError("Password must contain at least one numeric character.")
-        if not re.search(r'[\W_]', password):
+        if password.isalnum():
             raise ValidationError("Password must contain at least one special character.")
     
     def get_help_text(self):
@@ -1,13 +1,41 @@
 import logging
 
-from rest_framework import permissions, viewsets
-from rest_framework.exceptions import PermissionDenied
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, IntegrityError
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import (AuthenticationFailed, PermissionDenied,
+                                       ValidationError)
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.throttling import AnonRateThrottle
-from silk.profiling.profiler import silk_profile
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from users_management.authentication import (REFRESH_TOKEN,
+                                             SignedTokenAuthentication,
+                                             signed_tokens)
+from users_management.caching import user_cache
+from users_management.exports import export_response
+from users_management.importers import register_batch
 from users_management.models import User
-from users_management.serializers import UserSerializer
+from users_management.pagination import UserCursorPagination
+from users_management.permissions import IsInstitute
+from users_management.profiling import profile
+from users_management.referrals import referral_stats
+from users_management.search import UserSearchFilter
+from users_management.serializers import (BulkUserSerializer,
+                                          ExportQuerySerializer,
+                                          ReferralStatsQuerySerializer,
+                                          TokenObtainSerializer,
+                                          TokenRefreshSerializer,
+                                          UserSerializer, user_reader)
+from users_management.throttling import AnonRateThrottle, BatchRateThrottle
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +46,15 @@ class UserViewSet(viewsets.ModelViewSet):
     - Retrieve: Only current user.
     - Update: Only current user.
     - Delete: Admin users only.
+    - List: ``?search=`` finds users by email, name or user type.
+    - Referral stats: Only current user (admins: any user).
+    - Export: Admin users only, streamed as CSV or JSONL.
+    - Bulk: Institutes register a batch of users they recommend.
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = UserCursorPagination if settings.USERS_PAGINATION == 'cursor' else PageNumberPagination
+    filter_backends = [UserSearchFilter]
 
     def get_permissions(self):
         """
@@ -30,13 +63,16 @@ class UserViewSet(viewsets.ModelViewSet):
         if self.action == 'create':
             self.throttle_classes = [AnonRateThrottle]
             self.permission_classes = [permissions.AllowAny]
-        elif self.action == 'destroy':
+        elif self.action in ('destroy', 'export'):
             self.permission_classes = [permissions.IsAdminUser]
+        elif self.action == 'bulk':
+            self.throttle_classes = [BatchRateThrottle]
+            self.permission_classes = [IsInstitute]
         else:
             self.permission_classes = [permissions.IsAuthenticated]
         return super().get_permissions()
 
-    @silk_profile(name='Get User')
+    @profile(name='Get User')
     def get_queryset(self):
         """
         Restrict the queryset to the current user for non-admin users.
@@ -47,17 +83,72 @@ class UserViewSet(viewsets.ModelViewSet):
             return User.objects.all()
         return User.objects.filter(id=user.id)
 
-    @silk_profile(name='Update User')
+    def list(self, request, *args, **kwargs):
+        """
+        Page through the read fields of the users (see ``UserReader``).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            # Fetching fewer columns lets the database scan a covering index
+            # in its own order; keep the primary key order full rows came in.
+            queryset = queryset.order_by('pk')
+        queryset = user_reader.values(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(user_reader.many(page))
+        return Response(user_reader.many(queryset))
+
+    def conditional_retrieve(self, request, user):
+        """
+        Answer a retrieve of ``user`` with 304 when the client's copy is
+        current, without serializing the user.
+
+        ``updated_at`` is stamped on the row by every save and update, so it
+        gives both the ETag and Last-Modified, the same in every worker.
+        Browsable API pages are not conditional.
+        """
+        if request.accepted_renderer.format != 'json':
+            return Response(user_reader.one(user))
+        updated_at = user.updated_at.timestamp()
+        etag = f'"{user.pk}-{round(updated_at * 1_000_000)}-{user_reader.tag}"'
+        last_modified = int(updated_at)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = Response(user_reader.one(user))
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        # Per-user data: browsers and proxies keep it private and revalidate it.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_retrieve(request, self.get_object())
+
+    def is_own_object_lookup(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return str(self.request.user.pk) == str(self.kwargs.get(lookup_url_kwarg))
+
+    def get_object(self):
+        """
+        Serve a user's own profile on retrieve from the already authenticated
+        (and cached) request user instead of reading the row again.
+        """
+        if self.action == 'retrieve' and self.is_own_object_lookup():
+            self.check_object_permissions(self.request, self.request.user)
+            return self.request.user
+        return super().get_object()
+
+    @profile(name='Update User')
     def perform_update(self, serializer):
         """
         Allow users to update only their own data.
         """
-        if self.request.user != self.get_object():
+        if self.request.user != serializer.instance:
             raise PermissionDenied("You are not allowed to update this user.")
         logger.info(f"User {self.request.user.email} updated their account.")
         serializer.save()
 
-    @silk_profile(name='Delete User')
+    @profile(name='Delete User')
     def perform_destroy(self, instance):
         """
         Only allow admin users to delete a user.
@@ -67,10 +158,228 @@ class UserViewSet(viewsets.ModelViewSet):
         logger.warning(f"Admin {self.request.user.email} deleted user {instance.email}.")
         instance.delete()
 
-    @silk_profile(name='Create User')
+    @profile(name='Create User')
     def perform_create(self, serializer):
         """
-        Create a new user with Silk profiling.
+        Create a new user, profiled when the request is sampled.
         """
         user = serializer.save()
         logger.info(f"User {user.email} created successfully.")
+
+    @action(detail=True, methods=['get'], url_path='referrals/stats')
+    def referral_stats(self, request, pk=None):
+        """
+        Direct and transitive referral counts, optionally limited by ``depth``
+        and ``since``, with the ``top`` referrers of the subtree.
+        """
+        query = ReferralStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(referral_stats(self.get_object(), **query.validated_data))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every user matching the listing filters (e.g. ``?search=``) as
+        ``?export_format=csv`` (default) or ``jsonl``.
+        """
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        queryset = self.filter_queryset(self.get_queryset()).order_by('pk')
+        return export_response(queryset, query.validated_data['export_format'])
+
+    @action(detail=False, methods=['post'], serializer_class=BulkUserSerializer)
+    @profile(name='Bulk Create Users')
+    def bulk(self, request):
+        """
+        Register ``users`` (``email``/``password`` objects) recommended by the
+        calling institute, with one result per user in the same order.
+
+        Valid users are created even when others are rejected; the response
+        is 201 when at least one user was created, 400 otherwise.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users = [(user['email'], user['password']) for user in serializer.validated_data['users']]
+        try:
+            created, errors = register_batch(users, request.user.pk)
+        except IntegrityError:
+            # An email was registered between the duplicate check and the insert.
+            raise ValidationError({'users': "Some users were registered meanwhile, retry the batch."})
+
+        results = [{'email': email.strip().lower(), 'status': 'created'} for email, _ in users]
+        for index, user in created.items():
+            results[index]['id'] = user.pk
+        for index, email, message in errors:
+            results[index] = {'email': email, 'status': 'rejected', 'error': message}
+        logger.info(f"Institute {request.user.email} registered {len(created)} of {len(users)} users.")
+        return Response(
+            {'created': len(created), 'rejected': len(errors), 'results': results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class AsyncViewSetMixin:
+    """
+    Dispatch viewset actions as coroutines when served over ASGI.
+
+    Actions defined with ``async def`` run on the event loop; other actions
+    are run through ``sync_to_async``. Authentication, permission and
+    throttle checks are the same ``initial()`` as the sync viewset, run once
+    the session user (if any) has been loaded asynchronously.
+    """
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        return markcoroutinefunction(super().as_view(actions, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Load the session user without blocking the loop; requests carrying
+            # credentials in the Authorization header do not need the session.
+            if hasattr(request._request, 'auser') and 'HTTP_AUTHORIZATION' not in request.META:
+                request._request.user = await request._request.auser()
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        if self.action == 'retrieve' and self.is_own_object_lookup():
+            self.check_object_permissions(self.request, self.request.user)
+            return self.request.user
+        # get_queryset() is sync code (and profiled), build it on the
+        # request's sync thread and only await the query itself.
+        queryset = self.filter_queryset(await sync_to_async(self.get_queryset)())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncUserViewSet(AsyncViewSetMixin, UserViewSet):
+    """
+    ``UserViewSet`` with async create, retrieve and update for ASGI workers.
+
+    Registration and password changes hash on the hashing service's executor
+    and write with the async ORM, so a worker does not hold a thread for the
+    duration of a PBKDF2 hash.
+    """
+    async def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        serializer.instance = await serializer.acreate(serializer.validated_data)
+        logger.info(f"User {serializer.instance.email} created successfully.")
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    async def retrieve(self, request, *args, **kwargs):
+        user = await self.aget_object()
+        if 'updated_at' in user.get_deferred_fields():
+            # A token user, load the validator off the event loop.
+            await user.arefresh_from_db(fields=['updated_at'])
+        return self.conditional_retrieve(request, user)
+
+    async def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        if self.request.user != instance:
+            raise PermissionDenied("You are not allowed to update this user.")
+        logger.info(f"User {self.request.user.email} updated their account.")
+        serializer.instance = await serializer.aupdate(instance, serializer.validated_data)
+        return Response(serializer.data)
+
+    async def partial_update(self, request, *args, **kwargs):
+        kwargs['partial'] = True
+        return await self.update(request, *args, **kwargs)
+
+
+class TokenObtainView(APIView):
+    """
+    Exchange email and password for a signed access/refresh token pair.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [AnonRateThrottle]
+    serializer_class = TokenObtainSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = authenticate(request, **serializer.validated_data)
+        if user is None:
+            raise AuthenticationFailed("Invalid email or password.")
+        logger.info(f"User {user.email} obtained an access token.")
+        return Response(signed_tokens.issue(user))
+
+
+class TokenRefreshView(APIView):
+    """
+    Exchange a refresh token for a new token pair; the refresh token is single use.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    serializer_class = TokenRefreshSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            claims = signed_tokens.verify(serializer.validated_data['refresh'], REFRESH_TOKEN)
+        except signing.BadSignature:
+            raise AuthenticationFailed("Invalid or expired refresh token.")
+
+        # Claims may have changed since the token was issued, re-read them, from
+        # the primary on a cache miss (see CachedModelBackend.load_user).
+        user = user_cache.get(
+            claims['uid'], lambda pk: User.objects.using(DEFAULT_DB_ALIAS).filter(pk=pk, is_active=True).first(),
+        )
+        if user is None or not user.is_active:
+            raise AuthenticationFailed("User is inactive or deleted.")
+        if not signed_tokens.revoke(claims, REFRESH_TOKEN):
+            # Used concurrently by another request, which got the new pair.
+            raise AuthenticationFailed("Invalid or expired refresh token.")
+        return Response(signed_tokens.issue(user))
+
+
+class TokenRevokeView(APIView):
+    """
+    Revoke a refresh token and, when the request is made with one, the current access token.
+    """
+    authentication_classes = [SignedTokenAuthentication]
+    permission_classes = [permissions.AllowAny]
+    serializer_class = TokenRefreshSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            claims = signed_tokens.verify(serializer.validated_data['refresh'], REFRESH_TOKEN)
+        except signing.BadSignature:
+            raise AuthenticationFailed("Invalid or expired refresh token.")
+        signed_tokens.revoke(claims, REFRESH_TOKEN)
+        if request.auth is not None:
+            signed_tokens.revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)